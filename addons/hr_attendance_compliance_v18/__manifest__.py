@@ -1,6 +1,6 @@
 {
     'name': 'Cumplimiento de Asistencia y Horarios',
-    'version': '18.0.1.0.8',
+    'version': '18.0.1.1.0',
     'category': 'Human Resources',
     'summary': 'Reporte de Cumplimiento de Horarios y Asistencia',
     'description': """
@@ -23,10 +23,18 @@
         'security/ir.model.access.csv',
         'security/attendance_rules.xml',
         'wizards/import_attendance_wizard_views.xml',
+        'wizards/propagate_schedule_wizard_views.xml',
+        'wizards/export_attendance_wizard_views.xml',
         'views/attendance_report_views.xml',
         'views/attendance_schedule_views.xml',
+        'views/attendance_import_job_views.xml',
+        'views/attendance_zk_device_views.xml',
+        'views/attendance_trend_views.xml',
+        'views/attendance_heatmap_templates.xml',
         'views/menu.xml',
         'data/ir_config_parameter.xml',
+        'data/attendance_department_rule_data.xml',
+        'data/ir_cron_data.xml',
     ],
     'images': ['static/description/icon.png'],
     'installable': True,
@@ -38,5 +46,5 @@
             'hr_attendance_compliance_v18/static/src/css/attendance_dashboard.css',
         ],
     },
-    'external_dependencies': {'python': ['openpyxl', 'requests']},
+    'external_dependencies': {'python': ['openpyxl']},
 }
\ No newline at end of file
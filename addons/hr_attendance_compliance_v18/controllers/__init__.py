@@ -1 +1,5 @@
-from . import zk_ping
\ No newline at end of file
+from . import zk_ping
+from . import dashboard
+from . import export
+from . import heatmap
+from . import iclock
\ No newline at end of file
@@ -0,0 +1,64 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from odoo import fields, http
+from odoo.http import request
+
+# Segundos durante los que se sirve el resultado sin consultar la base de datos
+DASHBOARD_CACHE_TTL = 60
+# Entradas máximas en caché por proceso
+DASHBOARD_CACHE_SIZE = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class AttendanceDashboardController(http.Controller):
+
+    @http.route('/zk/dashboard', type='http', auth='user', methods=['GET'])
+    def attendance_dashboard(self, company_id=None, date_from=None, date_to=None, **kwargs):
+        """KPIs agregados de asistencia en JSON para paneles de pared.
+
+        El resultado se cachea por (base de datos, compañía, rango, versión de
+        datos). Dentro del TTL no se consulta la base de datos; pasado el TTL
+        sólo se comprueba la versión y se recalcula si los datos cambiaron.
+        """
+        env = request.env
+        try:
+            company_id = int(company_id) if company_id else env.company.id
+            date_to = fields.Date.to_date(date_to) or fields.Date.context_today(env.user)
+            date_from = fields.Date.to_date(date_from) or date_to - timedelta(days=30)
+        except ValueError:
+            return self._json_response({'error': 'invalid parameters'}, status=400)
+        if company_id not in env.user.company_ids.ids or date_from > date_to:
+            return self._json_response({'error': 'invalid parameters'}, status=400)
+
+        Report = env['hr.attendance.report'].with_company(company_id)
+        Report.check_access('read')
+
+        key = (env.cr.dbname, company_id, date_from, date_to)
+        now = time.monotonic()
+        with _cache_lock:
+            entry = _cache.get(key)
+        if entry and entry['expires'] > now:
+            return self._json_response(entry['data'])
+
+        version = Report._get_dashboard_version(company_id, date_from, date_to)
+        if not entry or entry['version'] != version:
+            entry = {'version': version, 'data': Report._get_dashboard_data(company_id, date_from, date_to)}
+        entry = dict(entry, expires=now + DASHBOARD_CACHE_TTL)
+        with _cache_lock:
+            _cache[key] = entry
+            _cache.move_to_end(key)
+            while len(_cache) > DASHBOARD_CACHE_SIZE:
+                _cache.popitem(last=False)
+        return self._json_response(entry['data'])
+
+    def _json_response(self, data, status=200):
+        return request.make_response(json.dumps(data), status=status, headers=[
+            ('Content-Type', 'application/json'),
+            ('Cache-Control', 'private, max-age=%s' % DASHBOARD_CACHE_TTL),
+        ])
@@ -0,0 +1,70 @@
+import logging
+
+from werkzeug.exceptions import BadRequest, NotFound
+from werkzeug.wsgi import wrap_file
+
+from odoo import api, fields, http
+from odoo.http import request, content_disposition
+
+from ..tools import export_writers
+
+_logger = logging.getLogger(__name__)
+
+# Tipo de exportación -> (modelo, prefijo del archivo, título de la hoja)
+EXPORTS = {
+    'report': ('hr.attendance.report', 'asistencia', 'Registros'),
+    'summary': ('hr.attendance.report.summary', 'resumenes', 'Resumenes'),
+}
+
+
+class AttendanceExportController(http.Controller):
+
+    @http.route('/zk/export/<string:kind>', type='http', auth='user', methods=['GET'])
+    def attendance_export(self, kind, file_format='csv', company_id=None, date_from=None, date_to=None, **kwargs):
+        """Descarga los registros diarios o los resúmenes de un rango en CSV o XLSX.
+
+        Las filas se leen por lotes y se escriben a medida que llegan: el CSV
+        se envía mientras se genera y el XLSX se escribe en modo de sólo
+        escritura sobre un archivo temporal.
+        """
+        if kind not in EXPORTS or file_format not in ('csv', 'xlsx'):
+            raise NotFound()
+        env = request.env
+        try:
+            company_id = int(company_id) if company_id else env.company.id
+            date_from = fields.Date.to_date(date_from)
+            date_to = fields.Date.to_date(date_to)
+        except ValueError:
+            raise BadRequest('invalid parameters')
+        if company_id not in env.user.company_ids.ids or not date_from or not date_to or date_from > date_to:
+            raise BadRequest('invalid parameters')
+
+        model_name, prefix, title = EXPORTS[kind]
+        Model = env[model_name].with_company(company_id)
+        Model.check_access('read')
+        file_name = '%s_%s_%s.%s' % (prefix, date_from, date_to, file_format)
+
+        if file_format == 'xlsx':
+            output = export_writers.write_xlsx(
+                Model._get_export_header(), Model._iter_export_rows(company_id, date_from, date_to), title)
+            return http.Response(wrap_file(request.httprequest.environ, output), direct_passthrough=True, headers=[
+                ('Content-Type', export_writers.XLSX_MIMETYPE),
+                ('Content-Disposition', content_disposition(file_name)),
+            ])
+        body = self._stream_csv(env.registry, env.uid, dict(env.context), model_name, company_id, date_from, date_to)
+        return http.Response(body, direct_passthrough=True, headers=[
+            ('Content-Type', export_writers.CSV_MIMETYPE),
+            ('Content-Disposition', content_disposition(file_name)),
+        ])
+
+    def _stream_csv(self, registry, uid, context, model_name, company_id, date_from, date_to):
+        # El cursor de la petición se cierra antes de enviar la respuesta:
+        # el CSV se genera con un cursor propio mientras se transmite
+        with registry.cursor() as cr:
+            Model = api.Environment(cr, uid, context)[model_name].with_company(company_id)
+            try:
+                yield from export_writers.iter_csv(
+                    Model._get_export_header(), Model._iter_export_rows(company_id, date_from, date_to))
+            except Exception:
+                _logger.exception('Attendance export of %s interrupted', model_name)
+                raise
\ No newline at end of file
@@ -0,0 +1,82 @@
+import json
+from datetime import date
+from urllib.parse import urlencode
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields, http
+from odoo.http import request
+
+# Empleados por página por defecto y máximo
+HEATMAP_PAGE_SIZE = 50
+HEATMAP_MAX_PAGE_SIZE = 500
+
+
+class AttendanceHeatmapController(http.Controller):
+
+    @http.route('/zk/heatmap', type='http', auth='user', methods=['GET'])
+    def attendance_heatmap(self, **kwargs):
+        """Mapa de calor mensual en JSON, una entrada compacta por empleado.
+
+        ``days`` trae un carácter por día del mes ('o' a tiempo, 'l' retrasado,
+        'a' ausente, '.' sin registro) y ``late`` los minutos de retraso de
+        cada día. Se pagina por empleado con ``offset`` y ``limit``.
+        """
+        params = self._parse_params(kwargs)
+        if not params:
+            return self._json_response({'error': 'invalid parameters'}, status=400)
+        return self._json_response(self._get_data(*params))
+
+    @http.route('/zk/heatmap/view', type='http', auth='user', methods=['GET'])
+    def attendance_heatmap_view(self, **kwargs):
+        """Misma información que /zk/heatmap como tabla HTML de empleados por día"""
+        params = self._parse_params(kwargs)
+        if not params:
+            return request.make_response('invalid parameters', status=400)
+        company_id, month, offset, limit, department_id = params
+        data = self._get_data(*params)
+        base = {'company_id': company_id, 'limit': limit}
+        if department_id:
+            base['department_id'] = department_id
+
+        def url(**values):
+            return '/zk/heatmap/view?%s' % urlencode(dict(base, **values))
+
+        return request.render('hr_attendance_compliance_v18.attendance_heatmap_page', {
+            'data': data,
+            'weekdays': [(data['first_weekday'] + day) % 7 for day in range(data['days'])],
+            'prev_month_url': url(month=(month - relativedelta(months=1)).strftime('%Y-%m')),
+            'next_month_url': url(month=(month + relativedelta(months=1)).strftime('%Y-%m')),
+            'prev_page_url': url(month=data['month'], offset=max(offset - limit, 0)) if offset else None,
+            'next_page_url': url(month=data['month'], offset=offset + limit)
+            if offset + limit < data['total'] else None,
+        })
+
+    def _parse_params(self, kwargs):
+        env = request.env
+        try:
+            company_id = int(kwargs['company_id']) if kwargs.get('company_id') else env.company.id
+            month = kwargs.get('month')
+            if month:
+                year, month = month.split('-')
+                month = date(int(year), int(month), 1)
+            else:
+                month = fields.Date.context_today(env.user).replace(day=1)
+            offset = int(kwargs.get('offset') or 0)
+            limit = int(kwargs.get('limit') or HEATMAP_PAGE_SIZE)
+            department_id = int(kwargs['department_id']) if kwargs.get('department_id') else None
+        except ValueError:
+            return None
+        if company_id not in env.user.company_ids.ids or offset < 0 or not 0 < limit <= HEATMAP_MAX_PAGE_SIZE:
+            return None
+        env['hr.attendance.report'].with_company(company_id).check_access('read')
+        return company_id, month, offset, limit, department_id
+
+    def _get_data(self, company_id, month, offset, limit, department_id):
+        return request.env['hr.attendance.report'].with_company(company_id)._get_heatmap_data(
+            company_id, month, offset, limit, department_id)
+
+    def _json_response(self, data, status=200):
+        return request.make_response(json.dumps(data), status=status, headers=[
+            ('Content-Type', 'application/json'),
+        ])
\ No newline at end of file
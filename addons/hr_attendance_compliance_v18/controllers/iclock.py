@@ -0,0 +1,117 @@
+import ipaddress
+import logging
+from datetime import datetime
+
+from odoo import http
+from odoo.http import request
+from odoo.tools import consteq
+
+_logger = logging.getLogger(__name__)
+
+# Configuración que se devuelve al terminal en el saludo inicial
+HANDSHAKE_OPTIONS = (
+    'ErrorDelay=30',
+    'Delay=10',
+    'TransTimes=00:00;14:05',
+    'TransInterval=1',
+    'TransFlag=TransData AttLog',
+    'Realtime=1',
+    'Encrypt=0',
+)
+
+
+class IclockController(http.Controller):
+    """Recepción de marcas en el estilo del protocolo ADMS/iclock de ZK.
+
+    Cada envío se guarda con un solo INSERT en hr.attendance.punch.staging y
+    se confirma de inmediato; un cron incorpora después las marcas a los
+    registros diarios, de modo que la petición no ocupa el worker más que lo
+    imprescindible.
+    """
+
+    def _text(self, body, status=200):
+        return request.make_response(body, status=status, headers=[('Content-Type', 'text/plain')])
+
+    def _device(self, serial_number):
+        """(device_id, company_id) del terminal que envía, o None.
+
+        El número de serie sólo identifica al terminal: el envío debe traer
+        además su token (cabecera X-Iclock-Token) o venir de una de sus redes
+        permitidas, según lo configurado. Los rechazos se registran en el log
+        y se cuentan en el terminal.
+        """
+        if not serial_number:
+            return None
+        Device = request.env['hr.attendance.zk.device'].sudo()
+        device = Device._get_push_device(serial_number)
+        remote_addr = request.httprequest.remote_addr
+        if not device:
+            _logger.warning('Rejected iclock push from %s: unknown serial number %r', remote_addr, serial_number)
+            return None
+        device_id, company_id, token, networks = device
+        reason = None
+        if token and not consteq(request.httprequest.headers.get('X-Iclock-Token', ''), token):
+            reason = 'invalid token'
+        elif networks and not self._address_allowed(remote_addr, networks):
+            reason = 'address not allowed'
+        if reason:
+            _logger.warning('Rejected iclock push for device %s from %s: %s', serial_number, remote_addr, reason)
+            Device._record_push_rejected(device_id)
+            return None
+        return device_id, company_id
+
+    def _address_allowed(self, remote_addr, networks):
+        try:
+            address = ipaddress.ip_address(remote_addr or '')
+        except ValueError:
+            return False
+        return any(address in network for network in networks)
+
+    @http.route('/iclock/cdata', type='http', auth='public', methods=['GET'], csrf=False, save_session=False)
+    def iclock_handshake(self, SN=None, **kwargs):
+        device = self._device(SN)
+        if not device:
+            return self._text('Unknown device', status=403)
+        stamp = request.env['hr.attendance.zk.device'].sudo().browse(device[0]).push_stamp or 'None'
+        return self._text('\n'.join((
+            'GET OPTION FROM: %s' % SN,
+            'ATTLOGStamp=%s' % stamp,
+            'OPERLOGStamp=9999',
+        ) + HANDSHAKE_OPTIONS))
+
+    @http.route('/iclock/cdata', type='http', auth='public', methods=['POST'], csrf=False, save_session=False)
+    def iclock_upload(self, SN=None, table=None, Stamp=None, **kwargs):
+        device = self._device(SN)
+        if not device:
+            return self._text('Unknown device', status=403)
+        if table != 'ATTLOG':
+            # Otras tablas (OPERLOG, usuarios...) no se procesan
+            return self._text('OK')
+        punches = self._parse_attlog(request.httprequest.get_data(as_text=True))
+        device_id, company_id = device
+        env = request.env(su=True)
+        env['hr.attendance.punch.staging']._stage(device_id, company_id, punches)
+        env['hr.attendance.zk.device']._record_push(device_id, Stamp)
+        return self._text('OK: %s' % len(punches))
+
+    @http.route('/iclock/getrequest', type='http', auth='public', methods=['GET'], csrf=False, save_session=False)
+    def iclock_getrequest(self, SN=None, **kwargs):
+        # No hay comandos pendientes para el terminal
+        return self._text('OK')
+
+    @http.route('/iclock/devicecmd', type='http', auth='public', methods=['POST'], csrf=False, save_session=False)
+    def iclock_devicecmd(self, SN=None, **kwargs):
+        return self._text('OK')
+
+    def _parse_attlog(self, body):
+        """Líneas 'PIN<TAB>AAAA-MM-DD HH:MM:SS<TAB>...' -> [(pin, datetime)]; descarta las inválidas"""
+        punches = []
+        for line in body.splitlines():
+            parts = line.split('\t', 2)
+            if len(parts) < 2:
+                continue
+            try:
+                punches.append((parts[0].strip(), datetime.fromisoformat(parts[1].strip())))
+            except ValueError:
+                _logger.debug('Ignoring malformed ATTLOG line: %r', line)
+        return punches
\ No newline at end of file
@@ -1,2 +1,10 @@
 from . import attendance_report
-from . import attendance_schedule
\ No newline at end of file
+from . import attendance_report_archive
+from . import attendance_report_monthly
+from . import attendance_schedule
+from . import attendance_trend
+from . import attendance_import_job
+from . import attendance_zk_device
+from . import attendance_punch
+from . import attendance_punch_staging
+from . import hr_employee
\ No newline at end of file
@@ -0,0 +1,329 @@
+import functools
+import itertools
+import logging
+import os
+import time
+import traceback
+
+from odoo import models, fields, api, _
+
+from ..tools import import_readers
+from ..tools import parallel_parse
+
+_logger = logging.getLogger(__name__)
+
+# Filas procesadas (y confirmadas) por bloque
+JOB_CHUNK_SIZE = 5000
+# Segundos de trabajo por ejecución del cron antes de ceder el turno
+JOB_TIME_LIMIT = 240
+# Contadores de _create_attendance_records y campo del registro donde se acumulan
+STAT_FIELDS = {
+    'created': 'records_inserted',
+    'updated': 'records_updated',
+    'unchanged': 'records_unchanged',
+    'skipped': 'rows_skipped',
+    'unmatched': 'employees_unmatched',
+    'employees_created': 'employees_created',
+    'time_match': 'time_match',
+    'time_resolve': 'time_resolve',
+    'time_write': 'time_write',
+}
+# Métricas que guardan el máximo entre ejecuciones en lugar de la suma
+PEAK_FIELDS = {'peak_file_size'}
+# Procesos de parseo por defecto (parámetro hr_attendance_compliance_v18.import_workers)
+IMPORT_WORKERS = 4
+
+
+class AttendanceImportJob(models.Model):
+    _name = 'hr.attendance.import.job'
+    _description = 'Trabajo de Importación de Asistencia'
+    _order = 'id desc'
+
+    name = fields.Char(string='Nombre', compute='_compute_name', store=True)
+    file_data = fields.Binary(string='Archivo CSV/Excel', attachment=True)
+    file_name = fields.Char(string='Nombre del Archivo')
+    attachment_ids = fields.Many2many('ir.attachment', 'hr_attendance_import_job_attachment_rel',
+                                      'job_id', 'attachment_id', string='Archivos')
+    file_hash = fields.Char(string='Huella del Archivo', readonly=True, index=True, copy=False,
+                            help='SHA-256 del contenido, para detectar archivos ya importados.')
+    company_id = fields.Many2one('res.company', string='Compañía', required=True,
+                                 default=lambda self: self.env.company, index=True)
+    state = fields.Selection([
+        ('queued', 'En Cola'),
+        ('running', 'En Proceso'),
+        ('done', 'Completado'),
+        ('failed', 'Fallido'),
+    ], string='Estado', default='queued', required=True, index=True)
+    rows_done = fields.Integer(string='Filas Procesadas', default=0, readonly=True)
+    # Posición de la siguiente fila: archivo (tras expandir los zip) y fila dentro de él
+    file_index = fields.Integer(string='Archivo Actual', default=0, readonly=True, copy=False)
+    file_row = fields.Integer(string='Fila del Archivo Actual', default=0, readonly=True, copy=False)
+    records_count = fields.Integer(string='Registros Importados', default=0, readonly=True)
+    records_inserted = fields.Integer(string='Registros Nuevos', default=0, readonly=True)
+    records_updated = fields.Integer(string='Registros Actualizados', default=0, readonly=True)
+    records_unchanged = fields.Integer(string='Registros sin Cambios', default=0, readonly=True)
+    rows_skipped = fields.Integer(string='Filas Descartadas', default=0, readonly=True,
+                                  help='Filas sin fecha válida.')
+    employees_unmatched = fields.Integer(string='Filas sin Empleado', default=0, readonly=True)
+    employees_created = fields.Integer(string='Empleados Creados', default=0, readonly=True)
+    error_count = fields.Integer(string='Filas con Error', default=0, readonly=True)
+    error_ids = fields.One2many('hr.attendance.import.job.error', 'job_id', string='Errores')
+    # {employee_id: [fecha mínima, fecha máxima]} acumulado entre bloques
+    summary_ranges = fields.Json(string='Rangos de Resumen', default=dict)
+    date_started = fields.Datetime(string='Inicio', readonly=True)
+    date_finished = fields.Datetime(string='Fin', readonly=True)
+    message = fields.Text(string='Detalle', readonly=True)
+    error_details = fields.Text(string='Traza del Error', readonly=True, copy=False)
+    # Instrumentación por fase (segundos acumulados entre ejecuciones del cron)
+    time_decode = fields.Float(string='Lectura (s)', readonly=True, digits=(16, 3),
+                               help='Lectura de los adjuntos y descompresión de los zip.')
+    time_parse = fields.Float(string='Parseo (s)', readonly=True, digits=(16, 3),
+                              help='Decodificación del texto y parseo de las filas. Con varios archivos '
+                                   'en procesos de parseo, espera a sus filas (incluye su lectura).')
+    time_match = fields.Float(string='Empleados (s)', readonly=True, digits=(16, 3))
+    time_resolve = fields.Float(string='Horarios y Valores (s)', readonly=True, digits=(16, 3))
+    time_write = fields.Float(string='Escritura (s)', readonly=True, digits=(16, 3))
+    time_summarize = fields.Float(string='Resúmenes (s)', readonly=True, digits=(16, 3))
+    duration = fields.Float(string='Duración (s)', compute='_compute_duration', store=True, digits=(16, 3))
+    query_count = fields.Integer(string='Consultas SQL', default=0, readonly=True)
+    peak_file_size = fields.Integer(string='Mayor Archivo en Memoria (KB)', default=0, readonly=True,
+                                    aggregator='max',
+                                    help='Mayor archivo (o miembro de zip) retenido a la vez. '
+                                         'Las filas se procesan en bloques de tamaño fijo.')
+
+    @api.depends('file_name', 'attachment_ids')
+    def _compute_name(self):
+        for job in self:
+            count = len(job.attachment_ids) + (1 if job.file_data else 0)
+            if count > 1:
+                job.name = _('%s archivos') % count
+            else:
+                job.name = job.file_name or job.attachment_ids[:1].name or _('Importación')
+
+    @api.depends('time_decode', 'time_parse', 'time_match', 'time_resolve', 'time_write', 'time_summarize')
+    def _compute_duration(self):
+        for job in self:
+            job.duration = (job.time_decode + job.time_parse + job.time_match
+                            + job.time_resolve + job.time_write + job.time_summarize)
+
+    def _trigger_processing(self):
+        self.env.ref('hr_attendance_compliance_v18.ir_cron_process_import_jobs')._trigger()
+
+    def action_open_form(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
+
+    def action_retry(self):
+        """Reencola un trabajo fallido; continúa desde la última fila confirmada"""
+        self.filtered(lambda j: j.state == 'failed').write({'state': 'queued', 'message': False, 'error_details': False})
+        self._trigger_processing()
+
+    @api.model
+    def _cron_process_jobs(self):
+        """Procesa los trabajos pendientes por bloques, confirmando cada bloque.
+
+        Los trabajos en estado 'running' son los interrumpidos por una caída o
+        por el límite de tiempo y se reanudan desde ``file_index`` y
+        ``file_row``, sin volver a leer los archivos ya procesados.
+        """
+        deadline = time.monotonic() + JOB_TIME_LIMIT
+        for job in self.search([('state', 'in', ('queued', 'running'))], order='id'):
+            if time.monotonic() >= deadline:
+                break
+            job.with_user(job.create_uid).with_company(job.company_id)._process(deadline)
+        if self.search_count([('state', 'in', ('queued', 'running'))], limit=1):
+            self._trigger_processing()
+
+    def _process(self, deadline):
+        self.ensure_one()
+        cr = self.env.cr
+        if self.state == 'queued':
+            self.write({'state': 'running', 'date_started': fields.Datetime.now()})
+            cr.commit()
+        metrics = {}
+        queries = cr.sql_log_count
+        rows = None
+        try:
+            wizard = self.env['import.attendance.wizard'].new({})
+            read_stats = {'time_decode': 0, 'peak_file_size': 0}
+            rows = self._iter_rows(wizard, read_stats)
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                decoded = read_stats['time_decode']
+                chunk = list(itertools.islice(rows, JOB_CHUNK_SIZE))
+                decoded = read_stats['time_decode'] - decoded
+                metrics['time_decode'] = metrics.get('time_decode', 0) + decoded
+                metrics['time_parse'] = metrics.get('time_parse', 0) + time.perf_counter() - start - decoded
+                metrics['peak_file_size'] = read_stats['peak_file_size'] // 1024
+                if not chunk:
+                    self._finish(wizard, metrics, queries)
+                    break
+                self._process_chunk(wizard, chunk, metrics, queries)
+                cr.commit()
+                metrics = {}
+                queries = cr.sql_log_count
+        except Exception as e:
+            cr.rollback()
+            _logger.exception('Attendance import job %s failed', self.id)
+            # Las métricas del bloque fallido también se conservan
+            self.invalidate_recordset()
+            self.write(dict(self._log_values(metrics, queries), **{
+                'state': 'failed',
+                'message': _('Error al procesar el archivo: %s') % str(e),
+                'error_details': traceback.format_exc(),
+                'date_finished': fields.Datetime.now(),
+            }))
+            cr.commit()
+        finally:
+            # Termina los procesos de parseo si el trabajo cede el turno a medias
+            if rows is not None:
+                rows.close()
+
+    def _iter_rows(self, wizard, stats):
+        """Filas del trabajo como en _iter_import_rows, desde ``file_index`` y ``file_row``.
+
+        Si quedan varios archivos en el filestore, cada uno se parsea en un
+        proceso hijo (parallel_parse) y aquí sólo se consumen sus filas; si
+        no, los archivos se leen en streaming en este proceso.
+        """
+        workers = self._get_import_workers()
+        files = self._get_source_files() if workers > 1 else None
+        if not files or len(files) - self.file_index < 2:
+            return wizard._iter_import_rows(self._get_sources(), self.file_index, self.file_row, stats=stats)
+        if any(import_readers.file_kind(name) == 'excel' for name, _path, _member in files[self.file_index:]):
+            wizard._check_excel_support()
+        return parallel_parse.iter_parallel_rows(files, workers, self.file_index, self.file_row, stats=stats)
+
+    @api.model
+    def _get_import_workers(self):
+        """Procesos de parseo en paralelo; 0 o 1 parsea en el propio proceso"""
+        value = self.env['ir.config_parameter'].sudo().get_param('hr_attendance_compliance_v18.import_workers')
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return min(IMPORT_WORKERS, os.cpu_count() or 1)
+
+    def _get_source_files(self):
+        """Archivos del trabajo, con los zip expandidos, como tuplas (nombre, ruta,
+        miembro del zip o None) para parallel_parse; None si alguno no está en
+        el filestore.
+        """
+        sources = []
+        for name, attachment in self._get_source_attachments():
+            attachment = attachment.sudo()
+            if not attachment.store_fname:
+                return None
+            sources.append((name, attachment._full_path(attachment.store_fname)))
+        return parallel_parse.list_source_files(sources)
+
+    def _get_sources(self):
+        """Archivos del trabajo como pares (nombre, cargador del contenido binario).
+
+        Cada archivo se lee sólo al llamar a su cargador y no queda en la caché
+        del entorno, de modo que en memoria hay un solo archivo a la vez.
+        """
+        return [
+            (name, functools.partial(self._read_raw, attachment.with_prefetch()))
+            for name, attachment in self._get_source_attachments()
+        ]
+
+    def _get_source_attachments(self):
+        """Pares (nombre, ir.attachment) de los archivos del trabajo, en orden"""
+        sources = [(attachment.name, attachment) for attachment in self.attachment_ids]
+        if self.file_data:
+            attachment = self.env['ir.attachment'].sudo().search([
+                ('res_model', '=', self._name),
+                ('res_field', '=', 'file_data'),
+                ('res_id', '=', self.id),
+            ], limit=1)
+            sources.insert(0, (self.file_name or '', attachment))
+        return sources
+
+    @api.model
+    def _read_raw(self, attachment):
+        data = attachment.raw
+        attachment.invalidate_recordset(['raw', 'datas'])
+        return data
+
+    def _log_values(self, metrics, queries):
+        """Valores que suman ``metrics`` ({campo: incremento}) y las consultas
+        SQL ejecutadas desde ``queries`` a los acumulados del trabajo"""
+        vals = {field: self[field] + value for field, value in metrics.items() if field not in PEAK_FIELDS}
+        for field in PEAK_FIELDS & set(metrics):
+            vals[field] = max(self[field], metrics[field])
+        vals['query_count'] = self.query_count + self.env.cr.sql_log_count - queries
+        return vals
+
+    def _process_chunk(self, wizard, chunk, metrics=None, queries=None):
+        """Procesa un bloque de tuplas (archivo, fila, datos) de _iter_import_rows"""
+        errors = []
+        stats = {}
+        records = wizard._create_attendance_records([row for _file, _row, row in chunk], errors=errors, stats=stats)
+        metrics = dict(metrics or {})
+        for key, field in STAT_FIELDS.items():
+            metrics[field] = metrics.get(field, 0) + stats.get(key, 0)
+
+        ranges = dict(self.summary_ranges or {})
+        for employee, date_min, date_max in self.env['hr.attendance.report']._read_group(
+                [('id', 'in', records.ids)], ['employee_id'], ['date:min', 'date:max']):
+            key = str(employee.id)
+            if key in ranges:
+                date_min = min(date_min, fields.Date.to_date(ranges[key][0]))
+                date_max = max(date_max, fields.Date.to_date(ranges[key][1]))
+            ranges[key] = [fields.Date.to_string(date_min), fields.Date.to_string(date_max)]
+
+        self.env['hr.attendance.import.job.error'].create([{
+            'job_id': self.id,
+            'row_number': self.rows_done + index + 1,
+            'message': message,
+        } for index, message in errors])
+        vals = self._log_values(metrics, self.env.cr.sql_log_count if queries is None else queries)
+        vals.update({
+            'rows_done': self.rows_done + len(chunk),
+            'file_index': chunk[-1][0],
+            'file_row': chunk[-1][1] + 1,
+            'records_count': self.records_count + len(records),
+            'error_count': self.error_count + len(errors),
+            'summary_ranges': ranges,
+        })
+        self.write(vals)
+
+    def _finish(self, wizard, metrics=None, queries=None):
+        queries = self.env.cr.sql_log_count if queries is None else queries
+        metrics = dict(metrics or {})
+        if not self.rows_done:
+            self.write(dict(self._log_values(metrics, queries), **{
+                'state': 'failed',
+                'message': _('El archivo no contiene datos válidos.'),
+                'date_finished': fields.Datetime.now(),
+            }))
+            return
+        start = time.perf_counter()
+        wizard._generate_summaries({
+            int(employee_id): (fields.Date.to_date(date_min), fields.Date.to_date(date_max))
+            for employee_id, (date_min, date_max) in (self.summary_ranges or {}).items()
+        })
+        metrics['time_summarize'] = time.perf_counter() - start
+        self.write(dict(self._log_values(metrics, queries), **{
+            'state': 'done',
+            'message': _('Se importaron %s registros de asistencia (%s nuevos, %s actualizados, %s sin cambios).') % (
+                self.records_count, self.records_inserted, self.records_updated, self.records_unchanged),
+            'date_finished': fields.Datetime.now(),
+        }))
+        self.env.cr.commit()
+
+
+class AttendanceImportJobError(models.Model):
+    _name = 'hr.attendance.import.job.error'
+    _description = 'Error de Importación de Asistencia'
+    _order = 'job_id, row_number'
+
+    job_id = fields.Many2one('hr.attendance.import.job', string='Trabajo', required=True, ondelete='cascade', index=True)
+    row_number = fields.Integer(string='Fila')
+    message = fields.Char(string='Mensaje')
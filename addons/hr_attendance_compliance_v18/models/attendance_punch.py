@@ -0,0 +1,110 @@
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.tools.sql import create_index
+
+from ..tools.time_utils import format_minutes
+
+_logger = logging.getLogger(__name__)
+
+# Registros diarios escritos por llamada a _bulk_upsert durante una reconstrucción
+REBUILD_BATCH_SIZE = 5000
+
+
+class AttendancePunch(models.Model):
+    """Marca individual de un empleado, tal como la registró el terminal.
+
+    Los registros diarios sólo guardan la primera y la última marca; esta tabla
+    conserva todas para poder recalcular los registros diarios (o nuevas
+    métricas) de cualquier periodo sin volver a importar los archivos. Se
+    escribe con un INSERT por lote y la clave única descarta duplicados.
+    """
+    _name = 'hr.attendance.punch'
+    _description = 'Marca de Asistencia'
+    _order = 'punch_time desc, employee_id'
+    _log_access = False
+
+    employee_id = fields.Many2one('hr.employee', string='Empleado', required=True, ondelete='cascade')
+    company_id = fields.Many2one('res.company', string='Compañía', required=True)
+    punch_time = fields.Datetime(string='Marca', required=True,
+                                 help='Hora local del terminal.')
+    source = fields.Selection([
+        ('import', 'Importación'),
+        ('device', 'Descarga de Terminal'),
+        ('push', 'Envío de Terminal'),
+    ], string='Origen', required=True)
+
+    _sql_constraints = [
+        ('unique_employee_punch', 'unique(company_id, employee_id, punch_time)',
+         _('La marca ya está registrada.')),
+    ]
+
+    def init(self):
+        # La clave única cubre los rangos por empleado; éste, los de toda la compañía
+        create_index(self.env.cr, 'hr_attendance_punch_company_time_idx',
+                     self._table, ['company_id', 'punch_time'])
+
+    @api.model
+    def _store(self, company_id, punches, source):
+        """Guarda marcas (employee_id, datetime local) con una sola sentencia.
+
+        Devuelve las marcas que no estaban registradas, como pares
+        (employee_id, datetime).
+        """
+        if not punches:
+            return []
+        self.env.cr.execute("""
+            INSERT INTO hr_attendance_punch (company_id, employee_id, punch_time, source)
+                 SELECT %s, p.employee_id, p.punch_time, %s
+                   FROM unnest(%s::int[], %s::timestamp[]) AS p(employee_id, punch_time)
+            ON CONFLICT (company_id, employee_id, punch_time) DO NOTHING
+              RETURNING employee_id, punch_time
+        """, (company_id, source, [p[0] for p in punches], [p[1] for p in punches]))
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _rebuild_daily(self, company_id, date_from, date_to, employee_ids=None, stats=None):
+        """Reconstruye desde las marcas los registros diarios de un periodo.
+
+        La primera y última marca y el total de cada empleado y día se
+        calculan con una sola consulta de agregación y se escriben con
+        hr.attendance.report._bulk_upsert, que omite las filas sin cambios.
+        Los días sin marcas registradas no se modifican.
+        """
+        query = """
+            SELECT employee_id,
+                   punch_time::date,
+                   min(extract(hour FROM punch_time) * 60 + extract(minute FROM punch_time))::int,
+                   max(extract(hour FROM punch_time) * 60 + extract(minute FROM punch_time))::int,
+                   count(*)
+              FROM hr_attendance_punch
+             WHERE company_id = %s
+               AND punch_time >= %s
+               AND punch_time < %s
+        """
+        params = [company_id, date_from, date_to + timedelta(days=1)]
+        if employee_ids is not None:
+            query += " AND employee_id = ANY(%s)"
+            params.append(list(employee_ids))
+        self.env.cr.execute(query + " GROUP BY 1, 2", params)
+        days = self.env.cr.fetchall()
+
+        Report = self.env['hr.attendance.report'].with_company(company_id)
+        resolve = self.env['hr.attendance.schedule']._get_schedule_resolver(company_id)
+        record_ids = []
+        for start in range(0, len(days), REBUILD_BATCH_SIZE):
+            vals_list = [{
+                'employee_id': employee_id,
+                'date': day,
+                'attended': True,
+                'first_entry': format_minutes(first),
+                'last_exit': format_minutes(last),
+                'total_records': count,
+                'official_entry_time': resolve(employee_id, day),
+                'company_id': company_id,
+            } for employee_id, day, first, last, count in days[start:start + REBUILD_BATCH_SIZE]]
+            record_ids.extend(Report._bulk_upsert(vals_list, stats=stats).ids)
+        _logger.info('Rebuilt %s daily records of company %s from punches (%s - %s)',
+                     len(days), company_id, date_from, date_to)
+        return Report.browse(record_ids)
\ No newline at end of file
@@ -0,0 +1,138 @@
+import logging
+
+from odoo import models, fields, api, _
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+# Marcas incorporadas (y confirmadas) por lote
+FOLD_BATCH_SIZE = 20000
+# Días que se conservan las marcas ya incorporadas para descartar reenvíos
+STAGING_RETENTION_DAYS = 30
+
+
+class AttendancePunchStaging(models.Model):
+    """Marcas recibidas por push, pendientes de incorporar a los registros diarios.
+
+    Los terminales escriben aquí con un único INSERT por envío, sin pasar por
+    el ORM; un cron las agrupa después en hr.attendance.report. La clave única
+    descarta las marcas que el terminal reenvía. Las marcas cuyo código no
+    corresponde a ningún empleado no se pierden: quedan sin empleado y se
+    reintentan cuando cambian los empleados de la compañía.
+    """
+    _name = 'hr.attendance.punch.staging'
+    _description = 'Marca Recibida de Terminal'
+    _order = 'id'
+    _log_access = False
+
+    device_id = fields.Many2one('hr.attendance.zk.device', string='Terminal', required=True, ondelete='cascade')
+    company_id = fields.Many2one('res.company', string='Compañía', required=True)
+    user_code = fields.Char(string='Código de Usuario', required=True)
+    punch_time = fields.Datetime(string='Marca', required=True,
+                                 help='Hora local del terminal.')
+    received_at = fields.Datetime(string='Recibida', required=True)
+    folded = fields.Boolean(string='Incorporada', default=False)
+    unmatched = fields.Boolean(string='Sin Empleado', default=False,
+                               help='Ningún empleado tenía este código en el último intento.')
+    # _get_match_version de la compañía en el último intento, como texto
+    match_version = fields.Char(string='Versión de Empleados', readonly=True)
+
+    _sql_constraints = [
+        ('unique_device_punch', 'unique(device_id, user_code, punch_time)',
+         _('La marca ya fue recibida.')),
+    ]
+
+    def init(self):
+        create_index(self.env.cr, 'hr_attendance_punch_staging_pending_idx',
+                     self._table, ['id'], where='NOT folded AND NOT unmatched')
+        create_index(self.env.cr, 'hr_attendance_punch_staging_unmatched_idx',
+                     self._table, ['company_id'], where='unmatched')
+
+    @api.model
+    def _stage(self, device_id, company_id, punches):
+        """Inserta marcas (código, datetime) con una sola sentencia; devuelve cuántas son nuevas"""
+        if not punches:
+            return 0
+        self.env.cr.execute("""
+            INSERT INTO hr_attendance_punch_staging (device_id, company_id, user_code, punch_time, received_at,
+                                                     folded, unmatched)
+                 SELECT %s, %s, p.user_code, p.punch_time, (now() at time zone 'UTC'), false, false
+                   FROM unnest(%s::varchar[], %s::timestamp[]) AS p(user_code, punch_time)
+            ON CONFLICT (device_id, user_code, punch_time) DO NOTHING
+        """, (device_id, company_id, [p[0] for p in punches], [p[1] for p in punches]))
+        return self.env.cr.rowcount
+
+    @api.model
+    def _cron_fold_punches(self, batch_size=FOLD_BATCH_SIZE):
+        """Incorpora las marcas pendientes a los registros diarios, por lotes.
+
+        Sólo las marcas con empleado se marcan como incorporadas, y se
+        confirman junto con los registros diarios. Las demás quedan sin
+        empleado, con la versión de los empleados con la que se intentaron.
+        SKIP LOCKED permite varias ejecuciones en paralelo.
+        """
+        Device = self.env['hr.attendance.zk.device']
+        Employee = self.env['hr.employee']
+        cr = self.env.cr
+        self._retry_unmatched()
+        cr.commit()
+        while True:
+            cr.execute("""
+                SELECT id, device_id, company_id, user_code, punch_time
+                  FROM hr_attendance_punch_staging
+                 WHERE NOT folded AND NOT unmatched
+              ORDER BY id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+            """, (batch_size,))
+            rows = cr.fetchall()
+            if not rows:
+                break
+            by_device = {}
+            for staging_id, device_id, company_id, user_code, punch_time in rows:
+                by_device.setdefault((device_id, company_id), []).append((staging_id, user_code, punch_time))
+            folded = []
+            unmatched = {}
+            for (device_id, company_id), punches in by_device.items():
+                device = Device.browse(device_id).with_company(company_id)
+                employees = device._get_employee_codes(code for _id, code, _time in punches)
+                matched = []
+                for staging_id, code, punch_time in punches:
+                    if code in employees:
+                        matched.append((employees[code], punch_time))
+                        folded.append(staging_id)
+                    else:
+                        unmatched.setdefault(company_id, []).append(staging_id)
+                self.env['hr.attendance.report'].with_company(company_id)._merge_punches(company_id, matched, source='push')
+            cr.execute("UPDATE hr_attendance_punch_staging SET folded = true WHERE id = ANY(%s)", (folded,))
+            for company_id, ids in unmatched.items():
+                cr.execute("""
+                    UPDATE hr_attendance_punch_staging
+                       SET unmatched = true, match_version = %s
+                     WHERE id = ANY(%s)
+                """, (str(Employee._get_match_version(company_id)), ids))
+            if unmatched:
+                _logger.info('%s pushed punches without a matching employee',
+                             sum(len(ids) for ids in unmatched.values()))
+            cr.commit()
+            self.env.invalidate_all()
+
+        cr.execute("""
+            DELETE FROM hr_attendance_punch_staging
+             WHERE folded AND received_at < (now() at time zone 'UTC') - make_interval(days => %s)
+        """, (STAGING_RETENTION_DAYS,))
+
+    @api.model
+    def _retry_unmatched(self):
+        """Devuelve a pendientes las marcas sin empleado de las compañías cuyos
+        empleados cambiaron (altas, bajas o cambios de código) desde el último
+        intento"""
+        Employee = self.env['hr.employee']
+        cr = self.env.cr
+        cr.execute("SELECT DISTINCT company_id FROM hr_attendance_punch_staging WHERE unmatched")
+        for company_id, in cr.fetchall():
+            cr.execute("""
+                UPDATE hr_attendance_punch_staging
+                   SET unmatched = false
+                 WHERE unmatched AND company_id = %s AND match_version IS DISTINCT FROM %s
+            """, (company_id, str(Employee._get_match_version(company_id))))
\ No newline at end of file
@@ -1,7 +1,64 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools.sql import create_index
 from datetime import datetime, timedelta
-import re
+from dateutil.relativedelta import relativedelta
+import hashlib
+import logging
+
+from ..tools.time_utils import NO_TIME, format_minutes, parse_minutes
+
+_logger = logging.getLogger(__name__)
+
+# Campos cuyo cambio afecta a los resúmenes
+AGGREGATE_FIELDS = {
+    'employee_id', 'company_id', 'date', 'attended', 'first_entry',
+    'official_entry_time', 'late_minutes', 'early_exit_minutes',
+}
+
+
+# Campos de origen incluidos en la huella de fila
+HASHED_FIELDS = {
+    'attended', 'first_entry', 'last_exit', 'total_records', 'official_entry_time', 'early_exit_minutes',
+}
+
+# Meses recientes que revisa la reconciliación nocturna
+RECONCILE_MONTHS = 3
+
+# Filas leídas por consulta al exportar
+EXPORT_BATCH_SIZE = 5000
+
+# Código de un carácter por día en el mapa de calor ('.' = sin registro)
+HEATMAP_CODES = {'on_time': 'o', 'late': 'l', 'absent': 'a'}
+
+# Campos de resumen que escribe _prepare_summary_values, con su tipo SQL
+SUMMARY_VALUE_TYPES = {
+    'total_days': 'int',
+    'attended_days': 'int',
+    'absences': 'int',
+    'total_late_minutes': 'int',
+    'total_early_minutes': 'int',
+    'avg_late_minutes': 'float8',
+    'avg_early_minutes': 'float8',
+    'verdict_type': 'varchar',
+    'verdict_text': 'varchar',
+}
+SUMMARY_VALUE_FIELDS = list(SUMMARY_VALUE_TYPES)
+
+# Umbrales de los veredictos; cada uno puede cambiarse con el parámetro de
+# sistema hr_attendance_compliance_v18.verdict_<nombre>. Las tasas de ausencia
+# son fracciones y los promedios, minutos.
+VERDICT_THRESHOLDS = {
+    'severe_absence_rate': 0.5,
+    'severe_late': 60,
+    'severe_early': 120,
+    'partial_absence_rate': 0.2,
+    'partial_late': 30,
+    'partial_early': 60,
+    'ok_absence_rate': 0.15,
+    'ok_late': 10,
+    'ok_early': 30,
+}
 
 
 class AttendanceReport(models.Model):
@@ -17,8 +74,14 @@ class AttendanceReport(models.Model):
     total_records = fields.Integer(string='Total de Registros', default=0)
     official_entry_time = fields.Char(string='Hora Oficial de Entrada')
     late_minutes = fields.Integer(string='Minutos de Retraso', compute='_compute_late_minutes', store=True)
+    # Horas normalizadas en minutos desde medianoche (-1 = sin hora)
+    first_entry_minutes = fields.Integer(string='Primera Entrada (min)', compute='_compute_time_minutes', store=True)
+    last_exit_minutes = fields.Integer(string='Última Salida (min)', compute='_compute_time_minutes', store=True)
+    official_entry_minutes = fields.Integer(string='Hora Oficial (min)', compute='_compute_time_minutes', store=True)
     early_exit_minutes = fields.Integer(string='Minutos Salida Temprana', default=0)
     company_id = fields.Many2one('res.company', string='Compañía', default=lambda self: self.env.company, index=True)
+    # Huella de los valores importados, para omitir filas sin cambios al reimportar
+    row_hash = fields.Char(string='Huella de Fila', readonly=True, copy=False)
     
     # Campos calculados para análisis
     status = fields.Selection([
@@ -34,6 +97,56 @@ class AttendanceReport(models.Model):
          _('Ya existe un registro para este empleado en esta fecha y compañía.'))
     ]
 
+    def init(self):
+        # Índices compuestos para los patrones de acceso habituales:
+        # compañía + empleado + rango de fechas, y compañía + rango de fechas
+        # (con el empleado, para recorrer el rango en orden al exportar)
+        create_index(self.env.cr, 'hr_attendance_report_company_employee_date_idx',
+                     self._table, ['company_id', 'employee_id', 'date'])
+        create_index(self.env.cr, 'hr_attendance_report_company_date_employee_idx',
+                     self._table, ['company_id', 'date', 'employee_id'])
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if not self.env.context.get('attendance_defer_summary_sync'):
+            self.env['hr.attendance.report.summary']._apply_daily_deltas([], records._read_aggregate_rows())
+        return records
+
+    def write(self, vals):
+        if HASHED_FIELDS & set(vals) and 'row_hash' not in vals:
+            # Una edición manual invalida la huella de la fila importada
+            vals = dict(vals, row_hash=False)
+        if self.env.context.get('attendance_defer_summary_sync') or not AGGREGATE_FIELDS & set(vals):
+            return super().write(vals)
+        old_rows = self._read_aggregate_rows()
+        res = super().write(vals)
+        self.env['hr.attendance.report.summary']._apply_daily_deltas(old_rows, self._read_aggregate_rows())
+        return res
+
+    def unlink(self):
+        old_rows = self._read_aggregate_rows()
+        res = super().unlink()
+        self.env['hr.attendance.report.summary']._apply_daily_deltas(old_rows, [])
+        self.env['hr.attendance.trend.dirty']._mark((row[1], row[2]) for row in old_rows)
+        return res
+
+    def _read_aggregate_rows(self):
+        """Lee de la base de datos los valores que alimentan los resúmenes.
+
+        Devuelve tuplas (employee_id, company_id, date, attended, late_minutes,
+        early_exit_minutes), una por registro.
+        """
+        if not self.ids:
+            return []
+        self.flush_recordset(list(AGGREGATE_FIELDS))
+        self.env.cr.execute("""
+            SELECT employee_id, company_id, date, attended, late_minutes, early_exit_minutes
+              FROM hr_attendance_report
+             WHERE id = ANY(%s)
+        """, [self.ids])
+        return self.env.cr.fetchall()
+
     @api.depends('date')
     def _compute_day_of_week(self):
         days = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
@@ -43,27 +156,20 @@ class AttendanceReport(models.Model):
             else:
                 record.day_of_week = ''
 
-    @api.depends('attended', 'first_entry', 'official_entry_time')
+    @api.depends('first_entry', 'last_exit', 'official_entry_time')
+    def _compute_time_minutes(self):
+        for record in self:
+            record.first_entry_minutes = parse_minutes(record.first_entry)
+            record.last_exit_minutes = parse_minutes(record.last_exit)
+            record.official_entry_minutes = parse_minutes(record.official_entry_time)
+
+    @api.depends('attended', 'first_entry_minutes', 'official_entry_minutes')
     def _compute_late_minutes(self):
         for record in self:
-            if not record.attended or not record.first_entry or not record.official_entry_time:
-                record.late_minutes = 0
-                continue
-            
-            try:
-                official_24h = self._convert_to_24h(record.official_entry_time)
-                actual_time = record.first_entry
-                
-                official_parts = official_24h.split(':')
-                actual_parts = actual_time.split(':')
-                
-                official_minutes = int(official_parts[0]) * 60 + int(official_parts[1])
-                actual_minutes = int(actual_parts[0]) * 60 + int(actual_parts[1])
-                
-                delay = actual_minutes - official_minutes
-                record.late_minutes = delay if delay > 0 else 0
-            except:
+            if not record.attended or record.first_entry_minutes == NO_TIME or record.official_entry_minutes == NO_TIME:
                 record.late_minutes = 0
+            else:
+                record.late_minutes = max(record.first_entry_minutes - record.official_entry_minutes, 0)
 
     @api.depends('attended', 'late_minutes')
     def _compute_status(self):
@@ -75,43 +181,181 @@ class AttendanceReport(models.Model):
             else:
                 record.status = 'on_time'
 
-    def _convert_to_24h(self, time_str):
-        """Convierte hora AM/PM a formato 24h"""
-        match = re.match(r'(\d{1,2}):(\d{2})\s*(AM|PM)', time_str, re.IGNORECASE)
-        if not match:
-            return time_str
-        
-        hours, minutes, period = match.groups()
-        hours = int(hours)
-        
-        if period.upper() == 'PM' and hours != 12:
-            hours += 12
-        elif period.upper() == 'AM' and hours == 12:
-            hours = 0
-        
-        return f"{hours:02d}:{minutes}"
+    def _recompute_late_status(self, batch_size=10000):
+        """Recalcula late_minutes y status en SQL a partir de las columnas en minutos.
+
+        Pensado para recalcular cientos de miles de registros: cada lote es
+        una sola sentencia UPDATE y los resúmenes afectados se actualizan por
+        diferencia. Los rangos se anotan para recalcular sus tendencias.
+        """
+        Summary = self.env['hr.attendance.report.summary']
+        self.flush_model(['attended', 'first_entry_minutes', 'official_entry_minutes'])
+        for start in range(0, len(self.ids), batch_size):
+            batch = self.browse(self.ids[start:start + batch_size])
+            old_rows = batch._read_aggregate_rows()
+            self.env.cr.execute("""
+                UPDATE hr_attendance_report r
+                   SET late_minutes = v.late,
+                       write_date = (now() at time zone 'UTC'),
+                       status = CASE WHEN NOT coalesce(r.attended, false) THEN 'absent'
+                                     WHEN v.late > 0 THEN 'late'
+                                     ELSE 'on_time' END
+                  FROM (
+                        SELECT id,
+                               CASE WHEN coalesce(attended, false)
+                                         AND first_entry_minutes >= 0
+                                         AND official_entry_minutes >= 0
+                                    THEN greatest(first_entry_minutes - official_entry_minutes, 0)
+                                    ELSE 0 END AS late
+                          FROM hr_attendance_report
+                         WHERE id = ANY(%s)
+                       ) v
+                 WHERE r.id = v.id
+            """, [batch.ids])
+            batch.invalidate_recordset(['late_minutes', 'status'])
+            Summary._apply_daily_deltas(old_rows, batch._read_aggregate_rows())
+            self.env['hr.attendance.trend.dirty']._mark((row[1], row[2]) for row in old_rows)
 
     @api.model
-    def get_employee_summary(self, employee_id, date_from=None, date_to=None):
-        """Obtiene el resumen de asistencia de un empleado"""
-        domain = [('employee_id', '=', employee_id), ('company_id', '=', self.env.company.id)]
-        if date_from:
-            domain.append(('date', '>=', date_from))
-        if date_to:
-            domain.append(('date', '<=', date_to))
-        
-        records = self.search(domain)
-        
-        total_days = len(records)
-        attended_days = len(records.filtered(lambda r: r.attended))
-        absences = total_days - attended_days
-        total_late_minutes = sum(records.mapped('late_minutes'))
-        total_early_minutes = sum(records.mapped('early_exit_minutes'))
-        
+    def _row_hash(self, vals):
+        """Huella de los valores de origen de una fila (sin la clave)"""
+        payload = repr(sorted((k, v) for k, v in vals.items() if k in HASHED_FIELDS))
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    @api.model
+    def _bulk_upsert(self, vals_list, batch_size=1000, stats=None):
+        """Inserta o actualiza registros diarios en lote.
+
+        La clave es (employee_id, date, company_id): los registros existentes
+        se actualizan en su lugar y los nuevos se crean con un solo
+        create() por lote, de modo que el número de consultas depende del
+        número de lotes y no del número de filas. Las filas cuya huella
+        coincide con la del registro existente no se escriben.
+        Si se pasa ``stats``, se acumulan en él los contadores
+        'created', 'updated' y 'unchanged'.
+        """
+        if stats is None:
+            stats = {}
+        for counter in ('created', 'updated', 'unchanged'):
+            stats.setdefault(counter, 0)
+
+        # Deduplicar por clave: la última fila gana
+        by_key = {}
+        for vals in vals_list:
+            key = (vals['employee_id'], vals['date'], vals.get('company_id') or False)
+            by_key[key] = dict(vals, row_hash=self._row_hash(vals))
+
+        keys = list(by_key)
+        result_ids = []
+        for start in range(0, len(keys), batch_size):
+            batch_keys = keys[start:start + batch_size]
+            # Una fecha archivada vuelve a la tabla activa para no contarse dos veces
+            self.env['hr.attendance.report.archive']._restore(batch_keys)
+            existing = self.search_read([
+                ('employee_id', 'in', list({k[0] for k in batch_keys})),
+                ('date', 'in', list({k[1] for k in batch_keys})),
+                ('company_id', 'in', list({k[2] for k in batch_keys})),
+            ], ['employee_id', 'date', 'company_id', 'row_hash'], load=None)
+            existing_by_key = {
+                (rec['employee_id'], rec['date'], rec['company_id'] or False): rec
+                for rec in existing
+            }
+
+            to_create = []
+            # Agrupar actualizaciones con valores idénticos en un solo write
+            to_write = {}
+            for key in batch_keys:
+                vals = by_key[key]
+                record = existing_by_key.get(key)
+                if not record:
+                    to_create.append(vals)
+                elif record['row_hash'] == vals['row_hash']:
+                    stats['unchanged'] += 1
+                    result_ids.append(record['id'])
+                else:
+                    update = {k: v for k, v in vals.items() if k not in ('employee_id', 'date', 'company_id')}
+                    to_write.setdefault(tuple(sorted(update.items())), []).append(record['id'])
+            stats['created'] += len(to_create)
+            stats['updated'] += sum(len(ids) for ids in to_write.values())
+
+            # Sincronizar los resúmenes una sola vez por lote
+            deferred = self.with_context(attendance_defer_summary_sync=True)
+            old_rows = self.browse([id_ for ids in to_write.values() for id_ in ids])._read_aggregate_rows()
+            batch_ids = []
+            for update, ids in to_write.items():
+                deferred.browse(ids).write(dict(update))
+                batch_ids.extend(ids)
+            if to_create:
+                batch_ids.extend(deferred.create(to_create).ids)
+            self.flush_model()
+            self.env['hr.attendance.report.summary']._apply_daily_deltas(
+                old_rows, self.browse(batch_ids)._read_aggregate_rows())
+            result_ids.extend(batch_ids)
+        return self.browse(result_ids)
+
+    @api.model
+    def _merge_punches(self, company_id, punches, stats=None, source='device'):
+        """Incorpora marcas sueltas (employee_id, datetime local) a los registros diarios.
+
+        Las marcas se guardan en hr.attendance.punch y sólo las que no estaban
+        registradas se agregan por empleado y día (primera, última y total) y
+        se combinan con el registro existente, de modo que el coste depende
+        sólo del número de marcas nuevas y una marca repetida no se cuenta dos
+        veces.
+        """
+        days = {}
+        for employee_id, timestamp in self.env['hr.attendance.punch']._store(company_id, punches, source):
+            minute = timestamp.hour * 60 + timestamp.minute
+            key = (employee_id, timestamp.date())
+            day = days.get(key)
+            if day is None:
+                days[key] = [minute, minute, 1]
+            else:
+                day[0] = min(day[0], minute)
+                day[1] = max(day[1], minute)
+                day[2] += 1
+        if not days:
+            return self.browse()
+
+        self.env['hr.attendance.report.archive']._restore(
+            (employee_id, day, company_id) for employee_id, day in days)
+        existing = {}
+        for rec in self.search_read([
+                ('company_id', '=', company_id),
+                ('employee_id', 'in', list({k[0] for k in days})),
+                ('date', 'in', list({k[1] for k in days})),
+        ], ['employee_id', 'date', 'attended', 'first_entry_minutes', 'last_exit_minutes', 'total_records'],
+                load=None):
+            existing[(rec['employee_id'], rec['date'])] = rec
+
+        resolve = self.env['hr.attendance.schedule']._get_schedule_resolver(company_id)
+        vals_list = []
+        for (employee_id, day), (first, last, count) in days.items():
+            record = existing.get((employee_id, day))
+            if record and record['attended']:
+                if record['first_entry_minutes'] >= 0:
+                    first = min(first, record['first_entry_minutes'])
+                if record['last_exit_minutes'] >= 0:
+                    last = max(last, record['last_exit_minutes'])
+                count += record['total_records']
+            vals_list.append({
+                'employee_id': employee_id,
+                'date': day,
+                'attended': True,
+                'first_entry': format_minutes(first),
+                'last_exit': format_minutes(last),
+                'total_records': count,
+                'official_entry_time': resolve(employee_id, day),
+                'company_id': company_id,
+            })
+        return self._bulk_upsert(vals_list, stats=stats)
+
+    @api.model
+    def _summary_from_totals(self, total_days, attended_days, total_late_minutes, total_early_minutes):
         return {
             'total_days': total_days,
             'attended_days': attended_days,
-            'absences': absences,
+            'absences': total_days - attended_days,
             'total_late_minutes': total_late_minutes,
             'total_early_minutes': total_early_minutes,
             'avg_late_minutes': total_late_minutes / attended_days if attended_days > 0 else 0,
@@ -119,20 +363,378 @@ class AttendanceReport(models.Model):
         }
 
     @api.model
-    def calculate_verdict(self, summary):
-        """Calcula el veredicto de cumplimiento"""
+    def _aggregate_summaries(self, keys, company_id=None):
+        """Calcula los totales de varios (empleado, desde, hasta) en una sola consulta.
+
+        ``keys`` es un iterable de tuplas (employee_id, date_from, date_to);
+        las fechas pueden ser None para no acotar el rango. Devuelve un dict
+        {clave: resumen} con el mismo formato que get_employee_summary.
+
+        Los meses completos del rango se leen de hr.attendance.report.monthly
+        y sólo los días de los meses de los extremos se leen de los registros
+        diarios, así que el coste no depende de la longitud del rango.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        company_id = company_id or self.env.company.id
+        self.flush_model(['employee_id', 'company_id', 'date', 'attended', 'late_minutes', 'early_exit_minutes'])
+        # Los periodos archivados siguen contando para los resúmenes
+        self.env.cr.execute("""
+            WITH k AS (
+                SELECT employee_id, idx,
+                       coalesce(date_from, '0001-01-01'::date) AS date_from,
+                       coalesce(date_to, '9999-12-30'::date) AS date_to
+                  FROM unnest(%(employees)s::int[], %(froms)s::date[], %(tos)s::date[])
+                       WITH ORDINALITY AS k(employee_id, date_from, date_to, idx)
+            ), b AS (
+                -- Meses completos del rango: [full_from, full_to)
+                SELECT k.*,
+                       (date_trunc('month', k.date_from - 1) + interval '1 month')::date AS full_from,
+                       date_trunc('month', k.date_to + 1)::date AS full_to
+                  FROM k
+            )
+            SELECT b.idx,
+                   coalesce(sum(t.total_days), 0),
+                   coalesce(sum(t.attended_days), 0),
+                   coalesce(sum(t.late_minutes), 0),
+                   coalesce(sum(t.early_exit_minutes), 0)
+              FROM b
+         LEFT JOIN (
+                    SELECT b.idx, m.total_days, m.attended_days, m.late_minutes, m.early_exit_minutes
+                      FROM b
+                      JOIN hr_attendance_report_monthly m
+                        ON m.employee_id = b.employee_id
+                       AND m.company_id = %(company)s
+                       AND m.month >= b.full_from
+                       AND m.month < b.full_to
+                 UNION ALL
+                    SELECT b.idx, 1, r.attended::int, coalesce(r.late_minutes, 0), coalesce(r.early_exit_minutes, 0)
+                      FROM b
+                      JOIN (
+                            SELECT employee_id, company_id, date, attended, late_minutes, early_exit_minutes
+                              FROM hr_attendance_report
+                         UNION ALL
+                            SELECT employee_id, company_id, date, attended, late_minutes, early_exit_minutes
+                              FROM hr_attendance_report_archive
+                           ) r
+                        ON r.employee_id = b.employee_id
+                       AND r.company_id = %(company)s
+                       AND r.date BETWEEN b.date_from AND b.date_to
+                       AND (r.date < b.full_from OR r.date >= b.full_to)
+                   ) t ON t.idx = b.idx
+          GROUP BY b.idx
+        """, {
+            'employees': [k[0] for k in keys],
+            'froms': [k[1] or None for k in keys],
+            'tos': [k[2] or None for k in keys],
+            'company': company_id,
+        })
+        return {
+            keys[idx - 1]: self._summary_from_totals(total_days, attended_days, late, early)
+            for idx, total_days, attended_days, late, early in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def _get_dashboard_version(self, company_id, date_from, date_to):
+        """Huella barata de todo lo que alimenta el dashboard de un rango.
+
+        Incluye los registros diarios activos (número y última modificación)
+        y archivados (número y totales, porque no tienen fecha de
+        modificación), los empleados y departamentos de la compañía, las
+        reglas de horario por departamento y los umbrales de los veredictos.
+        """
+        self.flush_model(['company_id', 'date'])
+        self.env['hr.employee'].flush_model(['department_id', 'company_id'])
+        self.env.cr.execute("""
+            SELECT (SELECT row(count(*), max(write_date))::text
+                      FROM hr_attendance_report
+                     WHERE company_id = %(company)s AND date BETWEEN %(from)s AND %(to)s),
+                   (SELECT row(count(*), sum(attended::int), sum(late_minutes), sum(early_exit_minutes))::text
+                      FROM hr_attendance_report_archive
+                     WHERE company_id = %(company)s AND date BETWEEN %(from)s AND %(to)s),
+                   (SELECT row(count(*), max(write_date))::text
+                      FROM hr_employee
+                     WHERE company_id = %(company)s OR company_id IS NULL),
+                   (SELECT row(count(*), max(write_date))::text
+                      FROM hr_department
+                     WHERE company_id = %(company)s OR company_id IS NULL),
+                   (SELECT row(count(*), max(write_date))::text
+                      FROM hr_attendance_department_rule
+                     WHERE company_id = %(company)s OR company_id IS NULL)
+        """, {'company': company_id, 'from': date_from, 'to': date_to})
+        thresholds = sorted(self._get_verdict_thresholds().items())
+        return hashlib.sha1(repr((self.env.cr.fetchone(), thresholds)).encode()).hexdigest()
+
+    @api.model
+    def _get_dashboard_data(self, company_id, date_from, date_to):
+        """KPIs de una compañía en [date_from, date_to] calculados con consultas agrupadas.
+
+        Incluye tasa de asistencia, totales y percentiles de minutos de retraso
+        y la distribución de veredictos por departamento (el veredicto se
+        calcula sobre el rango pedido, con las mismas reglas que los resúmenes).
+        """
+        self.flush_model(['employee_id', 'company_id', 'date', 'attended', 'late_minutes', 'early_exit_minutes'])
+        cr = self.env.cr
+        daily = """
+            SELECT employee_id, date, attended, late_minutes, early_exit_minutes
+              FROM hr_attendance_report
+             WHERE company_id = %(company)s AND date BETWEEN %(from)s AND %(to)s
+         UNION ALL
+            SELECT employee_id, date, attended, late_minutes, early_exit_minutes
+              FROM hr_attendance_report_archive
+             WHERE company_id = %(company)s AND date BETWEEN %(from)s AND %(to)s
+        """
+        params = {'company': company_id, 'from': date_from, 'to': date_to}
+
+        cr.execute("""
+            SELECT count(*),
+                   count(*) FILTER (WHERE d.attended),
+                   count(*) FILTER (WHERE d.late_minutes > 0),
+                   coalesce(sum(d.late_minutes), 0),
+                   count(DISTINCT d.employee_id),
+                   percentile_cont(ARRAY[0.5, 0.9, 0.95]) WITHIN GROUP (ORDER BY d.late_minutes)
+                       FILTER (WHERE d.late_minutes > 0)
+              FROM (%s) d
+        """ % daily, params)
+        total, attended, late_days, late_total, employees, percentiles = cr.fetchone()
+        p50, p90, p95 = percentiles or (0, 0, 0)
+
+        cr.execute("""
+            SELECT d.employee_id, e.department_id,
+                   count(*), count(*) FILTER (WHERE d.attended),
+                   coalesce(sum(d.late_minutes), 0), coalesce(sum(d.early_exit_minutes), 0)
+              FROM (%s) d
+              JOIN hr_employee e ON e.id = d.employee_id
+          GROUP BY d.employee_id, e.department_id
+        """ % daily, params)
+        departments = {}
+        thresholds = self._get_verdict_thresholds()
+        for __, department_id, total_days, attended_days, late, early in cr.fetchall():
+            verdict = self.calculate_verdict(
+                self._summary_from_totals(total_days, attended_days, late, early), thresholds)
+            counts = departments.setdefault(department_id, dict.fromkeys(('ok', 'moderate', 'partial', 'severe'), 0))
+            counts[verdict['type']] += 1
+        names = {
+            dept.id: dept.name
+            for dept in self.env['hr.department'].sudo().browse([d for d in departments if d])
+        }
+        return {
+            'company_id': company_id,
+            'date_from': fields.Date.to_string(date_from),
+            'date_to': fields.Date.to_string(date_to),
+            'employees': employees,
+            'total_days': total,
+            'attended_days': attended,
+            'attendance_rate': round(attended / total * 100, 2) if total else 0.0,
+            'late_days': late_days,
+            'late_minutes': {
+                'total': late_total,
+                'p50': round(p50, 2),
+                'p90': round(p90, 2),
+                'p95': round(p95, 2),
+            },
+            'verdicts_by_department': [
+                {
+                    'department_id': department_id or False,
+                    'department': names.get(department_id) or _('Sin Departamento'),
+                    'verdicts': counts,
+                }
+                for department_id, counts in sorted(
+                    departments.items(), key=lambda item: names.get(item[0]) or '')
+            ],
+        }
+
+    @api.model
+    def _get_heatmap_data(self, company_id, month, offset=0, limit=50, department_id=None):
+        """Mapa de calor mensual compacto, paginado por empleado.
+
+        ``month`` es el primer día del mes. Cada empleado se devuelve con una
+        cadena de un carácter por día (HEATMAP_CODES, '.' sin registro) y la
+        lista de minutos de retraso por día; todo sale de una sola consulta
+        agrupada sobre los registros diarios activos y archivados.
+        """
+        self.flush_model(['employee_id', 'company_id', 'date', 'late_minutes', 'status'])
+        month_end = (month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        self.env.cr.execute("""
+            WITH daily AS (
+                SELECT employee_id, date, status, late_minutes
+                  FROM hr_attendance_report
+                 WHERE company_id = %(company)s AND date BETWEEN %(from)s AND %(to)s
+             UNION ALL
+                SELECT employee_id, date, status, late_minutes
+                  FROM hr_attendance_report_archive
+                 WHERE company_id = %(company)s AND date BETWEEN %(from)s AND %(to)s
+            ), matched AS (
+                SELECT e.id, e.name
+                  FROM hr_employee e
+                 WHERE e.id IN (SELECT employee_id FROM daily)
+                   AND (%(department)s IS NULL OR e.department_id = %(department)s)
+            ), page AS (
+                SELECT id, name
+                  FROM matched
+              ORDER BY name, id
+                 LIMIT %(limit)s OFFSET %(offset)s
+            )
+            SELECT t.total, p.id, p.name,
+                   array_agg(extract(day FROM d.date)::int ORDER BY d.date),
+                   array_agg(d.status ORDER BY d.date),
+                   array_agg(coalesce(d.late_minutes, 0) ORDER BY d.date)
+              FROM (SELECT count(*) AS total FROM matched) t
+         LEFT JOIN (page p JOIN daily d ON d.employee_id = p.id) ON true
+          GROUP BY t.total, p.id, p.name
+          ORDER BY p.name, p.id
+        """, {
+            'company': company_id,
+            'from': month,
+            'to': month_end,
+            'department': department_id,
+            'limit': limit,
+            'offset': offset,
+        })
+        # El total va en cada fila; con un offset más allá de la última página
+        # llega una sola fila sin empleado que sólo trae el total
+        rows = self.env.cr.fetchall()
+        total = rows[0][0] if rows else 0
+        employees = []
+        for _total, employee_id, name, days, statuses, lates in rows:
+            if employee_id is None:
+                continue
+            codes = ['.'] * month_end.day
+            late = [0] * month_end.day
+            for day, status, minutes in zip(days, statuses, lates):
+                codes[day - 1] = HEATMAP_CODES.get(status, '.')
+                late[day - 1] = minutes
+            employees.append({'id': employee_id, 'name': name, 'days': ''.join(codes), 'late': late})
+        return {
+            'month': month.strftime('%Y-%m'),
+            'days': month_end.day,
+            'first_weekday': month.weekday(),
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'employees': employees,
+        }
+
+    @api.model
+    def _get_export_header(self):
+        return [
+            _('Fecha'), _('Empleado'), _('Departamento'), _('Asistió'), _('Primera Entrada'),
+            _('Última Salida'), _('Total de Registros'), _('Hora Oficial de Entrada'),
+            _('Minutos de Retraso'), _('Minutos Salida Temprana'), _('Estado'),
+        ]
+
+    @api.model
+    def _iter_export_rows(self, company_id, date_from, date_to, batch_size=EXPORT_BATCH_SIZE):
+        """Filas de exportación de los registros diarios (activos y archivados) de un rango.
+
+        Se leen por lotes con paginación por clave (fecha, empleado): cada
+        consulta recorre el índice desde la última fila leída, así que el
+        coste por lote y la memoria no dependen del tamaño del rango.
+        """
+        self.flush_model()
+        employee_names = {}
+        statuses = dict(self._fields['status']._description_selection(self.env))
+        yes, no = _('Sí'), _('No')
+        cr = self.env.cr
+        last_date, last_employee = date_from, 0
+        while True:
+            cr.execute("""
+                SELECT date, employee_id, attended, first_entry_minutes, last_exit_minutes, total_records,
+                       official_entry_minutes, late_minutes, early_exit_minutes, status
+                  FROM (
+                        (SELECT date, employee_id, attended, first_entry_minutes, last_exit_minutes, total_records,
+                                official_entry_minutes, late_minutes, early_exit_minutes, status
+                           FROM hr_attendance_report
+                          WHERE company_id = %(company)s AND date <= %(date_to)s
+                            AND (date, employee_id) > (%(date)s, %(employee)s)
+                       ORDER BY date, employee_id
+                          LIMIT %(limit)s)
+                 UNION ALL
+                        (SELECT date, employee_id, attended, first_entry_minutes, last_exit_minutes, total_records,
+                                official_entry_minutes, late_minutes, early_exit_minutes, status
+                           FROM hr_attendance_report_archive
+                          WHERE company_id = %(company)s AND date <= %(date_to)s
+                            AND (date, employee_id) > (%(date)s, %(employee)s)
+                       ORDER BY date, employee_id
+                          LIMIT %(limit)s)
+                       ) r
+              ORDER BY date, employee_id
+                 LIMIT %(limit)s
+            """, {
+                'company': company_id,
+                'date_to': date_to,
+                'date': last_date,
+                'employee': last_employee,
+                'limit': batch_size,
+            })
+            rows = cr.fetchall()
+            if not rows:
+                return
+            self._load_export_names({row[1] for row in rows}, employee_names)
+            for day, employee_id, attended, first, last, total, official, late, early, status in rows:
+                name, department = employee_names[employee_id]
+                yield [
+                    day, name, department, yes if attended else no,
+                    format_minutes(first) or '', format_minutes(last) or '', total,
+                    format_minutes(official) or '', late or 0, early or 0, statuses.get(status, ''),
+                ]
+            last_date, last_employee = rows[-1][0], rows[-1][1]
+
+    @api.model
+    def _load_export_names(self, employee_ids, names):
+        """Completa ``names`` ({employee_id: (nombre, departamento)}) con los empleados que falten"""
+        missing = [employee_id for employee_id in employee_ids if employee_id not in names]
+        if not missing:
+            return names
+        employees = self.env['hr.employee'].sudo().with_context(active_test=False).browse(missing)
+        for employee in employees.read(['name', 'department_id']):
+            department = employee['department_id']
+            names[employee['id']] = (employee['name'], department[1] if department else '')
+        return names
+
+    @api.model
+    def get_employee_summary(self, employee_id, date_from=None, date_to=None):
+        """Obtiene el resumen de asistencia de un empleado"""
+        key = (employee_id, date_from, date_to)
+        return self._aggregate_summaries([key])[key]
+
+    @api.model
+    def _get_verdict_thresholds(self):
+        """Umbrales de VERDICT_THRESHOLDS con los valores configurados en los parámetros de sistema"""
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        thresholds = {}
+        for name, default in VERDICT_THRESHOLDS.items():
+            try:
+                thresholds[name] = float(get_param('hr_attendance_compliance_v18.verdict_%s' % name, default))
+            except ValueError:
+                thresholds[name] = default
+        return thresholds
+
+    @api.model
+    def calculate_verdict(self, summary, thresholds=None):
+        """Calcula el veredicto de cumplimiento.
+
+        ``thresholds`` permite reutilizar los umbrales al evaluar muchos
+        resúmenes; por defecto se leen de los parámetros de sistema.
+        """
         if not summary['total_days']:
             return {'type': 'ok', 'text': 'Sin Datos'}
-        
+        if thresholds is None:
+            thresholds = self._get_verdict_thresholds()
+
         absence_rate = summary['absences'] / summary['total_days']
         avg_late = summary['avg_late_minutes']
         avg_early = summary['avg_early_minutes']
-        
-        if absence_rate > 0.5 or avg_late > 60 or avg_early > 120:
+
+        if (absence_rate > thresholds['severe_absence_rate'] or avg_late > thresholds['severe_late']
+                or avg_early > thresholds['severe_early']):
             return {'type': 'severe', 'text': 'Incumplimiento Severo'}
-        elif absence_rate > 0.2 or avg_late > 30 or avg_early > 60:
+        elif (absence_rate > thresholds['partial_absence_rate'] or avg_late > thresholds['partial_late']
+                or avg_early > thresholds['partial_early']):
             return {'type': 'partial', 'text': 'Incumplimiento Parcial'}
-        elif avg_late < 10 and avg_early < 30 and absence_rate < 0.15:
+        elif (avg_late < thresholds['ok_late'] and avg_early < thresholds['ok_early']
+                and absence_rate < thresholds['ok_absence_rate']):
             return {'type': 'ok', 'text': 'Cumple Horario'}
         else:
             return {'type': 'moderate', 'text': 'Cumplimiento Moderado'}
@@ -154,6 +756,26 @@ class AttendanceReport(models.Model):
         ]
         return action
 
+    def action_rebuild_from_punches(self):
+        """Recalcula los registros seleccionados desde las marcas guardadas"""
+        Punch = self.env['hr.attendance.punch']
+        stats = {}
+        for company in self.company_id:
+            records = self.filtered(lambda r: r.company_id == company)
+            Punch._rebuild_daily(company.id, min(records.mapped('date')), max(records.mapped('date')),
+                                 employee_ids=records.employee_id.ids, stats=stats)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Registros recalculados'),
+                'message': _('%s actualizados, %s creados, %s sin cambios.') % (
+                    stats.get('updated', 0), stats.get('created', 0), stats.get('unchanged', 0)),
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+
 
 class AttendanceReportSummary(models.Model):
     _name = 'hr.attendance.report.summary'
@@ -184,6 +806,10 @@ class AttendanceReportSummary(models.Model):
         ('critical', 'Crítico'),
     ], string='Estado', compute='_compute_status', store=True)
 
+    def init(self):
+        create_index(self.env.cr, 'hr_attendance_report_summary_company_employee_range_idx',
+                     self._table, ['company_id', 'employee_id', 'date_from', 'date_to'])
+
     @api.depends('verdict_type', 'absences', 'total_days')
     def _compute_status(self):
         for record in self:
@@ -199,22 +825,97 @@ class AttendanceReportSummary(models.Model):
     @api.model
     def generate_summary(self, employee_id, date_from, date_to):
         """Genera o actualiza el resumen para un empleado"""
+        return self._generate_summaries_bulk([(employee_id, date_from, date_to)])
+
+    @api.model
+    def _generate_summaries_bulk(self, keys):
+        """Genera o actualiza resúmenes para varios (empleado, desde, hasta).
+
+        Los totales se calculan con una sola consulta de agregación, los
+        resúmenes existentes se buscan de una vez y los que cambian se
+        actualizan con un solo UPDATE, de modo que el costo en consultas no
+        depende del número de empleados.
+        """
         report_model = self.env['hr.attendance.report']
-        summary_data = report_model.get_employee_summary(employee_id, date_from, date_to)
-        verdict = report_model.calculate_verdict(summary_data)
-        
+        company_id = self.env.company.id
+        aggregates = report_model._aggregate_summaries(keys, company_id)
+        if not aggregates:
+            return self.browse()
+
         existing = self.search([
-            ('employee_id', '=', employee_id),
-            ('date_from', '=', date_from),
-            ('date_to', '=', date_to),
-            ('company_id', '=', self.env.company.id),
-        ], limit=1)
-        
-        values = {
-            'employee_id': employee_id,
-            'date_from': date_from,
-            'date_to': date_to,
-            'company_id': self.env.company.id,
+            ('employee_id', 'in', list({k[0] for k in aggregates})),
+            ('date_from', 'in', list({k[1] for k in aggregates})),
+            ('date_to', 'in', list({k[2] for k in aggregates})),
+            ('company_id', '=', company_id),
+        ])
+        existing_by_key = {(s.employee_id.id, s.date_from, s.date_to): s for s in existing}
+
+        result_ids = []
+        to_create = []
+        to_update = {}
+        for (employee_id, date_from, date_to), summary_data in aggregates.items():
+            values = self._prepare_summary_values(summary_data)
+            record = existing_by_key.get((employee_id, date_from, date_to))
+            if record:
+                to_update[record.id] = values
+                result_ids.append(record.id)
+            else:
+                to_create.append({
+                    'employee_id': employee_id,
+                    'date_from': date_from,
+                    'date_to': date_to,
+                    'company_id': company_id,
+                    **values,
+                })
+        self._write_summary_values(to_update)
+        if to_create:
+            result_ids.extend(self.create(to_create).ids)
+        return self.browse(result_ids)
+
+    @api.model
+    def _write_summary_values(self, values_by_id):
+        """Escribe valores de _prepare_summary_values en varios resúmenes con un solo UPDATE.
+
+        ``values_by_id`` es {summary_id: valores}; los resúmenes cuyos valores
+        no cambian se omiten. El estado se recalcula con el ORM, que agrupa
+        la escritura por valor. Devuelve los resúmenes modificados.
+        """
+        if not values_by_id:
+            return self.browse()
+        records = self.browse(list(values_by_id))
+        current = {row['id']: row for row in records.read(SUMMARY_VALUE_FIELDS, load=None)}
+        changed = {
+            summary_id: values
+            for summary_id, values in values_by_id.items()
+            if any(current[summary_id][name] != values[name] for name in SUMMARY_VALUE_FIELDS)
+        }
+        if not changed:
+            return self.browse()
+        records = self.browse(list(changed))
+        records.flush_recordset(SUMMARY_VALUE_FIELDS)
+        self.env.cr.execute("""
+            UPDATE hr_attendance_report_summary s
+               SET {assignments},
+                   write_uid = %s,
+                   write_date = (now() at time zone 'UTC')
+              FROM unnest(%s::int[], {arrays}) AS v(id, {columns})
+             WHERE s.id = v.id
+        """.format(
+            assignments=', '.join('%s = v.%s' % (name, name) for name in SUMMARY_VALUE_FIELDS),
+            arrays=', '.join('%%s::%s[]' % SUMMARY_VALUE_TYPES[name] for name in SUMMARY_VALUE_FIELDS),
+            columns=', '.join(SUMMARY_VALUE_FIELDS),
+        ), [self.env.uid, list(changed)] + [
+            [values[name] for values in changed.values()] for name in SUMMARY_VALUE_FIELDS
+        ])
+        records.invalidate_recordset(SUMMARY_VALUE_FIELDS + ['write_uid', 'write_date'])
+        records.modified(SUMMARY_VALUE_FIELDS)
+        return records
+
+    @api.model
+    def _prepare_summary_values(self, summary_data):
+        """Valores de resumen (totales, promedios y veredicto) a partir de los totales"""
+        verdict = self.env['hr.attendance.report'].calculate_verdict(summary_data)
+        return {
             'total_days': summary_data['total_days'],
             'attended_days': summary_data['attended_days'],
             'absences': summary_data['absences'],
@@ -225,12 +926,181 @@ class AttendanceReportSummary(models.Model):
             'verdict_type': verdict['type'],
             'verdict_text': verdict['text'],
         }
-        
-        if existing:
-            existing.write(values)
-            return existing
-        else:
-            return self.create(values)
+
+    @api.model
+    def _apply_daily_deltas(self, old_rows, new_rows):
+        """Actualiza por diferencia los resúmenes afectados por cambios diarios.
+
+        ``old_rows`` y ``new_rows`` son tuplas como las de
+        hr.attendance.report._read_aggregate_rows(): las antiguas se restan y
+        las nuevas se suman a cada resumen cuyo rango contiene la fecha y a los
+        acumulados mensuales.
+        """
+        self.env['hr.attendance.report.monthly']._apply_daily_deltas(old_rows, new_rows)
+        deltas = [(row, -1) for row in old_rows] + [(row, 1) for row in new_rows]
+        if not deltas:
+            return self.browse()
+        self.flush_model(['employee_id', 'company_id', 'date_from', 'date_to'])
+        self.env.cr.execute("""
+            SELECT s.id,
+                   sum(d.sign),
+                   sum(d.sign * d.attended::int),
+                   sum(d.sign * coalesce(d.late_minutes, 0)),
+                   sum(d.sign * coalesce(d.early_exit_minutes, 0))
+              FROM unnest(%s::int[], %s::int[], %s::date[], %s::bool[], %s::int[], %s::int[], %s::int[])
+                   AS d(employee_id, company_id, date, attended, late_minutes, early_exit_minutes, sign)
+              JOIN hr_attendance_report_summary s
+                ON s.employee_id = d.employee_id
+               AND s.company_id IS NOT DISTINCT FROM d.company_id
+               AND d.date BETWEEN s.date_from AND s.date_to
+          GROUP BY s.id
+        """, (
+            [row[0] for row, _sign in deltas],
+            [row[1] for row, _sign in deltas],
+            [row[2] for row, _sign in deltas],
+            [bool(row[3]) for row, _sign in deltas],
+            [row[4] for row, _sign in deltas],
+            [row[5] for row, _sign in deltas],
+            [sign for _row, sign in deltas],
+        ))
+        changes = {
+            summary_id: delta
+            for summary_id, *delta in self.env.cr.fetchall()
+            if any(delta)
+        }
+        summaries = self.sudo().browse(list(changes))
+        report_model = self.env['hr.attendance.report']
+        values_by_id = {}
+        for summary in summaries:
+            days, attended, late, early = changes[summary.id]
+            summary_data = report_model._summary_from_totals(
+                summary.total_days + days,
+                summary.attended_days + attended,
+                summary.total_late_minutes + late,
+                summary.total_early_minutes + early,
+            )
+            values_by_id[summary.id] = self._prepare_summary_values(summary_data)
+        summaries._write_summary_values(values_by_id)
+        return summaries
+
+    @api.model
+    def _get_export_header(self):
+        return [
+            _('Empleado'), _('Departamento'), _('Fecha Desde'), _('Fecha Hasta'), _('Total de Días'),
+            _('Días Asistidos'), _('Ausencias'), _('Total Minutos Retraso'), _('Total Minutos Salida Temprana'),
+            _('Promedio Retraso (min)'), _('Promedio Salida Temprana (min)'), _('Veredicto'),
+        ]
+
+    @api.model
+    def _iter_export_rows(self, company_id, date_from, date_to, batch_size=EXPORT_BATCH_SIZE):
+        """Filas de exportación de los resúmenes que se solapan con un rango.
+
+        Se leen por lotes con paginación por id y se descartan de la caché
+        tras cada lote, de modo que la memoria no depende del número de filas.
+        """
+        domain = [
+            ('company_id', '=', company_id),
+            ('date_from', '<=', date_to),
+            ('date_to', '>=', date_from),
+        ]
+        fields_list = [
+            'employee_id', 'date_from', 'date_to', 'total_days', 'attended_days', 'absences',
+            'total_late_minutes', 'total_early_minutes', 'avg_late_minutes', 'avg_early_minutes', 'verdict_text',
+        ]
+        employee_names = {}
+        report_model = self.env['hr.attendance.report']
+        last_id = 0
+        while True:
+            summaries = self.search_read(domain + [('id', '>', last_id)], fields_list,
+                                         order='id', limit=batch_size, load=None)
+            if not summaries:
+                return
+            report_model._load_export_names({s['employee_id'] for s in summaries}, employee_names)
+            for summary in summaries:
+                name, department = employee_names[summary['employee_id']]
+                yield [
+                    name, department, summary['date_from'], summary['date_to'], summary['total_days'],
+                    summary['attended_days'], summary['absences'], summary['total_late_minutes'],
+                    summary['total_early_minutes'], round(summary['avg_late_minutes'], 1),
+                    round(summary['avg_early_minutes'], 1), summary['verdict_text'] or '',
+                ]
+            last_id = summaries[-1]['id']
+            self.invalidate_model()
+
+    def _recompute_from_daily(self):
+        """Recalcula los resúmenes desde los registros diarios y corrige las diferencias"""
+        report_model = self.env['hr.attendance.report']
+        fixed = self.browse()
+        for company in self.company_id:
+            summaries = self.filtered(lambda s: s.company_id == company)
+            aggregates = report_model._aggregate_summaries(
+                [(s.employee_id.id, s.date_from, s.date_to) for s in summaries], company.id)
+            for summary in summaries:
+                values = self._prepare_summary_values(
+                    aggregates[(summary.employee_id.id, summary.date_from, summary.date_to)])
+                if any(summary[name] != value for name, value in values.items()):
+                    summary.write(values)
+                    fixed |= summary
+        return fixed
+
+    @api.model
+    def _cron_reconcile_summaries(self, batch_size=1000):
+        """Repara las desviaciones recientes entre los resúmenes y los registros diarios.
+
+        Sólo revisa los últimos RECONCILE_MONTHS meses y, si es anterior, desde
+        la fecha más antigua de los registros diarios modificados desde la
+        última ejecución; la reconciliación completa es la acción manual
+        action_reconcile_all.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        param = 'hr_attendance_compliance_v18.reconcile_last_run'
+        started = fields.Datetime.now()
+        date_from = fields.Date.context_today(self).replace(day=1) - relativedelta(months=RECONCILE_MONTHS)
+        last_run = ICP.get_param(param)
+        if last_run:
+            self.env['hr.attendance.report'].flush_model(['date', 'write_date'])
+            self.env.cr.execute("SELECT min(date) FROM hr_attendance_report WHERE write_date > %s", (last_run,))
+            changed = self.env.cr.fetchone()[0]
+            if changed and changed < date_from:
+                date_from = changed
+        self._reconcile(date_from, batch_size=batch_size)
+        ICP.set_param(param, fields.Datetime.to_string(started))
+
+    def action_reconcile_all(self):
+        """Reconcilia los acumulados mensuales y todos los resúmenes sobre el historial completo"""
+        self._reconcile()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Resúmenes reconciliados'),
+                'message': _('Se recalcularon los acumulados mensuales y los resúmenes de todo el historial.'),
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+
+    @api.model
+    def _reconcile(self, date_from=None, batch_size=1000):
+        """Recalcula los acumulados mensuales desde ``date_from`` (todos sin ella) y
+        los resúmenes que terminan a partir de esa fecha"""
+        # Los resúmenes se calculan a partir de los acumulados mensuales
+        self.env['hr.attendance.report.monthly']._rebuild(date_from)
+        domain = [('company_id', '!=', False)]
+        if date_from:
+            domain.append(('date_to', '>=', date_from))
+        last_id = 0
+        fixed = 0
+        while True:
+            summaries = self.search([('id', '>', last_id)] + domain, order='id', limit=batch_size)
+            if not summaries:
+                break
+            fixed += len(summaries._recompute_from_daily())
+            last_id = summaries[-1].id
+            self.env.invalidate_all()
+        if fixed:
+            _logger.info('Reconciled %s attendance summaries', fixed)
+        return fixed
 
     # Acción para abrir detalle diario del empleado en el rango
     def action_open_daily_detail(self):
@@ -0,0 +1,153 @@
+import logging
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api, _
+from odoo.tools.sql import create_index
+
+from ..tools.time_utils import format_minutes
+
+_logger = logging.getLogger(__name__)
+
+
+class AttendanceReportArchive(models.Model):
+    """Histórico compacto de registros diarios de periodos cerrados.
+
+    Guarda sólo los valores numéricos que necesitan los resúmenes, sin
+    columnas de auditoría, para que la tabla activa hr_attendance_report se
+    mantenga pequeña a medida que crece el historial.
+    """
+    _name = 'hr.attendance.report.archive'
+    _description = 'Histórico de Asistencia Archivado'
+    _order = 'date desc, employee_id'
+    _log_access = False
+
+    employee_id = fields.Many2one('hr.employee', string='Empleado', required=True, ondelete='cascade', readonly=True)
+    company_id = fields.Many2one('res.company', string='Compañía', readonly=True)
+    date = fields.Date(string='Fecha', required=True, readonly=True)
+    attended = fields.Boolean(string='Asistió', readonly=True)
+    total_records = fields.Integer(string='Total de Registros', readonly=True)
+    first_entry_minutes = fields.Integer(string='Primera Entrada (min)', readonly=True)
+    last_exit_minutes = fields.Integer(string='Última Salida (min)', readonly=True)
+    official_entry_minutes = fields.Integer(string='Hora Oficial (min)', readonly=True)
+    late_minutes = fields.Integer(string='Minutos de Retraso', readonly=True)
+    early_exit_minutes = fields.Integer(string='Minutos Salida Temprana', readonly=True)
+    status = fields.Selection([
+        ('on_time', 'A Tiempo'),
+        ('late', 'Retrasado'),
+        ('absent', 'Ausente'),
+    ], string='Estado', readonly=True)
+
+    _sql_constraints = [
+        ('unique_employee_date', 'unique(employee_id, date, company_id)',
+         _('Ya existe un registro archivado para este empleado en esta fecha y compañía.'))
+    ]
+
+    def init(self):
+        create_index(self.env.cr, 'hr_attendance_report_archive_company_employee_date_idx',
+                     self._table, ['company_id', 'employee_id', 'date'])
+        create_index(self.env.cr, 'hr_attendance_report_archive_company_date_employee_idx',
+                     self._table, ['company_id', 'date', 'employee_id'])
+
+    @api.model
+    def _archive_before(self, company_id, cutoff):
+        """Mueve al histórico los registros diarios de la compañía anteriores a ``cutoff``.
+
+        El traslado se hace con una sola sentencia (DELETE ... RETURNING
+        alimentando un INSERT), sin pasar por el ORM: los resúmenes no
+        cambian porque siguen leyendo el histórico. El rango trasladado se
+        anota para recalcular sus tendencias.
+        """
+        self.env['hr.attendance.report'].flush_model()
+        self.env.cr.execute("""
+            WITH moved AS (
+                DELETE FROM hr_attendance_report
+                 WHERE company_id = %s AND date < %s
+             RETURNING employee_id, company_id, date, attended, total_records,
+                       first_entry_minutes, last_exit_minutes, official_entry_minutes,
+                       late_minutes, early_exit_minutes, status
+            ), archived AS (
+                INSERT INTO hr_attendance_report_archive (
+                    employee_id, company_id, date, attended, total_records,
+                    first_entry_minutes, last_exit_minutes, official_entry_minutes,
+                    late_minutes, early_exit_minutes, status)
+                SELECT * FROM moved
+                ON CONFLICT (employee_id, date, company_id) DO UPDATE
+                   SET attended = EXCLUDED.attended,
+                       total_records = EXCLUDED.total_records,
+                       first_entry_minutes = EXCLUDED.first_entry_minutes,
+                       last_exit_minutes = EXCLUDED.last_exit_minutes,
+                       official_entry_minutes = EXCLUDED.official_entry_minutes,
+                       late_minutes = EXCLUDED.late_minutes,
+                       early_exit_minutes = EXCLUDED.early_exit_minutes,
+                       status = EXCLUDED.status
+            )
+            SELECT count(*), min(date), max(date) FROM moved
+        """, (company_id, cutoff))
+        moved, date_from, date_to = self.env.cr.fetchone()
+        if moved:
+            self.env['hr.attendance.trend.dirty']._mark([(company_id, date_from), (company_id, date_to)])
+        self.env['hr.attendance.report'].invalidate_model()
+        self.invalidate_model()
+        return moved
+
+    @api.model
+    def _restore(self, keys):
+        """Devuelve a la tabla activa los registros archivados de las claves dadas.
+
+        ``keys`` son tuplas (employee_id, date, company_id). Se llama antes de
+        escribir registros diarios, para que una fecha archivada se actualice
+        en su lugar en vez de quedar duplicada en ambas tablas. Los resúmenes
+        y acumulados no cambian, porque leen las dos. Devuelve cuántos
+        registros se restauraron.
+        """
+        keys = [key for key in keys if key[2]]
+        if not keys:
+            return 0
+        self.env.cr.execute("""
+            DELETE FROM hr_attendance_report_archive a
+             USING unnest(%s::int[], %s::date[], %s::int[]) AS k(employee_id, date, company_id)
+             WHERE a.company_id = k.company_id
+               AND a.employee_id = k.employee_id
+               AND a.date = k.date
+         RETURNING a.employee_id, a.company_id, a.date, a.attended, a.total_records,
+                   a.first_entry_minutes, a.last_exit_minutes, a.official_entry_minutes, a.early_exit_minutes
+        """, ([k[0] for k in keys], [k[1] for k in keys], [k[2] for k in keys]))
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return 0
+        self.invalidate_model()
+        self.env['hr.attendance.report'].with_context(attendance_defer_summary_sync=True).create([{
+            'employee_id': employee_id,
+            'company_id': company_id,
+            'date': day,
+            'attended': attended,
+            'total_records': total_records,
+            'first_entry': format_minutes(first_entry),
+            'last_exit': format_minutes(last_exit),
+            'official_entry_time': format_minutes(official_entry),
+            'early_exit_minutes': early_exit,
+        } for employee_id, company_id, day, attended, total_records, first_entry, last_exit, official_entry, early_exit
+            in rows])
+        _logger.info('Restored %s archived attendance records to the active table', len(rows))
+        return len(rows)
+
+    @api.model
+    def _cron_archive_closed_periods(self):
+        """Archiva los meses anteriores al periodo activo configurado.
+
+        El parámetro ``hr_attendance_compliance_v18.archive_after_months``
+        indica cuántos meses completos se mantienen en la tabla activa
+        (0 desactiva el archivado).
+        """
+        months = int(self.env['ir.config_parameter'].sudo().get_param(
+            'hr_attendance_compliance_v18.archive_after_months', default='0') or 0)
+        if months <= 0:
+            return
+        cutoff = date.today().replace(day=1) - relativedelta(months=months)
+        for company in self.env['res.company'].search([]):
+            moved = self._archive_before(company.id, cutoff)
+            if moved:
+                _logger.info('Archived %s attendance records before %s for company %s', moved, cutoff, company.id)
+            self.env.cr.commit()
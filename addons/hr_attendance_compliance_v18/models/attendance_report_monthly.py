@@ -0,0 +1,131 @@
+import logging
+
+from odoo import models, fields, api, _
+
+_logger = logging.getLogger(__name__)
+
+# Registros diarios (activos y archivados) agregados por empleado y mes
+_ACTUAL_MONTHS_SQL = """
+    SELECT employee_id, company_id, date_trunc('month', date)::date AS month,
+           count(*) AS total_days,
+           count(*) FILTER (WHERE attended) AS attended_days,
+           coalesce(sum(late_minutes), 0) AS late_minutes,
+           coalesce(sum(early_exit_minutes), 0) AS early_exit_minutes
+      FROM (
+            SELECT employee_id, company_id, date, attended, late_minutes, early_exit_minutes
+              FROM hr_attendance_report
+         UNION ALL
+            SELECT employee_id, company_id, date, attended, late_minutes, early_exit_minutes
+              FROM hr_attendance_report_archive
+           ) r
+     WHERE company_id IS NOT NULL
+       AND (%(from)s::date IS NULL OR date >= %(from)s::date)
+  GROUP BY 1, 2, 3
+"""
+
+
+class AttendanceReportMonthly(models.Model):
+    """Totales mensuales por empleado de los registros diarios (activos y archivados).
+
+    Se mantienen por diferencia junto con los resúmenes, de modo que los
+    totales de cualquier rango se obtienen sumando los meses completos y sólo
+    los días de los meses de los extremos.
+    """
+    _name = 'hr.attendance.report.monthly'
+    _description = 'Acumulado Mensual de Asistencia'
+    _order = 'month desc, employee_id'
+    _log_access = False
+
+    employee_id = fields.Many2one('hr.employee', string='Empleado', required=True, ondelete='cascade', readonly=True)
+    company_id = fields.Many2one('res.company', string='Compañía', required=True, readonly=True)
+    month = fields.Date(string='Mes', required=True, readonly=True)
+    total_days = fields.Integer(string='Total de Días', readonly=True)
+    attended_days = fields.Integer(string='Días Asistidos', readonly=True)
+    late_minutes = fields.Integer(string='Minutos de Retraso', readonly=True)
+    early_exit_minutes = fields.Integer(string='Minutos Salida Temprana', readonly=True)
+
+    _sql_constraints = [
+        ('unique_employee_month', 'unique(company_id, employee_id, month)',
+         _('Ya existe un acumulado para este empleado, mes y compañía.')),
+    ]
+
+    def init(self):
+        # Carga inicial al instalar o actualizar el módulo
+        self.env.cr.execute("SELECT 1 FROM hr_attendance_report_monthly LIMIT 1")
+        if not self.env.cr.fetchone():
+            self._rebuild()
+
+    @api.model
+    def _apply_daily_deltas(self, old_rows, new_rows):
+        """Suma o resta cambios diarios a los meses afectados con una sola sentencia.
+
+        Recibe las mismas tuplas que hr.attendance.report.summary._apply_daily_deltas.
+        """
+        deltas = [(row, -1) for row in old_rows if row[1]] + [(row, 1) for row in new_rows if row[1]]
+        if not deltas:
+            return
+        self.env.cr.execute("""
+            INSERT INTO hr_attendance_report_monthly AS m
+                   (employee_id, company_id, month, total_days, attended_days, late_minutes, early_exit_minutes)
+            SELECT d.employee_id, d.company_id, date_trunc('month', d.date)::date,
+                   sum(d.sign),
+                   sum(d.sign * d.attended::int),
+                   sum(d.sign * coalesce(d.late_minutes, 0)),
+                   sum(d.sign * coalesce(d.early_exit_minutes, 0))
+              FROM unnest(%s::int[], %s::int[], %s::date[], %s::bool[], %s::int[], %s::int[], %s::int[])
+                   AS d(employee_id, company_id, date, attended, late_minutes, early_exit_minutes, sign)
+          GROUP BY 1, 2, 3
+            ON CONFLICT (company_id, employee_id, month) DO UPDATE
+               SET total_days = m.total_days + EXCLUDED.total_days,
+                   attended_days = m.attended_days + EXCLUDED.attended_days,
+                   late_minutes = m.late_minutes + EXCLUDED.late_minutes,
+                   early_exit_minutes = m.early_exit_minutes + EXCLUDED.early_exit_minutes
+        """, (
+            [row[0] for row, _sign in deltas],
+            [row[1] for row, _sign in deltas],
+            [row[2] for row, _sign in deltas],
+            [bool(row[3]) for row, _sign in deltas],
+            [row[4] for row, _sign in deltas],
+            [row[5] for row, _sign in deltas],
+            [sign for _row, sign in deltas],
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def _rebuild(self, date_from=None):
+        """Recalcula los acumulados desde los registros diarios; devuelve cuántos meses corrigió.
+
+        Con ``date_from`` sólo se recalculan los meses desde el de esa fecha;
+        sin ella, todo el historial.
+        """
+        self.env['hr.attendance.report'].flush_model()
+        self.env['hr.attendance.report.archive'].flush_model()
+        params = {'from': date_from.replace(day=1) if date_from else None}
+        cr = self.env.cr
+        cr.execute("""
+            DELETE FROM hr_attendance_report_monthly m
+             WHERE (%%(from)s::date IS NULL OR m.month >= %%(from)s::date)
+               AND NOT EXISTS (SELECT 1 FROM (%s) a
+                                WHERE a.employee_id = m.employee_id
+                                  AND a.company_id = m.company_id
+                                  AND a.month = m.month)
+        """ % _ACTUAL_MONTHS_SQL, params)
+        fixed = cr.rowcount
+        cr.execute("""
+            INSERT INTO hr_attendance_report_monthly AS m
+                   (employee_id, company_id, month, total_days, attended_days, late_minutes, early_exit_minutes)
+            %s
+            ON CONFLICT (company_id, employee_id, month) DO UPDATE
+               SET total_days = EXCLUDED.total_days,
+                   attended_days = EXCLUDED.attended_days,
+                   late_minutes = EXCLUDED.late_minutes,
+                   early_exit_minutes = EXCLUDED.early_exit_minutes
+             WHERE (m.total_days, m.attended_days, m.late_minutes, m.early_exit_minutes)
+                   IS DISTINCT FROM (EXCLUDED.total_days, EXCLUDED.attended_days,
+                                     EXCLUDED.late_minutes, EXCLUDED.early_exit_minutes)
+        """ % _ACTUAL_MONTHS_SQL, params)
+        fixed += cr.rowcount
+        self.invalidate_model()
+        if fixed:
+            _logger.info('Rebuilt %s monthly attendance rollups', fixed)
+        return fixed
\ No newline at end of file
@@ -1,4 +1,14 @@
-from odoo import models, fields, api, _
+from datetime import date, timedelta
+
+from odoo import models, fields, api, tools, _
+
+from ..tools.time_utils import parse_minutes
+
+DEFAULT_ENTRY_TIME = '9:00 AM'
+# Campos de horario que cambian la hora oficial de los registros diarios
+PROPAGATED_FIELDS = {'employee_id', 'day_of_week', 'official_entry_time', 'day_off', 'company_id'}
+# Una fecha cualquiera por día de la semana (2024-01-01 es lunes)
+WEEKDAY_DATES = [date(2024, 1, 1) + timedelta(days=i) for i in range(7)]
 
 
 class AttendanceSchedule(models.Model):
@@ -19,34 +29,198 @@ class AttendanceSchedule(models.Model):
     official_entry_time = fields.Char(string='Hora Oficial de Entrada', required=True, default='9:00 AM')
     day_off = fields.Boolean(string='Día Libre', default=False)
     company_id = fields.Many2one('res.company', string='Compañía', default=lambda self: self.env.company, index=True)
-    
+
     _sql_constraints = [
-        ('unique_employee_day', 'unique(employee_id, day_of_week, company_id)', 
+        ('unique_employee_day', 'unique(employee_id, day_of_week, company_id)',
          _('Ya existe un horario para este empleado en este día de la semana en esta compañía.'))
     ]
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._propagate_to_reports(records._get_report_keys())
+        return records
+
+    def write(self, vals):
+        keys = self._get_report_keys() if PROPAGATED_FIELDS & set(vals) else set()
+        res = super().write(vals)
+        if keys:
+            self._propagate_to_reports(keys | self._get_report_keys())
+        return res
+
+    def unlink(self):
+        keys = self._get_report_keys()
+        res = super().unlink()
+        self._propagate_to_reports(keys)
+        return res
+
+    def _get_report_keys(self):
+        """Claves (employee_id, weekday, company_id) de los registros diarios afectados"""
+        return {
+            (sched.employee_id.id, int(sched.day_of_week), sched.company_id.id)
+            for sched in self
+            if sched.company_id
+        }
+
+    @api.model
+    def _propagate_to_reports(self, keys, date_from=None, date_to=None):
+        """Aplica la hora oficial vigente a los registros diarios existentes.
+
+        ``keys`` es un iterable de (employee_id, weekday, company_id). La hora
+        oficial se resuelve con la matriz de horarios y se reescribe con una
+        sola sentencia UPDATE, opcionalmente acotada a [date_from, date_to];
+        después se recalculan late_minutes, status y los resúmenes.
+        """
+        if self.env.context.get('attendance_skip_propagation'):
+            return self.env['hr.attendance.report']
+        keys = list(keys)
+        if not keys:
+            return self.env['hr.attendance.report']
+        resolvers = {}
+        params = []
+        for employee_id, weekday, company_id in keys:
+            if company_id not in resolvers:
+                resolvers[company_id] = self._get_schedule_resolver(company_id)
+            official = resolvers[company_id](employee_id, WEEKDAY_DATES[weekday]) or None
+            params.append((employee_id, weekday, company_id, official, parse_minutes(official)))
+
+        Report = self.env['hr.attendance.report']
+        Report.flush_model(['employee_id', 'company_id', 'date', 'official_entry_time', 'official_entry_minutes', 'row_hash'])
+        self.env.cr.execute("""
+            UPDATE hr_attendance_report r
+               SET official_entry_time = k.official,
+                   official_entry_minutes = k.minutes,
+                   row_hash = NULL,
+                   write_date = (now() at time zone 'UTC')
+              FROM unnest(%s::int[], %s::int[], %s::int[], %s::varchar[], %s::int[])
+                   AS k(employee_id, weekday, company_id, official, minutes)
+             WHERE r.employee_id = k.employee_id
+               AND r.company_id = k.company_id
+               AND extract(isodow FROM r.date)::int - 1 = k.weekday
+               AND r.official_entry_time IS DISTINCT FROM k.official
+               AND (%s::date IS NULL OR r.date >= %s::date)
+               AND (%s::date IS NULL OR r.date <= %s::date)
+         RETURNING r.id
+        """, (
+            [p[0] for p in params],
+            [p[1] for p in params],
+            [p[2] for p in params],
+            [p[3] for p in params],
+            [p[4] for p in params],
+            date_from or None, date_from or None,
+            date_to or None, date_to or None,
+        ))
+        reports = Report.browse([row[0] for row in self.env.cr.fetchall()])
+        reports.invalidate_recordset(['official_entry_time', 'official_entry_minutes', 'row_hash'])
+        reports._recompute_late_status()
+        return reports
+
+    @api.model
+    def _get_schedule_version(self, company_id):
+        """Versión de los datos de la matriz de horarios de una compañía.
+
+        (número, mayor id, última modificación) de los horarios, las reglas por
+        departamento, los departamentos y los empleados: cambia al crear,
+        modificar o eliminar cualquiera de ellos.
+        """
+        self.flush_model()
+        self.env['hr.attendance.department.rule'].flush_model()
+        self.env['hr.department'].flush_model(['name', 'company_id'])
+        self.env['hr.employee'].flush_model(['department_id', 'company_id'])
+        self.env.cr.execute("""
+            SELECT count(*), max(id), max(write_date) FROM hr_attendance_schedule
+             WHERE company_id = %(company)s
+             UNION ALL
+            SELECT count(*), max(id), max(write_date) FROM hr_attendance_department_rule
+             WHERE company_id = %(company)s OR company_id IS NULL
+             UNION ALL
+            SELECT count(*), max(id), max(write_date) FROM hr_department
+             WHERE company_id = %(company)s OR company_id IS NULL
+             UNION ALL
+            SELECT count(*), max(id), max(write_date) FROM hr_employee
+             WHERE company_id = %(company)s OR company_id IS NULL
+        """, {'company': company_id})
+        return tuple(self.env.cr.fetchall())
+
+    @tools.ormcache('company_id', 'version')
+    def _get_schedule_matrix(self, company_id, version):
+        """Carga todos los horarios de una compañía en una matriz empleado × día.
+
+        Devuelve ``(schedules, defaults)``: ``schedules`` es
+        {employee_id: {weekday: (hora, día_libre)}} y ``defaults`` es
+        {employee_id: hora} con el horario por defecto de su departamento.
+        ``version`` es _get_schedule_version: la matriz se renueva sola cuando
+        cambian los horarios, las reglas, los departamentos o los empleados,
+        sin vaciar la caché del registro.
+        """
+        schedules = {}
+        for sched in self.sudo().search_read(
+                [('company_id', '=', company_id)],
+                ['employee_id', 'day_of_week', 'official_entry_time', 'day_off']):
+            schedules.setdefault(sched['employee_id'][0], {})[int(sched['day_of_week'])] = (
+                sched['official_entry_time'], sched['day_off'])
+
+        dept_defaults = self.env['hr.attendance.department.rule'].sudo()._get_department_defaults(company_id)
+        defaults = {}
+        for employee in self.env['hr.employee'].sudo().with_context(active_test=False).search_read(
+                [('company_id', 'in', [company_id, False])], ['department_id']):
+            if employee['department_id']:
+                defaults[employee['id']] = dept_defaults.get(employee['department_id'][0], DEFAULT_ENTRY_TIME)
+        return schedules, defaults
+
+    @api.model
+    def _get_schedule_resolver(self, company_id=None):
+        """Devuelve una función ``(employee_id, date) -> hora`` que resuelve en
+        memoria a partir de la matriz cacheada de la compañía. En los días
+        libres devuelve False."""
+        company_id = company_id or self.env.company.id
+        schedules, defaults = self._get_schedule_matrix(company_id, self._get_schedule_version(company_id))
+
+        def resolve(employee_id, day):
+            entry = schedules.get(employee_id, {}).get(day.weekday())
+            if entry:
+                official_entry_time, day_off = entry
+                # En día libre no hay hora oficial: no se computa retraso
+                return False if day_off else official_entry_time
+            return defaults.get(employee_id, DEFAULT_ENTRY_TIME)
+        return resolve
+
     @api.model
     def get_official_entry(self, employee_id, date):
         """Obtiene la hora oficial de entrada para un empleado en una fecha específica"""
-        day_of_week = str(date.weekday())
-        schedule = self.search([
-            ('employee_id', '=', employee_id),
-            ('day_of_week', '=', day_of_week),
-            ('company_id', '=', self.env.company.id),
-        ], limit=1)
-        
-        if schedule:
-            return schedule.official_entry_time
-        
-        # Horario por defecto según departamento
-        employee = self.env['hr.employee'].browse(employee_id)
-        if employee.department_id:
-            dept_name = employee.department_id.name.lower()
-            if 'producc' in dept_name:
-                return '9:45 AM'
-            elif 'ventas' in dept_name:
-                return '9:00 AM'
-            elif 'administr' in dept_name:
-                return '8:00 AM'
-        
-        return '9:00 AM'
\ No newline at end of file
+        return self._get_schedule_resolver()(employee_id, date)
+
+
+class AttendanceDepartmentRule(models.Model):
+    _name = 'hr.attendance.department.rule'
+    _description = 'Horario por Defecto por Departamento'
+    _order = 'sequence, id'
+
+    name = fields.Char(string='Nombre', required=True)
+    sequence = fields.Integer(string='Secuencia', default=10)
+    active = fields.Boolean(string='Activo', default=True)
+    department_id = fields.Many2one('hr.department', string='Departamento', ondelete='cascade')
+    keyword = fields.Char(string='Palabra Clave',
+                          help='Se aplica a los departamentos cuyo nombre contiene este texto (sin distinguir mayúsculas).')
+    official_entry_time = fields.Char(string='Hora Oficial de Entrada', required=True, default='9:00 AM')
+    company_id = fields.Many2one('res.company', string='Compañía', index=True)
+
+    def _matches(self, department):
+        self.ensure_one()
+        if self.department_id:
+            return self.department_id.id == department['id']
+        if self.keyword:
+            return self.keyword.lower() in (department['name'] or '').lower()
+        return False
+
+    @api.model
+    def _get_department_defaults(self, company_id):
+        """Precalcula {department_id: hora} aplicando la primera regla que coincide"""
+        rules = self.search([('company_id', 'in', [company_id, False])])
+        defaults = {}
+        for department in self.env['hr.department'].with_context(active_test=False).search_read(
+                [('company_id', 'in', [company_id, False])], ['name']):
+            rule = next((r for r in rules if r._matches(department)), None)
+            if rule:
+                defaults[department['id']] = rule.official_entry_time
+        return defaults
@@ -0,0 +1,246 @@
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+# Ventanas móviles, en días
+TREND_WINDOWS = (7, 30, 90)
+# Días calculados en la primera ejecución para cada compañía
+TREND_HISTORY_DAYS = 365
+# Orden de gravedad de los veredictos, para comparar ventanas
+VERDICT_RANK = {'ok': 0, 'moderate': 1, 'partial': 2, 'severe': 3}
+
+VERDICT_SELECTION = [
+    ('ok', 'Cumple Horario'),
+    ('moderate', 'Cumplimiento Moderado'),
+    ('partial', 'Incumplimiento Parcial'),
+    ('severe', 'Incumplimiento Severo'),
+]
+
+
+class AttendanceTrend(models.Model):
+    """Indicadores móviles de 7, 30 y 90 días por empleado y día.
+
+    Cada fila resume los registros diarios (activos y archivados) de las
+    ventanas que terminan en ``date``. Se calculan para toda la compañía con
+    una sola consulta con funciones de ventana y se refrescan cada noche
+    desde la fecha más antigua modificada.
+    """
+    _name = 'hr.attendance.trend'
+    _description = 'Tendencia de Cumplimiento'
+    _order = 'date desc, employee_id'
+    _log_access = False
+
+    employee_id = fields.Many2one('hr.employee', string='Empleado', required=True, ondelete='cascade', readonly=True)
+    department_id = fields.Many2one('hr.department', string='Departamento', readonly=True)
+    company_id = fields.Many2one('res.company', string='Compañía', required=True, readonly=True)
+    date = fields.Date(string='Fecha', required=True, readonly=True)
+    absence_rate_7 = fields.Float(string='Ausencias 7d (%)', readonly=True, aggregator='avg')
+    absence_rate_30 = fields.Float(string='Ausencias 30d (%)', readonly=True, aggregator='avg')
+    absence_rate_90 = fields.Float(string='Ausencias 90d (%)', readonly=True, aggregator='avg')
+    avg_late_7 = fields.Float(string='Retraso Prom. 7d (min)', readonly=True, aggregator='avg')
+    avg_late_30 = fields.Float(string='Retraso Prom. 30d (min)', readonly=True, aggregator='avg')
+    avg_late_90 = fields.Float(string='Retraso Prom. 90d (min)', readonly=True, aggregator='avg')
+    verdict_7 = fields.Selection(VERDICT_SELECTION, string='Veredicto 7d', readonly=True)
+    verdict_30 = fields.Selection(VERDICT_SELECTION, string='Veredicto 30d', readonly=True)
+    verdict_90 = fields.Selection(VERDICT_SELECTION, string='Veredicto 90d', readonly=True)
+    trend = fields.Selection([
+        ('improving', 'Mejorando'),
+        ('stable', 'Estable'),
+        ('worsening', 'Empeorando'),
+    ], string='Tendencia', readonly=True,
+        help='Veredicto de los últimos 7 días comparado con el de los últimos 90.')
+
+    _sql_constraints = [
+        ('unique_employee_date', 'unique(company_id, employee_id, date)',
+         _('Ya existe una tendencia para este empleado, fecha y compañía.')),
+    ]
+
+    def init(self):
+        create_index(self.env.cr, 'hr_attendance_trend_company_date_idx',
+                     self._table, ['company_id', 'date'])
+
+    @api.model
+    def _refresh(self, company_id, date_from, date_to):
+        """Recalcula las tendencias de la compañía para las fechas [date_from, date_to].
+
+        Una sola consulta recorre los registros diarios desde 89 días antes de
+        ``date_from`` y calcula las tres ventanas con funciones de ventana;
+        los veredictos usan calculate_verdict con los umbrales configurados.
+        Devuelve el número de filas escritas.
+        """
+        Report = self.env['hr.attendance.report']
+        Report.flush_model()
+        cr = self.env.cr
+        windows = ',\n'.join(
+            'count(*) OVER w{0}, sum(attended::int) OVER w{0}, '
+            'sum(coalesce(late_minutes, 0)) OVER w{0}, sum(coalesce(early_exit_minutes, 0)) OVER w{0}'.format(days)
+            for days in TREND_WINDOWS)
+        definitions = ', '.join(
+            "w{0} AS (PARTITION BY employee_id ORDER BY date RANGE BETWEEN INTERVAL '{1} days' PRECEDING AND CURRENT ROW)"
+            .format(days, days - 1) for days in TREND_WINDOWS)
+        cr.execute("""
+            SELECT * FROM (
+                SELECT employee_id, date, {windows}
+                  FROM (
+                        SELECT employee_id, date, attended, late_minutes, early_exit_minutes
+                          FROM hr_attendance_report
+                         WHERE company_id = %(company)s AND date BETWEEN %(start)s AND %(date_to)s
+                     UNION ALL
+                        SELECT employee_id, date, attended, late_minutes, early_exit_minutes
+                          FROM hr_attendance_report_archive
+                         WHERE company_id = %(company)s AND date BETWEEN %(start)s AND %(date_to)s
+                       ) d
+                WINDOW {definitions}
+            ) w
+             WHERE date >= %(date_from)s
+        """.format(windows=windows, definitions=definitions), {
+            'company': company_id,
+            'start': date_from - timedelta(days=max(TREND_WINDOWS) - 1),
+            'date_from': date_from,
+            'date_to': date_to,
+        })
+        rows = cr.fetchall()
+
+        thresholds = Report._get_verdict_thresholds()
+        columns = {name: [] for name in (
+            'employee_id', 'date', 'absence_rate_7', 'absence_rate_30', 'absence_rate_90',
+            'avg_late_7', 'avg_late_30', 'avg_late_90', 'verdict_7', 'verdict_30', 'verdict_90', 'trend')}
+        for employee_id, day, *totals in rows:
+            columns['employee_id'].append(employee_id)
+            columns['date'].append(day)
+            for index, days in enumerate(TREND_WINDOWS):
+                total_days, attended_days, late, early = totals[index * 4:index * 4 + 4]
+                summary = Report._summary_from_totals(total_days, attended_days, late, early)
+                columns['absence_rate_%s' % days].append(round(100.0 * summary['absences'] / total_days, 2))
+                columns['avg_late_%s' % days].append(round(summary['avg_late_minutes'], 2))
+                columns['verdict_%s' % days].append(Report.calculate_verdict(summary, thresholds)['type'])
+            change = VERDICT_RANK[columns['verdict_7'][-1]] - VERDICT_RANK[columns['verdict_90'][-1]]
+            columns['trend'].append('worsening' if change > 0 else 'improving' if change < 0 else 'stable')
+
+        cr.execute("""
+            DELETE FROM hr_attendance_trend
+             WHERE company_id = %s AND date BETWEEN %s AND %s
+        """, (company_id, date_from, date_to))
+        cr.execute("""
+            INSERT INTO hr_attendance_trend (
+                company_id, department_id, employee_id, date,
+                absence_rate_7, absence_rate_30, absence_rate_90, avg_late_7, avg_late_30, avg_late_90,
+                verdict_7, verdict_30, verdict_90, trend)
+            SELECT %s, e.department_id, t.*
+              FROM unnest(%s::int[], %s::date[], %s::float[], %s::float[], %s::float[], %s::float[], %s::float[],
+                          %s::float[], %s::varchar[], %s::varchar[], %s::varchar[], %s::varchar[])
+                   AS t(employee_id, date, absence_rate_7, absence_rate_30, absence_rate_90,
+                        avg_late_7, avg_late_30, avg_late_90, verdict_7, verdict_30, verdict_90, trend)
+              JOIN hr_employee e ON e.id = t.employee_id
+        """, [company_id] + list(columns.values()))
+        self.invalidate_model()
+        return len(rows)
+
+    @api.model
+    def _cron_refresh_trends(self):
+        """Refresca las tendencias de cada compañía en los rangos que cambiaron.
+
+        Se calculan los días posteriores al último calculado y, para cada
+        rango modificado desde la última ejecución, las ventanas que lo
+        contienen (hasta 89 días después). Los rangos salen de los registros
+        diarios con write_date posterior y de hr.attendance.trend.dirty, donde
+        se anotan los cambios que no dejan write_date (bajas, traslados al
+        histórico, recálculos en SQL). Si cambian los umbrales de los
+        veredictos, se recalcula todo el historial de tendencias.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        Dirty = self.env['hr.attendance.trend.dirty']
+        cr = self.env.cr
+        today = fields.Date.context_today(self)
+        thresholds = repr(sorted(self.env['hr.attendance.report']._get_verdict_thresholds().items()))
+        stored_thresholds = ICP.get_param('hr_attendance_compliance_v18.trend_thresholds')
+        for company in self.env['res.company'].search([]):
+            param = 'hr_attendance_compliance_v18.trend_refreshed_%s' % company.id
+            refreshed = ICP.get_param(param)
+            started = fields.Datetime.now()
+            dirty = Dirty._pop(company.id)
+            cr.execute("SELECT min(date), max(date) FROM hr_attendance_trend WHERE company_id = %s", (company.id,))
+            first_date, last_date = cr.fetchone()
+            ranges = [(last_date + timedelta(days=1) if last_date else today - timedelta(days=TREND_HISTORY_DAYS), today)]
+            if last_date:
+                ranges += dirty
+                if stored_thresholds and stored_thresholds != thresholds:
+                    ranges.append((first_date, last_date))
+                if refreshed:
+                    cr.execute("""
+                        SELECT min(date), max(date) FROM hr_attendance_report
+                         WHERE company_id = %s AND write_date > %s
+                    """, (company.id, refreshed))
+                    ranges.append(cr.fetchone())
+            for date_from, date_to in _affected_ranges(ranges, today):
+                count = self._refresh(company.id, date_from, date_to)
+                _logger.info('Refreshed %s attendance trend rows of company %s from %s to %s',
+                             count, company.id, date_from, date_to)
+            ICP.set_param(param, fields.Datetime.to_string(started))
+            cr.commit()
+        if stored_thresholds != thresholds:
+            ICP.set_param('hr_attendance_compliance_v18.trend_thresholds', thresholds)
+            cr.commit()
+
+
+def _affected_ranges(ranges, last_day):
+    """Rangos de fechas de tendencias afectados por los rangos modificados ``ranges``.
+
+    Cada fecha modificada afecta a las ventanas que terminan hasta 89 días
+    después. Los rangos se amplían, se recortan a ``last_day`` y se unen los
+    que se solapan; se ignoran los rangos vacíos (None, None).
+    """
+    extent = timedelta(days=max(TREND_WINDOWS) - 1)
+    merged = []
+    for date_from, date_to in sorted((low, min(high + extent, last_day)) for low, high in ranges
+                                     if low and low <= last_day):
+        if merged and date_from <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], date_to))
+        else:
+            merged.append((date_from, date_to))
+    return merged
+
+
+class AttendanceTrendDirty(models.Model):
+    """Rangos de fechas cuyas tendencias hay que recalcular.
+
+    Los cambios en los registros diarios que no dejan write_date (bajas,
+    traslados al histórico y recálculos en SQL) anotan aquí su rango; el
+    cron de tendencias los consume en su siguiente ejecución.
+    """
+    _name = 'hr.attendance.trend.dirty'
+    _description = 'Rango de Tendencias por Recalcular'
+    _log_access = False
+
+    company_id = fields.Many2one('res.company', string='Compañía', required=True, ondelete='cascade', index=True)
+    date_from = fields.Date(string='Desde', required=True)
+    date_to = fields.Date(string='Hasta', required=True)
+
+    @api.model
+    def _mark(self, dates):
+        """Anota, por compañía, el rango que cubre ``dates`` (pares (company_id, fecha))"""
+        ranges = {}
+        for company_id, day in dates:
+            if company_id and day:
+                low, high = ranges.get(company_id, (day, day))
+                ranges[company_id] = (min(low, day), max(high, day))
+        if not ranges:
+            return
+        self.env.cr.execute("""
+            INSERT INTO hr_attendance_trend_dirty (company_id, date_from, date_to)
+                 SELECT * FROM unnest(%s::int[], %s::date[], %s::date[])
+        """, (list(ranges), [r[0] for r in ranges.values()], [r[1] for r in ranges.values()]))
+
+    @api.model
+    def _pop(self, company_id):
+        """Borra y devuelve los rangos (desde, hasta) anotados para la compañía"""
+        self.env.cr.execute("""
+            DELETE FROM hr_attendance_trend_dirty
+             WHERE company_id = %s
+         RETURNING date_from, date_to
+        """, (company_id,))
+        return self.env.cr.fetchall()
\ No newline at end of file
@@ -0,0 +1,299 @@
+import ipaddress
+import logging
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+
+from ..tools import zk_client
+
+_logger = logging.getLogger(__name__)
+
+# Marcas incorporadas (y confirmadas) por lote
+SYNC_BATCH_SIZE = 5000
+# Segundos de espera de cada comprobación de estado
+PROBE_TIMEOUT = 3
+
+def parse_networks(text):
+    """Redes de una lista 'IP o CIDR' separada por comas; lanza ValueError si alguna no es válida"""
+    return tuple(ipaddress.ip_network(part.strip(), strict=False) for part in (text or '').split(',') if part.strip())
+
+
+class AttendanceZkDevice(models.Model):
+    _name = 'hr.attendance.zk.device'
+    _description = 'Terminal de Asistencia ZK'
+    _order = 'sequence, name'
+
+    name = fields.Char(string='Nombre', required=True)
+    sequence = fields.Integer(string='Secuencia', default=10)
+    active = fields.Boolean(string='Activo', default=True)
+    company_id = fields.Many2one('res.company', string='Compañía', required=True,
+                                 default=lambda self: self.env.company, index=True)
+    protocol = fields.Selection([
+        ('zk', 'ZKTeco (pyzk)'),
+        ('http', 'Servidor HTTP (/zk/ping)'),
+        ('simulator', 'Simulador'),
+    ], string='Protocolo', required=True, default='zk')
+    host = fields.Char(string='IP/Host', required=True)
+    port = fields.Integer(string='Puerto', required=True, default=4370)
+    password = fields.Integer(string='Clave de Comunicación', default=0, groups='hr.group_hr_manager')
+    timeout = fields.Integer(string='Tiempo de Espera (s)', default=10)
+    pull_enabled = fields.Boolean(string='Descarga Automática', default=True,
+                                  help='Descargar las marcas nuevas periódicamente.')
+    # Cursor de sincronización: hora local de la última marca incorporada
+    last_punch_time = fields.Datetime(string='Última Marca', readonly=True, copy=False,
+                                      help='Hora local del terminal de la última marca incorporada.')
+    last_record_count = fields.Integer(string='Marcas en el Terminal', readonly=True, copy=False)
+    last_sync = fields.Datetime(string='Última Sincronización', readonly=True, copy=False)
+    last_sync_message = fields.Char(string='Resultado', readonly=True, copy=False)
+    sync_requested = fields.Boolean(string='Sincronización Pendiente', readonly=True, copy=False,
+                                    help='Se sincroniza en la próxima ejecución del cron aunque no '
+                                         'tenga la descarga automática activada.')
+    punches_imported = fields.Integer(string='Marcas Incorporadas', readonly=True, copy=False)
+    punches_unmatched = fields.Integer(string='Marcas sin Empleado', readonly=True, copy=False)
+    # Recepción push (protocolo ADMS / iclock)
+    serial_number = fields.Char(string='Número de Serie', copy=False, index=True,
+                                help='Número de serie con el que el terminal se identifica al enviar marcas.')
+    push_enabled = fields.Boolean(string='Recepción Push', default=False,
+                                  help='Aceptar las marcas que el terminal envía a /iclock/cdata.')
+    push_token = fields.Char(string='Token Push', copy=False, groups='hr.group_hr_manager',
+                             help='Si se define, cada envío debe traerlo en la cabecera X-Iclock-Token '
+                                  '(por ejemplo, añadida por el proxy inverso delante de Odoo).')
+    push_allowed_networks = fields.Char(string='Redes Permitidas',
+                                        help='IPs o redes CIDR separadas por comas (por ejemplo 192.168.10.0/24) '
+                                             'desde las que se aceptan envíos. Detrás de un proxy requiere proxy_mode.')
+    push_stamp = fields.Char(string='Sello ATTLOG', readonly=True, copy=False)
+    last_push = fields.Datetime(string='Último Envío', readonly=True, copy=False)
+    push_rejected = fields.Integer(string='Envíos Rechazados', readonly=True, copy=False)
+    last_push_rejected = fields.Datetime(string='Último Rechazo', readonly=True, copy=False)
+    # Estado de conexión, actualizado por el cron de monitorización
+    health_status = fields.Selection([
+        ('unknown', 'Sin Comprobar'),
+        ('online', 'En Línea'),
+        ('offline', 'Sin Conexión'),
+    ], string='Estado', default='unknown', readonly=True, copy=False)
+    health_latency = fields.Integer(string='Latencia (ms)', readonly=True, copy=False)
+    health_last_seen = fields.Datetime(string='Visto por Última Vez', readonly=True, copy=False)
+    health_checked = fields.Datetime(string='Última Comprobación', readonly=True, copy=False)
+    health_message = fields.Char(string='Detalle de Conexión', readonly=True, copy=False)
+
+    _sql_constraints = [
+        ('unique_serial_number', 'unique(serial_number)', _('Ya existe un terminal con este número de serie.')),
+    ]
+
+    @api.constrains('push_enabled', 'push_token', 'push_allowed_networks')
+    def _check_push_credentials(self):
+        for device in self.sudo():
+            try:
+                parse_networks(device.push_allowed_networks)
+            except ValueError as e:
+                raise ValidationError(_('Red permitida no válida en %s: %s') % (device.name, e))
+            if device.push_enabled and not (device.push_token or device.push_allowed_networks):
+                raise ValidationError(_(
+                    'El terminal %s recibe marcas por push: defina un token o las redes permitidas.') % device.name)
+
+    @api.model
+    def _get_push_version(self):
+        """Versión de los terminales push: cambia al activar, modificar o desactivar uno"""
+        self.flush_model(['serial_number', 'push_enabled', 'active', 'company_id', 'push_token',
+                          'push_allowed_networks'])
+        self.env.cr.execute("""
+            SELECT count(*), max(id), max(write_date) FROM hr_attendance_zk_device WHERE push_enabled
+        """)
+        return self.env.cr.fetchone()
+
+    @tools.ormcache('serial_number', 'version')
+    def _get_push_device_cached(self, serial_number, version):
+        device = self.sudo().search([('serial_number', '=', serial_number), ('push_enabled', '=', True)], limit=1)
+        if not device:
+            return None
+        return device.id, device.company_id.id, device.push_token or None, parse_networks(device.push_allowed_networks)
+
+    @api.model
+    def _get_push_device(self, serial_number):
+        """(device_id, company_id, token, redes permitidas) del terminal push con ese
+        número de serie, o None. Se cachea con _get_push_version, sin vaciar la
+        caché del registro al modificar terminales."""
+        return self._get_push_device_cached(serial_number, self._get_push_version())
+
+    @api.model
+    def _record_push_rejected(self, device_id):
+        """Cuenta un envío rechazado del terminal sin pasar por el ORM"""
+        self.env.cr.execute("""
+            UPDATE hr_attendance_zk_device
+               SET push_rejected = coalesce(push_rejected, 0) + 1,
+                   last_push_rejected = (now() at time zone 'UTC')
+             WHERE id = %s
+        """, (device_id,))
+
+    @api.model
+    def _record_push(self, device_id, stamp=None):
+        """Anota el último envío sin pasar por el ORM (se llama en cada envío)"""
+        self.env.cr.execute("""
+            UPDATE hr_attendance_zk_device
+               SET last_push = (now() at time zone 'UTC'),
+                   push_stamp = coalesce(%s, push_stamp)
+             WHERE id = %s
+        """, (stamp, device_id))
+
+    def _connect(self):
+        self.ensure_one()
+        return zk_client.connect(self.protocol, self.host, self.port,
+                                 password=self.sudo().password, timeout=self.timeout)
+
+    def action_sync(self):
+        """Programa una sincronización inmediata sin bloquear la interfaz.
+
+        La descarga la hace el cron, que confirma por lotes; la petición de la
+        interfaz no confirma ni revierte la transacción.
+        """
+        self.write({'sync_requested': True})
+        self.env.ref('hr_attendance_compliance_v18.ir_cron_sync_zk_devices')._trigger()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Sincronización programada'),
+                'message': _('Las marcas nuevas se descargarán en unos segundos; el resultado '
+                             'aparecerá en Última Sincronización.'),
+                'type': 'info',
+                'sticky': False,
+            }
+        }
+
+    def action_reset_cursor(self):
+        """Vuelve a descargar el registro completo en la próxima sincronización"""
+        self.write({'last_punch_time': False, 'last_record_count': 0})
+
+    @api.onchange('protocol')
+    def _onchange_protocol(self):
+        if self.protocol == 'http':
+            self.pull_enabled = False
+
+    def action_check_health(self):
+        """Programa una comprobación inmediata sin bloquear la interfaz"""
+        self.env.ref('hr_attendance_compliance_v18.ir_cron_check_zk_devices')._trigger()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Comprobación programada'),
+                'message': _('El estado se actualizará en unos segundos.'),
+                'type': 'info',
+                'sticky': False,
+            }
+        }
+
+    @api.model
+    def _cron_check_health(self):
+        """Comprueba todos los terminales activos en paralelo y guarda el resultado"""
+        devices = self.search([])
+        results = zk_client.probe_many(
+            {device.id: (device.protocol, device.host, device.port) for device in devices},
+            timeout=PROBE_TIMEOUT)
+        now = fields.Datetime.now()
+        for device in devices:
+            ok, latency, message = results[device.id]
+            vals = {
+                'health_status': 'online' if ok else 'offline',
+                'health_latency': latency or 0,
+                'health_checked': now,
+                'health_message': message,
+            }
+            if ok:
+                vals['health_last_seen'] = now
+            device.write(vals)
+
+    @api.model
+    def _get_http_endpoint(self, host, port):
+        """Endpoint HTTP monitorizado para host:puerto; se registra si no existe"""
+        endpoint = self.search([('protocol', '=', 'http'), ('host', '=', host), ('port', '=', port)], limit=1)
+        if not endpoint:
+            endpoint = self.sudo().create({
+                'name': '%s:%s' % (host, port),
+                'protocol': 'http',
+                'host': host,
+                'port': port,
+                'pull_enabled': False,
+            })
+            endpoint.action_check_health()
+        return endpoint
+
+    @api.model
+    def _cron_sync_devices(self):
+        """Sincroniza los terminales con descarga automática y los pedidos con action_sync"""
+        for device in self.search([
+            ('protocol', '!=', 'http'),
+            '|', ('pull_enabled', '=', True), ('sync_requested', '=', True),
+        ]):
+            device.with_company(device.company_id)._sync()
+
+    def _sync(self):
+        """Incorpora las marcas posteriores al cursor del terminal.
+
+        Si el número de marcas del terminal no cambió desde la última
+        sincronización no se descarga nada. Las marcas nuevas se incorporan en
+        lotes que se confirman junto con el avance del cursor, de modo que una
+        interrupción no duplica ni pierde marcas. Confirma la transacción, así
+        que sólo se llama desde el cron. Devuelve False si falla.
+        """
+        self.ensure_one()
+        cr = self.env.cr
+        imported = unmatched = 0
+        try:
+            with self._connect() as conn:
+                count = conn.record_count()
+                if count != self.last_record_count or not self.last_punch_time:
+                    punches = sorted(conn.iter_punches(self.last_punch_time), key=lambda p: p.timestamp)
+                    for batch in self._iter_batches(punches):
+                        batch_imported, batch_unmatched = self._import_punches(batch)
+                        imported += batch_imported
+                        unmatched += batch_unmatched
+                        self.write({
+                            'last_punch_time': batch[-1].timestamp,
+                            'punches_imported': self.punches_imported + batch_imported,
+                            'punches_unmatched': self.punches_unmatched + batch_unmatched,
+                        })
+                        cr.commit()
+        except Exception as e:
+            cr.rollback()
+            _logger.warning('ZK device %s sync failed: %s', self.id, e)
+            self.write({
+                'last_sync': fields.Datetime.now(),
+                'last_sync_message': _('Error: %s') % e,
+                'sync_requested': False,
+            })
+            cr.commit()
+            return False
+        self.write({
+            'last_record_count': count,
+            'last_sync': fields.Datetime.now(),
+            'last_sync_message': _('%s marcas nuevas, %s sin empleado.') % (imported, unmatched),
+            'sync_requested': False,
+        })
+        cr.commit()
+        return True
+
+    @api.model
+    def _iter_batches(self, punches):
+        """Lotes de SYNC_BATCH_SIZE marcas sin separar marcas del mismo instante,
+        para que el cursor (estrictamente mayor) no se salte ninguna"""
+        start = 0
+        while start < len(punches):
+            end = min(start + SYNC_BATCH_SIZE, len(punches))
+            while end < len(punches) and punches[end].timestamp == punches[end - 1].timestamp:
+                end += 1
+            yield punches[start:end]
+            start = end
+
+    def _get_employee_codes(self, codes):
+        """Mapa {código del terminal: employee_id} por identificación o código de barras"""
+        Employee = self.env['hr.employee']
+        index = Employee._get_match_index(self.company_id.id, Employee._get_match_version(self.company_id.id))[1]
+        return {code: index[code] for code in set(codes) if code in index}
+
+    def _import_punches(self, punches):
+        """Incorpora un lote de marcas; devuelve (incorporadas, sin empleado)"""
+        employees = self._get_employee_codes(p.user_id for p in punches)
+        matched = [(employees[p.user_id], p.timestamp) for p in punches if p.user_id in employees]
+        self.env['hr.attendance.report']._merge_punches(self.company_id.id, matched)
+        return len(matched), len(punches) - len(matched)
\ No newline at end of file
@@ -0,0 +1,76 @@
+from odoo import models, api, tools
+
+from ..tools.text_utils import normalize_name
+
+
+class HrEmployee(models.Model):
+    _inherit = 'hr.employee'
+
+    @api.model
+    def _get_match_version(self, company_id):
+        """Versión de los empleados de la compañía: cambia al crear, modificar o eliminar uno"""
+        self.flush_model(['name', 'identification_id', 'barcode', 'active', 'company_id'])
+        self.env.cr.execute("""
+            SELECT count(*), max(id), max(write_date) FROM hr_employee
+             WHERE company_id = %s OR company_id IS NULL
+        """, (company_id,))
+        return self.env.cr.fetchone()
+
+    @tools.ormcache('company_id', 'version')
+    def _get_match_index(self, company_id, version):
+        """Índice de coincidencia de empleados de una compañía (y sin compañía).
+
+        Devuelve ({nombre normalizado: employee_id}, {código: employee_id}); los
+        códigos son la identificación y el código de barras (gafete). Los nombres
+        sólo incluyen empleados activos; ante duplicados gana el más antiguo.
+        ``version`` es _get_match_version: el índice se renueva solo cuando
+        cambian los empleados, sin vaciar la caché del registro.
+        El resultado es compartido: no debe modificarse.
+        """
+        names = {}
+        codes = {}
+        employees = self.sudo().with_context(active_test=False).search_read(
+            [('company_id', 'in', [company_id, False])],
+            ['name', 'identification_id', 'barcode', 'active'], order='id')
+        for employee in employees:
+            if employee['active'] and employee['name']:
+                names.setdefault(normalize_name(employee['name']), employee['id'])
+            for code in (employee['identification_id'], employee['barcode']):
+                if code:
+                    codes.setdefault(code.strip(), employee['id'])
+        return names, codes
+
+    @api.model
+    def _match_employees(self, company_id, keys, create_missing=False):
+        """Resuelve pares (nombre, código) a employee_id con el índice de la compañía.
+
+        Se busca primero por código y después por nombre normalizado. Con
+        ``create_missing``, los pares sin coincidencia que tienen nombre se
+        crean en un solo create(), un empleado por nombre normalizado.
+        Devuelve ({(nombre, código): employee_id}, número de empleados creados).
+        """
+        names, codes = self._get_match_index(company_id, self._get_match_version(company_id))
+        result = {}
+        missing = {}
+        for key in keys:
+            name, code = key
+            employee_id = codes.get(code) if code else None
+            if employee_id is None:
+                normalized = normalize_name(name)
+                employee_id = names.get(normalized)
+                if employee_id is None:
+                    if normalized:
+                        missing.setdefault(normalized, []).append(key)
+                    continue
+            result[key] = employee_id
+
+        if not (create_missing and missing):
+            return result, 0
+        created = self.create([
+            {'name': ' '.join(pending[0][0].split()), 'company_id': company_id}
+            for pending in missing.values()
+        ])
+        for pending, employee_id in zip(missing.values(), created.ids):
+            for key in pending:
+                result[key] = employee_id
+        return result, len(created)
\ No newline at end of file
@@ -0,0 +1 @@
+from . import test_zk_report_parser
\ No newline at end of file
@@ -0,0 +1,113 @@
+import os
+from datetime import date
+
+from odoo.tests import tagged
+from odoo.tests.common import BaseCase, TransactionCase
+
+from ..tools import import_readers, zk_report_parser
+from ..tools.time_utils import NO_TIME
+
+FILES_DIR = os.path.join(os.path.dirname(__file__), 'files')
+
+
+def read_fixture(file_name):
+    """Contenido binario de un archivo de tests/files"""
+    with open(os.path.join(FILES_DIR, file_name), 'rb') as fixture:
+        return fixture.read()
+
+
+def parse_fixture(file_name):
+    return list(import_readers.iter_file_rows(file_name, read_fixture(file_name)))
+
+
+class TestZkReportParser(BaseCase):
+    """Reportes de Eventos de Asistencia con la forma de las exportaciones reales"""
+
+    def test_multi_period(self):
+        rows = parse_fixture('multi_period.csv')
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(
+            [(row['id'], row['fecha']) for row in rows if row['nombre'] == 'Sandro'],
+            [('40213980390', date(2025, 10, day)) for day in (1, 2, 3, 4, 5)])
+        # Marcas pegadas en una celda ('09:4518:02')
+        first = rows[0]
+        self.assertEqual((first['primera_entrada_min'], first['ultima_salida_min']), (9 * 60 + 45, 18 * 60 + 2))
+        self.assertEqual(first['marcas'], (9 * 60 + 45, 18 * 60 + 2))
+        maria = [row for row in rows if row['id'] == '40213980391']
+        self.assertEqual(maria[0]['departamento'], 'Producción')
+        self.assertEqual(maria[2]['total_registros'], 4)
+        self.assertEqual((maria[2]['primera_entrada_min'], maria[2]['ultima_salida_min']), (9 * 60 + 10, 17 * 60 + 30))
+
+    def test_typed_values(self):
+        rows = parse_fixture('multi_period.csv')
+        absent = rows[2]
+        self.assertIs(absent['asistio'], False)
+        self.assertEqual((absent['primera_entrada_min'], absent['ultima_salida_min']), (NO_TIME, NO_TIME))
+        self.assertEqual((absent['total_registros'], absent['marcas']), (0, ()))
+        self.assertIs(rows[0]['asistio'], True)
+        self.assertIsInstance(rows[0]['fecha'], date)
+
+    def test_cross_month(self):
+        rows = parse_fixture('cross_month.csv')
+        self.assertEqual([row['fecha'] for row in rows], [
+            date(2025, 1, 30), date(2025, 1, 31), date(2025, 2, 1), date(2025, 2, 2),
+            # El 28 de febrero falta en la fila de días: no desplaza las columnas siguientes
+            date(2025, 2, 26), date(2025, 2, 27), date(2025, 3, 1), date(2025, 3, 2),
+        ])
+        self.assertEqual(rows[6]['primera_entrada_min'], 9 * 60 + 2)
+
+    def test_missing_period(self):
+        with self.assertRaises(zk_report_parser.ZkReportError):
+            parse_fixture('missing_period.csv')
+
+    def test_reordered_header(self):
+        # 'Nombre:' antes de 'ID:': error con la línea, no un AttributeError
+        with self.assertRaisesRegex(zk_report_parser.ZkReportError, 'Nombre:,,Sandro,,ID:'):
+            parse_fixture('reordered_header.csv')
+
+    def test_malformed_cells(self):
+        rows = parse_fixture('malformed_cells.csv')
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['departamento'], 'N/A')
+        # '25:00' no es una hora válida: cuentan sólo las dos marcas válidas
+        self.assertEqual(
+            (rows[0]['primera_entrada_min'], rows[0]['ultima_salida_min'], rows[0]['total_registros']),
+            (9 * 60, 12 * 60 + 30, 2))
+        # Celdas sin ninguna hora reconocible
+        for row in rows[1:3]:
+            self.assertFalse(row['asistio'])
+            self.assertEqual(row['primera_entrada_min'], NO_TIME)
+        self.assertEqual((rows[3]['primera_entrada_min'], rows[3]['total_registros']), (7 * 60 + 15, 1))
+        self.assertEqual(rows[4]['marcas'], (7 * 60,))
+
+    def test_parse_cell(self):
+        parse_cell = zk_report_parser.parse_cell
+        self.assertEqual(parse_cell('09:45 18:02'), (585, 1082, 2, (585, 1082)))
+        # Dos marcas pegadas con una hora inválida: sólo cuenta la válida
+        self.assertEqual(parse_cell('24:0007:15'), (435, 435, 1, (435,)))
+        self.assertEqual(parse_cell('08:0012:0013:0017:30'), (480, 1050, 4, (480, 720, 780, 1050)))
+        self.assertEqual(parse_cell('25:00'), zk_report_parser.EMPTY_CELL)
+
+    def test_invalid_period(self):
+        rows = [
+            ['Reporte de Eventos de Asistencia'],
+            ['Periodo:', '', '2025-10-05 ~ 2025-10-01'],
+        ]
+        with self.assertRaises(zk_report_parser.ZkReportError):
+            list(zk_report_parser.iter_report_days(rows))
+
+
+@tagged('post_install', '-at_install')
+class TestZkReportImport(TransactionCase):
+
+    def test_import_malformed_cells(self):
+        """Las filas tipadas del reporte se escriben sin volver a parsear texto"""
+        wizard = self.env['import.attendance.wizard'].new({})
+        records = wizard._create_attendance_records(parse_fixture('malformed_cells.csv'))
+        by_date = {record.date: record for record in records}
+        first = by_date[date(2025, 10, 1)]
+        self.assertEqual((first.first_entry, first.last_exit, first.total_records), ('09:00', '12:30', 2))
+        self.assertTrue(first.attended)
+        self.assertEqual(first.status, 'on_time')
+        self.assertEqual(by_date[date(2025, 10, 2)].status, 'absent')
+        self.assertEqual(by_date[date(2025, 10, 4)].first_entry_minutes, 7 * 60 + 15)
\ No newline at end of file
@@ -0,0 +1,8 @@
+from . import export_writers
+from . import import_readers
+from . import parallel_parse
+from . import parse_worker
+from . import text_utils
+from . import time_utils
+from . import zk_client
+from . import zk_report_parser
\ No newline at end of file
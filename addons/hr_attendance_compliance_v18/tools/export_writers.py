@@ -0,0 +1,49 @@
+"""Escritura incremental de exportaciones CSV y XLSX.
+
+Las filas llegan de un iterador y se escriben a medida que se leen, de modo
+que la memoria no depende del número de filas exportadas.
+"""
+import csv
+import io
+import tempfile
+
+# Bytes de CSV acumulados antes de entregar un bloque
+CSV_CHUNK_SIZE = 64 * 1024
+# Bytes del XLSX generado que se mantienen en memoria antes de pasar a disco
+XLSX_SPOOL_SIZE = 8 * 1024 * 1024
+
+CSV_MIMETYPE = 'text/csv; charset=utf-8'
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def iter_csv(header, rows):
+    """Produce el CSV en bloques de bytes (UTF-8 con BOM, para que Excel lo abra bien)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CSV_CHUNK_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def write_xlsx(header, rows, title):
+    """Escribe las filas en un XLSX en modo de sólo escritura.
+
+    openpyxl vuelca cada fila a un archivo temporal en lugar de mantener la
+    hoja en memoria. Devuelve un archivo temporal posicionado al inicio.
+    """
+    import openpyxl
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31])
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    output = tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_SIZE)
+    workbook.save(output)
+    output.seek(0)
+    return output
\ No newline at end of file
@@ -0,0 +1,344 @@
+"""Lectura en streaming de archivos de asistencia.
+
+Estas funciones no dependen del ORM: reciben el contenido binario del archivo
+(ya decodificado, por ejemplo ``ir.attachment.raw``) y producen filas
+normalizadas de forma perezosa, manteniendo una sola copia del archivo en
+memoria.
+"""
+import binascii
+import codecs
+import csv
+import functools
+import hashlib
+import io
+import itertools
+import os
+import re
+import zipfile
+from datetime import date, datetime, time
+
+from . import zk_report_parser
+
+CHUNK_SIZE = 64 * 1024
+REPORT_TITLE = 'Reporte de Eventos de Asistencia'
+# Extensiones que se importan desde un archivo zip
+IMPORT_EXTENSIONS = ('.csv', '.txt', '.xlsx', '.xls')
+
+_WHITESPACE = b' \t\r\n'
+# 'id' como palabra o con separador (ID, ID_Empleado, Empleado ID), pegado a
+# empleado/usuario (EmpleadoID), identificación o cédula; no 'salida'
+_ID_RE = re.compile(r'(?<![a-z])id(?![a-z])|(?:empleado|employee|usuario|user)id|identific|c[eé]dula')
+
+
+class Base64Reader(io.RawIOBase):
+    """Flujo binario que decodifica base64 por bloques."""
+
+    def __init__(self, data, chunk_size=CHUNK_SIZE):
+        super().__init__()
+        if isinstance(data, str):
+            data = data.encode('ascii')
+        self._data = memoryview(data)
+        self._pos = 0
+        self._chunk_size = chunk_size - chunk_size % 4
+        self._pending = b''
+        self._decoded = b''
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        while not self._decoded and self._pos < len(self._data):
+            chunk = bytes(self._data[self._pos:self._pos + self._chunk_size]).translate(None, _WHITESPACE)
+            self._pos += self._chunk_size
+            chunk = self._pending + chunk
+            usable = len(chunk) - len(chunk) % 4 if self._pos < len(self._data) else len(chunk)
+            self._pending = chunk[usable:]
+            self._decoded = binascii.a2b_base64(chunk[:usable])
+
+    def readinto(self, buffer):
+        self._fill()
+        size = min(len(buffer), len(self._decoded))
+        buffer[:size] = self._decoded[:size]
+        self._decoded = self._decoded[size:]
+        return size
+
+
+def file_fingerprint(data):
+    """Huella SHA-256 del contenido decodificado de un archivo en base64"""
+    digest = hashlib.sha256()
+    reader = Base64Reader(data)
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    while True:
+        size = reader.readinto(buffer)
+        if not size:
+            break
+        digest.update(view[:size])
+    return digest.hexdigest()
+
+
+def combined_fingerprint(fingerprints):
+    """Huella de un conjunto de archivos, independiente del orden de carga"""
+    return hashlib.sha256('\n'.join(sorted(fingerprints)).encode()).hexdigest()
+
+
+def file_kind(file_name):
+    """Tipo de archivo según su extensión: 'excel', 'zip' o 'csv'"""
+    name = (file_name or '').lower()
+    if name.endswith(('.xlsx', '.xls')):
+        return 'excel'
+    if name.endswith('.zip'):
+        return 'zip'
+    return 'csv'
+
+
+def detect_encoding(head):
+    """Detecta la codificación a partir del primer bloque del archivo."""
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def detect_delimiter(first_line):
+    return ';' if first_line.count(';') > first_line.count(',') else ','
+
+
+def open_text_stream(data):
+    """Abre contenido binario como flujo de texto, detectando la codificación
+    y el delimitador sólo con el primer bloque.
+
+    Devuelve ``(stream, delimiter)``.
+    """
+    head = data[:CHUNK_SIZE]
+    encoding = detect_encoding(head)
+    first_line = head.split(b'\n', 1)[0].decode(encoding, errors='replace')
+    stream = io.TextIOWrapper(io.BytesIO(data), encoding=encoding, errors='replace', newline='')
+    return stream, detect_delimiter(first_line)
+
+
+def iter_csv_rows(data):
+    """Itera las filas (listas de celdas) de un CSV."""
+    stream, delimiter = open_text_stream(data)
+    return csv.reader(stream, delimiter=delimiter)
+
+
+def iter_excel_sheets(data):
+    """Itera las hojas de un libro Excel en modo de sólo lectura.
+
+    Produce, por cada hoja, un iterador de filas con los valores tipados de
+    las celdas (``datetime``, ``time``, números...).
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            sheet.reset_dimensions()
+            yield sheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def to_text(value):
+    """Representación de texto de una celda tipada"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, datetime):
+        if value.time() == time.min:
+            return value.date().isoformat()
+        return value.strftime('%Y-%m-%d %H:%M')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, time):
+        return value.strftime('%H:%M')
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def to_date(value):
+    """Convierte una celda (``date``, ``datetime`` o 'AAAA-MM-DD') en ``date``.
+
+    Devuelve None si no es una fecha válida.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value.strip()[:10], '%Y-%m-%d').date()
+        except ValueError:
+            return None
+    return None
+
+
+def to_time_text(value):
+    """Convierte una celda de hora (``time``, ``datetime`` o texto) en texto"""
+    if isinstance(value, (datetime, time)):
+        return value.strftime('%H:%M')
+    return to_text(value).strip()
+
+
+def _header_field(key):
+    """Campo normalizado para un encabezado, o None si no se reconoce."""
+    key_lower = (key or '').lower().strip()
+    if 'nombre' in key_lower:
+        return 'nombre'
+    elif _ID_RE.search(key_lower):
+        return 'id'
+    elif 'departamento' in key_lower or 'area' in key_lower:
+        return 'departamento'
+    elif 'fecha' in key_lower:
+        return 'fecha'
+    elif 'asist' in key_lower:
+        return 'asistio'
+    elif 'entrada' in key_lower and 'hora' in key_lower:
+        return 'hora_entrada'
+    elif 'retraso' in key_lower:
+        return 'minutos_retraso'
+    elif 'salida' in key_lower and 'temprana' in key_lower:
+        return 'minutos_salida_temprana'
+    elif 'primera' in key_lower and 'entrada' in key_lower:
+        return 'primera_entrada'
+    elif 'ultima' in key_lower and 'salida' in key_lower:
+        return 'ultima_salida'
+    return None
+
+
+def resolve_header(header):
+    """Convierte la fila de encabezado en un mapa {campo: índice de columna}.
+
+    Si varias columnas apuntan al mismo campo, gana la última.
+    """
+    columns = {}
+    for idx, key in enumerate(header):
+        field = _header_field(str(key) if key is not None else '')
+        if field:
+            columns[field] = idx
+    return columns
+
+
+def iter_standard_rows(rows):
+    """Produce filas normalizadas a partir de un CSV estándar.
+
+    ``rows`` es un iterable de listas cuya primera fila es el encabezado.
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = list(resolve_header(header).items())
+    for row in rows:
+        size = len(row)
+        normalized_row = {field: row[idx] for field, idx in columns if idx < size}
+        if normalized_row.get('nombre') and normalized_row.get('fecha'):
+            yield normalized_row
+
+
+
+def iter_report_rows(rows):
+    """Produce filas tipadas a partir de un Reporte de Eventos de Asistencia.
+
+    ``rows`` es un iterable de listas de celdas de texto; el parseo lo hace
+    zk_report_parser en una sola pasada. A diferencia del CSV estándar, los
+    valores ya vienen tipados: 'fecha' es ``date``, 'asistio' un booleano y
+    'primera_entrada_min'/'ultima_salida_min' minutos desde medianoche
+    (NO_TIME sin marcas).
+    """
+    parse_cell = zk_report_parser.parse_cell
+    empty = zk_report_parser.EMPTY_CELL
+    minute_of = zk_report_parser.MINUTES.get
+    for (code, name, department), dates, cells in zk_report_parser.iter_report_blocks(rows):
+        for day, cell in zip(dates, cells):
+            # Celdas vacías y de una marca sin llamar a parse_cell: son la mayoría
+            if not cell:
+                first, last, count, minutes = empty
+            elif len(cell) == 5 and (first := minute_of(cell)) is not None:
+                last, count, minutes = first, 1, (first,)
+            else:
+                first, last, count, minutes = parse_cell(cell)
+            yield {
+                'nombre': name,
+                'id': code,
+                'departamento': department,
+                'fecha': day,
+                'asistio': count > 0,
+                'primera_entrada_min': first,
+                'ultima_salida_min': last,
+                'total_registros': count,
+                'marcas': minutes,
+            }
+
+
+def iter_file_rows(file_name, data):
+    """Produce las filas normalizadas del contenido binario de un archivo CSV o Excel"""
+    if file_kind(file_name) == 'excel':
+        return _iter_excel_file_rows(data)
+    rows = iter_csv_rows(data)
+    header = next(rows, None)
+    if header is None:
+        return iter(())
+    rows = itertools.chain([header], rows)
+    if REPORT_TITLE in ','.join(header):
+        return iter_report_rows(rows)
+    return iter_standard_rows(rows)
+
+
+def _iter_excel_file_rows(data):
+    for sheet_rows in iter_excel_sheets(data):
+        header = next(sheet_rows, None)
+        if header is None:
+            continue
+        rows = itertools.chain([header], sheet_rows)
+        if REPORT_TITLE in ','.join(to_text(cell) for cell in header):
+            yield from iter_report_rows([to_text(cell) for cell in row] for row in rows)
+        else:
+            yield from iter_standard_rows(rows)
+
+
+def iter_zip_members(data):
+    """Itera los archivos importables de un zip como (nombre, cargador).
+
+    ``cargador()`` descomprime sólo ese miembro, de modo que en memoria hay un
+    miembro a la vez y los que no se cargan no se descomprimen. Sólo es
+    válido mientras dura la iteración.
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in zip_import_members(archive):
+            yield info.filename, functools.partial(archive.read, info)
+
+
+def zip_import_members(archive):
+    """Miembros importables (ZipInfo) de un ``zipfile.ZipFile``, en su orden"""
+    members = []
+    for info in archive.infolist():
+        base_name = os.path.basename(info.filename)
+        if (info.is_dir() or info.filename.startswith('__MACOSX/') or base_name.startswith('.')
+                or not base_name.lower().endswith(IMPORT_EXTENSIONS)):
+            continue
+        members.append(info)
+    return members
+
+
+def iter_source_files(sources):
+    """Itera los archivos de ``sources`` como (nombre, cargador), sustituyendo cada
+    zip por sus archivos.
+
+    ``sources`` son pares (nombre, cargador) cuyo cargador devuelve el
+    contenido binario: ningún archivo se lee hasta llamar a su cargador (un
+    zip, al llegar a él, para listar sus miembros).
+    """
+    for file_name, load in sources:
+        if file_kind(file_name) == 'zip':
+            yield from iter_zip_members(load())
+        else:
+            yield file_name, load
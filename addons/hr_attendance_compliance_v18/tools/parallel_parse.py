@@ -0,0 +1,167 @@
+"""Parseo de varios archivos en procesos hijos.
+
+El parseo es Python puro y está limitado por la CPU, así que con varios
+archivos cada uno se parsea en un proceso del pool. Los procesos se crean
+con 'spawn', de modo que no heredan el estado del servidor (cursores, hilos,
+sockets). Tampoco importan Odoo: parse_worker carga este paquete por su
+ruta. Cada proceso lee su archivo del disco y envía las filas por bloques a
+una cola acotada propia del archivo. El proceso padre las consume en el
+orden de los archivos y hace la escritura con el ORM, y un proceso que va
+por delante se detiene al llenarse su cola.
+"""
+import itertools
+import multiprocessing
+import queue
+import runpy
+import time
+import traceback
+import zipfile
+
+from . import import_readers
+from . import parse_worker
+
+# Filas por mensaje y mensajes en cola por archivo
+RESULT_BATCH_SIZE = 1000
+RESULT_QUEUE_SIZE = 8
+# Segundos sin mensajes de un proceso antes de darlo por perdido
+WORKER_TIMEOUT = 300
+
+# Colas de resultados del proceso hijo, una por posición de la ventana de archivos
+_queues = None
+
+
+class ParseWorkerError(Exception):
+    """Error al parsear un archivo en un proceso hijo"""
+
+
+class _RemoteTraceback(Exception):
+    """Traza del proceso hijo, como causa de ParseWorkerError"""
+
+    def __init__(self, tb):
+        super().__init__(tb)
+        self.tb = tb
+
+    def __str__(self):
+        return self.tb
+
+
+def init_worker(queues):
+    global _queues
+    _queues = queues
+
+
+def list_source_files(sources):
+    """Expande los zip de ``sources`` (pares (nombre, ruta)) en tuplas
+    (nombre, ruta, miembro del zip o None), en el mismo orden que
+    import_readers.iter_source_files. Sólo se lee el índice de cada zip.
+    """
+    files = []
+    for file_name, path in sources:
+        if import_readers.file_kind(file_name) == 'zip':
+            with zipfile.ZipFile(path) as archive:
+                files.extend((info.filename, path, info.filename)
+                             for info in import_readers.zip_import_members(archive))
+        else:
+            files.append((file_name, path, None))
+    return files
+
+
+def _read_file(path, member):
+    if member is None:
+        with open(path, 'rb') as file:
+            return file.read()
+    with zipfile.ZipFile(path) as archive:
+        return archive.read(member)
+
+
+def parse_file(slot, file_name, path, member, skip):
+    """Parsea un archivo en un proceso hijo y envía sus filas por la cola ``slot``.
+
+    Los mensajes son ('size', bytes del archivo), ('rows', bloque de filas),
+    ('error', (mensaje, traza)) y, al terminar, ('done', None).
+    """
+    results = _queues[slot]
+    try:
+        data = _read_file(path, member)
+        results.put(('size', len(data)))
+        rows = itertools.islice(import_readers.iter_file_rows(file_name, data), skip, None)
+        del data
+        while True:
+            batch = list(itertools.islice(rows, RESULT_BATCH_SIZE))
+            if not batch:
+                break
+            results.put(('rows', batch))
+    except Exception as e:
+        results.put(('error', ('%s: %s' % (file_name, e), traceback.format_exc())))
+    else:
+        results.put(('done', None))
+
+
+def _next_message(results, task, file_name):
+    """Siguiente mensaje de la cola de un archivo, vigilando que su tarea siga viva"""
+    deadline = time.monotonic() + WORKER_TIMEOUT
+    while True:
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            if task.ready() and not task.successful():
+                task.get()
+            if time.monotonic() > deadline:
+                raise ParseWorkerError('El proceso de parseo de %s no responde.' % file_name)
+
+
+def iter_parallel_rows(files, workers, file_index=0, row_index=0, stats=None):
+    """Filas de ``files`` (tuplas de list_source_files) parseadas en ``workers`` procesos.
+
+    Produce las mismas tuplas (índice de archivo, índice de fila en el
+    archivo, fila) y en el mismo orden que el parseo secuencial, así que se
+    reanuda igual. Los archivos anteriores a ``file_index`` se omiten y del
+    archivo ``file_index`` se saltan ``row_index`` filas. Hay como mucho
+    ``workers`` archivos en curso, cada uno con su cola acotada. Si se pasa
+    ``stats``, guarda en 'peak_file_size' el tamaño en bytes del mayor
+    archivo leído. Al cerrar el generador se terminan los procesos.
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault('peak_file_size', 0)
+    pending = range(file_index, len(files))
+    slots = min(workers, len(pending))
+    if not slots:
+        return
+    package = parse_worker.load_tools_package()
+    context = multiprocessing.get_context('spawn')
+    queues = [context.Queue(RESULT_QUEUE_SIZE) for _slot in range(slots)]
+    pool = context.Pool(slots, initializer=runpy.run_path,
+                        initargs=(parse_worker.__file__, {'worker_queues': queues}))
+
+    def submit(index):
+        file_name, path, member = files[index]
+        skip = row_index if index == file_index else 0
+        return pool.apply_async(package.parallel_parse.parse_file,
+                                (index % slots, file_name, path, member, skip))
+
+    try:
+        tasks = {index: submit(index) for index in pending[:slots]}
+        for index in pending:
+            file_name = files[index][0]
+            results = queues[index % slots]
+            task = tasks.pop(index)
+            number = row_index if index == file_index else 0
+            while True:
+                kind, payload = _next_message(results, task, file_name)
+                if kind == 'rows':
+                    for row in payload:
+                        yield index, number, row
+                        number += 1
+                elif kind == 'size':
+                    stats['peak_file_size'] = max(stats['peak_file_size'], payload)
+                elif kind == 'error':
+                    raise ParseWorkerError(payload[0]) from _RemoteTraceback(payload[1])
+                else:
+                    break
+            # La cola de este archivo queda libre para el siguiente de la ventana
+            if index + slots < len(files):
+                tasks[index + slots] = submit(index + slots)
+    finally:
+        pool.terminate()
+        pool.join()
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""Arranque de los procesos de parseo de parallel_parse.
+
+Cada proceso hijo ejecuta este archivo con ``runpy.run_path``, antes de
+recibir tareas. El archivo carga el paquete tools por su ruta, bajo
+TOOLS_PACKAGE, sin importar Odoo, y entrega al paquete las colas de
+resultados que recibe en ``worker_queues``. No usa importaciones relativas,
+así que también puede ejecutarse fuera del paquete.
+"""
+import importlib.util
+import os
+import sys
+
+# Nombre con el que el proceso padre y los hijos cargan el paquete tools
+TOOLS_PACKAGE = 'hr_attendance_compliance_v18_tools'
+
+
+def load_tools_package():
+    """Paquete tools cargado por su ruta bajo TOOLS_PACKAGE, sin importar Odoo"""
+    package = sys.modules.get(TOOLS_PACKAGE)
+    if package is None:
+        tools_dir = os.path.dirname(os.path.abspath(__file__))
+        spec = importlib.util.spec_from_file_location(
+            TOOLS_PACKAGE, os.path.join(tools_dir, '__init__.py'), submodule_search_locations=[tools_dir])
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[TOOLS_PACKAGE] = package
+        try:
+            spec.loader.exec_module(package)
+        except BaseException:
+            del sys.modules[TOOLS_PACKAGE]
+            raise
+    return package
+
+
+if __name__ == '<run_path>':
+    load_tools_package().parallel_parse.init_worker(globals()['worker_queues'])
\ No newline at end of file
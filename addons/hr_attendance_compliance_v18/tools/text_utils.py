@@ -0,0 +1,13 @@
+"""Normalización de nombres para comparar empleados entre archivos y terminales."""
+import functools
+import unicodedata
+
+
+@functools.lru_cache(maxsize=16384)
+def normalize_name(name):
+    """'  José  PÉREZ ' -> 'jose perez': sin acentos, en minúsculas y con espacios simples"""
+    if not name:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""Conversión de horas en texto a minutos desde medianoche."""
+import functools
+import re
+
+# Valor almacenado cuando no hay hora o no se puede interpretar
+NO_TIME = -1
+
+_TIME_RE = re.compile(r'^\s*(\d{1,2}):(\d{2})(?::\d{2})?\s*(AM|PM)?\s*$', re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_minutes(time_str):
+    """Convierte '9:00 AM', '09:45' o '21:05:00' en minutos desde medianoche.
+
+    Devuelve NO_TIME si el texto está vacío o no es una hora válida. El
+    resultado se memoiza: los archivos de asistencia repiten pocas horas
+    distintas.
+    """
+    if not time_str:
+        return NO_TIME
+    match = _TIME_RE.match(time_str)
+    if not match:
+        return NO_TIME
+    hours, minutes, period = match.groups()
+    hours, minutes = int(hours), int(minutes)
+    if period:
+        period = period.upper()
+        if hours > 12:
+            return NO_TIME
+        if period == 'PM' and hours != 12:
+            hours += 12
+        elif period == 'AM' and hours == 12:
+            hours = 0
+    if hours > 23 or minutes > 59:
+        return NO_TIME
+    return hours * 60 + minutes
+
+
+def format_minutes(minutes):
+    """Minutos desde medianoche a 'HH:MM' (False si no hay hora)"""
+    if minutes is None or minutes < 0:
+        return False
+    return '%02d:%02d' % divmod(minutes, 60)
@@ -0,0 +1,165 @@
+"""Lectura del registro de marcas de terminales ZK.
+
+Estas clases no dependen del ORM. ``connect`` devuelve una conexión que se
+usa como gestor de contexto y ofrece:
+
+- ``record_count()``: número de marcas almacenadas en el terminal, para
+  saltarse la descarga cuando no hay marcas nuevas;
+- ``iter_punches(since)``: marcas (Punch) posteriores a ``since``.
+
+El protocolo 'zk' usa la librería opcional pyzk; 'simulator' habla JSON por
+HTTP con el simulador de benchmarks/zk_simulator.py. Los endpoints 'http'
+(servidores con /zk/ping) sólo se monitorizan con ``probe``.
+"""
+import collections
+import json
+import socket
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Hilos máximos para comprobar endpoints en paralelo
+PROBE_MAX_WORKERS = 32
+
+# Marca de un terminal: código de usuario del terminal y fecha/hora local
+Punch = collections.namedtuple('Punch', ['user_id', 'timestamp'])
+
+
+class ZkClientError(Exception):
+    """Error de comunicación con el terminal"""
+
+
+def connect(protocol, host, port, password=0, timeout=10):
+    if protocol == 'simulator':
+        return SimulatorConnection(host, port, timeout)
+    if protocol == 'http':
+        raise ZkClientError('Los endpoints HTTP no admiten descarga de marcas.')
+    return PyZkConnection(host, port, password, timeout)
+
+
+def probe(protocol, host, port, timeout=3):
+    """Comprueba si un terminal o endpoint responde.
+
+    Devuelve ``(ok, latencia en ms, mensaje)``. Para 'http' prueba /zk/ping y
+    después /web/webclient/version_info; para 'zk' basta con abrir el puerto.
+    """
+    start = time.perf_counter()
+    try:
+        if protocol == 'http':
+            message = _probe_http(host, port, timeout)
+        elif protocol == 'simulator':
+            message = '%s marcas' % SimulatorConnection(host, port, timeout).record_count()
+        else:
+            with socket.create_connection((host, port), timeout=timeout):
+                message = 'Puerto abierto'
+    except (OSError, ZkClientError) as e:
+        return False, None, str(e)
+    return True, int((time.perf_counter() - start) * 1000), message
+
+
+def _probe_http(host, port, timeout):
+    error = None
+    for path in ('/zk/ping', '/web/webclient/version_info'):
+        url = 'http://%s:%s%s' % (host, port, path)
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                if response.status == 200:
+                    return 'OK %s' % path
+        except OSError as e:
+            error = e
+    raise ZkClientError('Sin respuesta en /zk/ping ni /web/webclient/version_info: %s' % error)
+
+
+def probe_many(targets, timeout=3, max_workers=PROBE_MAX_WORKERS):
+    """Comprueba varios endpoints a la vez.
+
+    ``targets`` es un dict {clave: (protocolo, host, puerto)}; devuelve
+    {clave: (ok, latencia en ms, mensaje)}. El tiempo total es el del
+    endpoint más lento, no la suma.
+    """
+    if not targets:
+        return {}
+    keys = list(targets)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as executor:
+        results = executor.map(lambda key: probe(*targets[key], timeout=timeout), keys)
+        return dict(zip(keys, results))
+
+
+class PyZkConnection:
+    """Conexión a un terminal ZKTeco mediante pyzk.
+
+    El terminal se deshabilita mientras se lee para que no registre marcas a
+    mitad de la descarga.
+    """
+
+    def __init__(self, host, port, password=0, timeout=10):
+        self.host = host
+        self.port = port
+        self.password = password or 0
+        self.timeout = timeout
+        self._conn = None
+
+    def __enter__(self):
+        try:
+            from zk import ZK
+        except ImportError:
+            raise ZkClientError('La librería pyzk no está instalada. Instálela con: pip install pyzk')
+        try:
+            self._conn = ZK(self.host, port=self.port, timeout=self.timeout,
+                            password=self.password, ommit_ping=True).connect()
+            self._conn.disable_device()
+        except Exception as e:
+            raise ZkClientError('No se pudo conectar a %s:%s: %s' % (self.host, self.port, e))
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._conn:
+            try:
+                self._conn.enable_device()
+            finally:
+                self._conn.disconnect()
+                self._conn = None
+
+    def record_count(self):
+        self._conn.read_sizes()
+        return self._conn.records
+
+    def iter_punches(self, since=None):
+        # El protocolo no permite filtrar en el terminal: se descarta lo ya leído
+        for attendance in self._conn.get_attendance():
+            if since is None or attendance.timestamp > since:
+                yield Punch(str(attendance.user_id), attendance.timestamp)
+
+
+class SimulatorConnection:
+    """Conexión al simulador local de terminales (JSON por HTTP)"""
+
+    def __init__(self, host, port, timeout=10):
+        self.base_url = 'http://%s:%s' % (host, port)
+        self.timeout = timeout
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+    def _get(self, path, **params):
+        url = self.base_url + path
+        if params:
+            url += '?' + urllib.parse.urlencode(params)
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                return json.load(response)
+        except (OSError, ValueError) as e:
+            raise ZkClientError('No se pudo leer %s: %s' % (url, e))
+
+    def record_count(self):
+        return self._get('/count')['records']
+
+    def iter_punches(self, since=None):
+        params = {'since': since.isoformat()} if since else {}
+        for punch in self._get('/attendance', **params):
+            yield Punch(str(punch['user_id']), datetime.fromisoformat(punch['timestamp']))
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""Parser de una sola pasada para el "Reporte de Eventos de Asistencia" de ZK.
+
+El reporte se compone de uno o varios bloques::
+
+    Reporte de Eventos de Asistencia
+    Periodo:  2025-10-01 ~ 2025-10-14
+    1,2,3,4,5,6,7,8,9,10,11,12,13,14
+    ID:,,40213980390,Nombre:,,Sandro,Departamento:,,Ventas
+    09:45 18:02,10:02,,...
+
+Cada línea ``Periodo:`` abre un bloque nuevo; la fila de números de día (si
+existe) fija la fecha de cada columna y cada encabezado de empleado va
+seguido de la fila con sus marcas. El parser recorre las filas una sola vez y
+produce registros tipados (``date`` y minutos enteros).
+"""
+import collections
+import re
+from datetime import date, timedelta
+
+from .time_utils import NO_TIME
+
+_PERIOD_RE = re.compile(r'Periodo:\s*,*\s*(\d{4})-(\d{2})-(\d{2})\s*,*\s*~\s*,*\s*(\d{4})-(\d{2})-(\d{2})')
+_EMPLOYEE_RE = re.compile(
+    r'ID:[\s,]*(?P<code>.*?)[\s,]*Nombre:[\s,]*(?P<name>.*?)[\s,]*'
+    r'(?:Departamento:[\s,]*(?P<department>.*?)[\s,]*)?$')
+_PUNCH_RE = re.compile(r'\d{2}:\d{2}')
+# 'HH:MM' -> minutos, para las 1440 horas válidas del día
+MINUTES = {'%02d:%02d' % divmod(minute, 60): minute for minute in range(24 * 60)}
+# Celda sin marcas válidas
+EMPTY_CELL = (NO_TIME, NO_TIME, 0, ())
+
+# Un día de un empleado: first/last_minute son minutos desde medianoche (NO_TIME sin
+# marcas válidas), punches el número de marcas válidas y minutes, sus minutos
+ZkDay = collections.namedtuple('ZkDay', [
+    'code', 'name', 'department', 'date', 'first_minute', 'last_minute', 'punches', 'minutes',
+])
+
+
+class ZkReportError(ValueError):
+    """El archivo no tiene la estructura esperada del reporte"""
+
+
+def parse_cell(cell):
+    """(primer minuto, último minuto, número de marcas, minutos) de una celda de marcas.
+
+    Las marcas que no son horas válidas ('25:00') se descartan. Las celdas de
+    una o dos marcas ('09:45', '09:4518:02', '09:45 18:02'), las más
+    frecuentes, se resuelven sin expresión regular.
+    """
+    size = len(cell)
+    if size == 5:
+        minute = MINUTES.get(cell)
+        return EMPTY_CELL if minute is None else (minute, minute, 1, (minute,))
+    if (size == 10 or size == 11 and cell[5] == ' ') and cell[2] == ':' and cell[-3] == ':':
+        first, last = MINUTES.get(cell[:5]), MINUTES.get(cell[-5:])
+        if first is not None and last is not None:
+            return first, last, 2, (first, last)
+    minutes = tuple(map(MINUTES.get, _PUNCH_RE.findall(cell)))
+    if None in minutes:
+        minutes = tuple(minute for minute in minutes if minute is not None)
+    if not minutes:
+        return EMPTY_CELL
+    return minutes[0], minutes[-1], len(minutes), minutes
+
+
+def _period_dates(match):
+    y1, m1, d1, y2, m2, d2 = map(int, match.groups())
+    start, end = date(y1, m1, d1), date(y2, m2, d2)
+    if end < start:
+        raise ZkReportError('Periodo inválido: %s ~ %s' % (start, end))
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def _column_dates(day_numbers, dates):
+    """Asigna una fecha del periodo a cada columna de la fila de números de día.
+
+    Los números se recorren junto al periodo, de modo que una columna que
+    falta en el reporte no desplaza las siguientes.
+    """
+    columns = []
+    position = 0
+    for number in day_numbers:
+        while position < len(dates) and dates[position].day != number:
+            position += 1
+        if position == len(dates):
+            break
+        columns.append(dates[position])
+        position += 1
+    return columns
+
+
+def _day_numbers(row):
+    """Números de día de una fila '1,2,3,...' o None si la fila no lo es"""
+    numbers = []
+    for cell in row:
+        cell = cell.strip()
+        if not cell:
+            continue
+        if not cell.isdigit():
+            return None
+        numbers.append(int(cell))
+    return numbers or None
+
+
+def iter_report_blocks(rows):
+    """Produce ``((código, nombre, departamento), fechas, celdas)`` por empleado.
+
+    ``rows`` es un iterable de listas de celdas de texto y se consume una sola
+    vez; ``celdas`` es la fila de marcas del empleado, alineada con
+    ``fechas``. Los encabezados se reconocen por su primera celda no vacía, así
+    que las filas de marcas no se examinan. Lanza ZkReportError si hay
+    empleados fuera de un bloque con periodo o un encabezado de empleado que
+    no sigue el orden ID, Nombre, Departamento.
+    """
+    dates = period = None
+    employee = None
+    for row in rows:
+        if employee is not None:
+            yield employee, dates, row
+            employee = None
+            continue
+
+        first = next((cell for cell in row if cell and not cell.isspace()), '').lstrip()
+        if first.startswith(('ID:', 'Nombre:')):
+            line = ','.join(row)
+            if dates is None:
+                raise ZkReportError('Empleado sin periodo: falta la línea "Periodo:" del reporte.')
+            match = _EMPLOYEE_RE.search(line)
+            if not match:
+                raise ZkReportError('Encabezado de empleado no reconocido: %s' % line.strip(','))
+            employee = (
+                match.group('code') or 'N/A',
+                match.group('name') or 'Sin Nombre',
+                match.group('department') or 'N/A',
+            )
+        elif first.startswith('Periodo:'):
+            line = ','.join(row)
+            match = _PERIOD_RE.search(line)
+            if not match:
+                raise ZkReportError('Línea de periodo no reconocida: %s' % line.strip(','))
+            dates = period = _period_dates(match)
+        elif dates is not None and dates is period:
+            # La fila de números de día sólo aparece tras el periodo
+            numbers = _day_numbers(row)
+            if numbers:
+                dates = _column_dates(numbers, period)
+
+
+def iter_report_days(rows):
+    """Produce un ZkDay por empleado y día del reporte (ver iter_report_blocks)"""
+    make_day = ZkDay._make
+    for employee, dates, cells in iter_report_blocks(rows):
+        for day, cell in zip(dates, cells):
+            yield make_day(employee + (day,) + (parse_cell(cell) if cell else EMPTY_CELL))
\ No newline at end of file
@@ -1 +1,3 @@
-from . import import_attendance_wizard
\ No newline at end of file
+from . import export_attendance_wizard
+from . import import_attendance_wizard
+from . import propagate_schedule_wizard
\ No newline at end of file
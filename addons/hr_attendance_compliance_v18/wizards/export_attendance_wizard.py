@@ -0,0 +1,40 @@
+from urllib.parse import urlencode
+
+from odoo import models, fields, _
+from odoo.exceptions import UserError
+
+
+class ExportAttendanceWizard(models.TransientModel):
+    _name = 'hr.attendance.export.wizard'
+    _description = 'Exportar Reportes de Asistencia'
+
+    export_type = fields.Selection([
+        ('report', 'Registros Diarios'),
+        ('summary', 'Resúmenes de Cumplimiento'),
+    ], string='Exportar', required=True, default='report')
+    file_format = fields.Selection([
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel (XLSX)'),
+    ], string='Formato', required=True, default='csv')
+    date_from = fields.Date(string='Fecha Desde', required=True,
+                            default=lambda self: fields.Date.context_today(self).replace(day=1))
+    date_to = fields.Date(string='Fecha Hasta', required=True, default=fields.Date.context_today)
+
+    def action_export(self):
+        """Descarga el archivo desde /zk/export, que lo genera por lotes"""
+        self.ensure_one()
+        if self.date_to < self.date_from:
+            raise UserError(_('La fecha hasta debe ser mayor o igual que la fecha desde.'))
+        if self.file_format == 'xlsx':
+            self.env['import.attendance.wizard']._check_excel_support()
+        query = urlencode({
+            'file_format': self.file_format,
+            'company_id': self.env.company.id,
+            'date_from': fields.Date.to_string(self.date_from),
+            'date_to': fields.Date.to_string(self.date_to),
+        })
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/zk/export/%s?%s' % (self.export_type, query),
+            'target': 'self',
+        }
\ No newline at end of file
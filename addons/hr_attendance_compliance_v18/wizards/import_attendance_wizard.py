@@ -1,22 +1,31 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
-import base64
-import csv
-import io
-import re
 from datetime import datetime, timedelta
+import itertools
+import time
+
+from ..tools import import_readers
+from ..tools.time_utils import format_minutes
+
+IMPORT_BATCH_SIZE = 1000
 
 
 class ImportAttendanceWizard(models.TransientModel):
     _name = 'import.attendance.wizard'
     _description = 'Asistente de Importación de Asistencia'
 
-    file_data = fields.Binary(string='Archivo CSV/Excel', required=True)
+    file_data = fields.Binary(string='Archivo CSV/Excel/ZIP')
     file_name = fields.Char(string='Nombre del Archivo')
     file_type = fields.Selection([
         ('csv', 'CSV'),
         ('excel', 'Excel'),
+        ('zip', 'ZIP'),
     ], string='Tipo de Archivo', compute='_compute_file_type')
+    attachment_ids = fields.Many2many('ir.attachment', string='Archivos',
+                                      help='Varios archivos (por ejemplo, uno por sucursal) o archivos zip '
+                                           'que se importan juntos en un solo trabajo.')
+    force_reimport = fields.Boolean(string='Forzar reimportación',
+                                    help='Procesar el archivo aunque ya se haya importado uno idéntico.')
     # Parámetros de conexión al servidor (para pruebas de conectividad)
     @api.model
     def _get_default_zk_ip(self):
@@ -41,407 +50,254 @@ class ImportAttendanceWizard(models.TransientModel):
     @api.depends('file_name')
     def _compute_file_type(self):
         for record in self:
-            if record.file_name:
-                if record.file_name.lower().endswith(('.xlsx', '.xls')):
-                    record.file_type = 'excel'
-                else:
-                    record.file_type = 'csv'
-            else:
-                record.file_type = 'csv'
+            record.file_type = import_readers.file_kind(record.file_name)
 
     def action_import(self):
-        """Procesa el archivo y crea los registros de asistencia"""
+        """Encola los archivos en un trabajo de importación en segundo plano"""
         self.ensure_one()
         
-        if not self.file_data:
+        if not self.file_data and not self.attachment_ids:
             raise UserError(_('Debe cargar un archivo.'))
         
-        try:
-            if self.file_type == 'excel':
-                data = self._process_excel_file()
-            else:
-                data = self._process_csv_file()
-            
-            if not data:
-                raise UserError(_('El archivo no contiene datos válidos.'))
-            
-            # Crear registros de asistencia
-            created_records = self._create_attendance_records(data)
-            
-            # Generar resúmenes
-            self._generate_summaries(data)
-            
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': _('Importación Exitosa'),
-                    'message': _('Se importaron %s registros de asistencia.') % len(created_records),
-                    'type': 'success',
-                    'sticky': False,
-                }
-            }
-        except Exception as e:
-            raise UserError(_('Error al procesar el archivo: %s') % str(e))
-
-    def action_check_connection(self):
-        """Verifica conectividad al endpoint del servidor (por ejemplo /zk/ping)"""
-        self.ensure_one()
-        ip = (self.zk_ip or 'localhost').strip()
-        port = int(self.zk_port or 9095)
-        ping_url = f"http://{ip}:{port}/zk/ping"
-        version_url = f"http://{ip}:{port}/web/webclient/version_info"
-
-        # Intento 1: /zk/ping
-        try:
-            try:
-                import requests
-            except ImportError:
-                requests = None
-            if requests:
-                resp = requests.get(ping_url, timeout=3)
-                if resp.status_code == 200:
-                    msg = _('Conexión OK al endpoint: %s') % ping_url
-                    return {
-                        'type': 'ir.actions.client',
-                        'tag': 'display_notification',
-                        'params': {
-                            'title': _('Conectado'),
-                            'message': msg,
-                            'type': 'success',
-                            'sticky': False,
-                        }
-                    }
-                else:
-                    raise UserError(_('HTTP %s en %s') % (resp.status_code, ping_url))
-            else:
-                # Fallback a urllib si requests no está disponible
-                import urllib.request
-                with urllib.request.urlopen(ping_url, timeout=3) as resp:
-                    if resp.status == 200:
-                        msg = _('Conexión OK al endpoint: %s') % ping_url
-                        return {
-                            'type': 'ir.actions.client',
-                            'tag': 'display_notification',
-                            'params': {
-                                'title': _('Conectado'),
-                                'message': msg,
-                                'type': 'success',
-                                'sticky': False,
-                            }
-                        }
-        except Exception:
-            # Intento 2: versión de Odoo
-            try:
-                if requests:
-                    resp2 = requests.get(version_url, timeout=3)
-                    if resp2.status_code == 200:
-                        return {
-                            'type': 'ir.actions.client',
-                            'tag': 'display_notification',
-                            'params': {
-                                'title': _('Conectado (versión)'),
-                                'message': _('El servidor respondió: %s') % version_url,
-                                'type': 'success',
-                                'sticky': False,
-                            }
-                        }
-                else:
-                    import urllib.request
-                    with urllib.request.urlopen(version_url, timeout=3) as resp2:
-                        if resp2.status == 200:
-                            return {
-                                'type': 'ir.actions.client',
-                                'tag': 'display_notification',
-                                'params': {
-                                    'title': _('Conectado (versión)'),
-                                    'message': _('El servidor respondió: %s') % version_url,
-                                    'type': 'success',
-                                    'sticky': False,
-                                }
-                            }
-            except Exception as e2:
+        Job = self.env['hr.attendance.import.job']
+        fingerprints = [import_readers.file_fingerprint(attachment.datas) for attachment in self.attachment_ids]
+        if self.file_data:
+            fingerprints.append(import_readers.file_fingerprint(self.file_data))
+        file_hash = fingerprints[0] if len(fingerprints) == 1 else import_readers.combined_fingerprint(fingerprints)
+        if not self.force_reimport:
+            previous = Job.search([
+                ('file_hash', '=', file_hash),
+                ('company_id', '=', self.env.company.id),
+                ('state', 'in', ('queued', 'running', 'done')),
+            ], limit=1)
+            if previous.state == 'done':
                 return {
                     'type': 'ir.actions.client',
                     'tag': 'display_notification',
                     'params': {
-                        'title': _('Sin conexión'),
-                        'message': _('No se pudo conectar a %s ni %s. Detalle: %s') % (ping_url, version_url, str(e2)),
-                        'type': 'danger',
+                        'title': _('Archivo ya importado'),
+                        'message': _('Este archivo ya se importó el %s (%s registros). Marque "Forzar reimportación" para procesarlo de nuevo.') % (
+                            previous.date_finished, previous.records_count),
+                        'type': 'warning',
                         'sticky': False,
                     }
                 }
-    
-    def _decode_bytes(self, data_bytes):
-        """Decodifica bytes a texto probando encodings comunes (UTF-8, latin-1, cp1252)."""
-        for enc in ('utf-8', 'utf-8-sig', 'latin-1', 'cp1252'):
-            try:
-                return data_bytes.decode(enc)
-            except UnicodeDecodeError:
+            elif previous:
+                return previous.action_open_form()
+
+        job = Job.create({
+            'file_data': self.file_data,
+            'file_name': self.file_name,
+            'attachment_ids': [(6, 0, self.attachment_ids.ids)],
+            'file_hash': file_hash,
+            'company_id': self.env.company.id,
+        })
+        self.attachment_ids.write({'res_model': Job._name, 'res_id': job.id})
+        job._trigger_processing()
+        return job.action_open_form()
+
+    def _iter_import_rows(self, sources, file_index=0, row_index=0, stats=None):
+        """Filas normalizadas de varios archivos (pares (nombre, cargador del contenido)).
+
+        Produce tuplas (índice de archivo, índice de fila en el archivo, fila).
+        Los zip se expanden de forma perezosa y cada archivo se lee en
+        streaming, uno tras otro, así que en memoria hay un solo archivo a la
+        vez. Para reanudar, los archivos anteriores a ``file_index`` se omiten
+        sin leerlos y del archivo ``file_index`` se saltan ``row_index`` filas.
+        Si se pasa ``stats``, acumula los segundos de lectura de los archivos
+        ('time_decode': adjuntos y miembros de zip) y el tamaño en bytes del
+        mayor archivo retenido ('peak_file_size').
+        """
+        if stats is None:
+            stats = {}
+        stats.setdefault('time_decode', 0)
+        stats.setdefault('peak_file_size', 0)
+        files = enumerate(import_readers.iter_source_files(sources))
+        while True:
+            start = time.perf_counter()
+            index, (file_name, load) = next(files, (None, (None, None)))
+            if index is None:
+                stats['time_decode'] += time.perf_counter() - start
+                return
+            if index < file_index:
+                stats['time_decode'] += time.perf_counter() - start
                 continue
-        # Último recurso: ignorar caracteres inválidos
-        return data_bytes.decode('utf-8', errors='ignore')
-
-    def _process_csv_file(self):
-        """Procesa un archivo CSV con tolerancia de encoding y delimitador."""
-        data_bytes = base64.b64decode(self.file_data)
-        file_content = self._decode_bytes(data_bytes)
-        lines = file_content.splitlines()
-        if not lines:
-            return []
-        header = lines[0] if lines else ''
-        if 'Reporte de Eventos de Asistencia' in header:
-            return self._parse_attendance_report(lines)
+            if import_readers.file_kind(file_name) == 'excel':
+                self._check_excel_support()
+            data = load()
+            stats['time_decode'] += time.perf_counter() - start
+            stats['peak_file_size'] = max(stats['peak_file_size'], len(data))
+            skip = row_index if index == file_index else 0
+            rows = itertools.islice(import_readers.iter_file_rows(file_name, data), skip, None)
+            del data
+            for number, row in enumerate(rows, skip):
+                yield index, number, row
+
+    def action_check_connection(self):
+        """Muestra el último estado conocido del endpoint del servidor (por ejemplo /zk/ping).
+
+        El estado lo actualiza en segundo plano el cron de monitorización de
+        terminales, así que la respuesta es inmediata.
+        """
+        self.ensure_one()
+        host = (self.zk_ip or 'localhost').strip()
+        port = int(self.zk_port or 9095)
+        endpoint = self.env['hr.attendance.zk.device']._get_http_endpoint(host, port)
+        if endpoint.health_status == 'online':
+            title, notification_type = _('Conectado'), 'success'
+            message = _('%s respondió en %s ms (comprobado el %s).') % (
+                endpoint.name, endpoint.health_latency, endpoint.health_checked)
+        elif endpoint.health_status == 'offline':
+            title, notification_type = _('Sin conexión'), 'danger'
+            message = _('No se pudo conectar a %s (comprobado el %s). Detalle: %s') % (
+                endpoint.name, endpoint.health_checked, endpoint.health_message)
         else:
-            return self._parse_standard_csv(lines)
-
-    def _parse_standard_csv(self, lines):
-        """Parsea CSV estándar tolerando ',' o ';' como delimitador."""
-        if len(lines) < 2:
-            return []
-        header_line = lines[0]
-        delimiter = ';' if header_line.count(';') > header_line.count(',') else ','
-        reader = csv.DictReader(io.StringIO('\n'.join(lines)), delimiter=delimiter)
-        data = []
-        for row in reader:
-            normalized_row = {}
-            for key, value in row.items():
-                key_lower = (key or '').lower().strip()
-                if 'nombre' in key_lower:
-                    normalized_row['nombre'] = value
-                elif 'id' in key_lower or 'cedula' in key_lower:
-                    normalized_row['id'] = value
-                elif 'departamento' in key_lower or 'area' in key_lower:
-                    normalized_row['departamento'] = value
-                elif 'fecha' in key_lower:
-                    normalized_row['fecha'] = value
-                elif 'asist' in key_lower:
-                    normalized_row['asistio'] = value
-                elif 'entrada' in key_lower and 'hora' in key_lower:
-                    normalized_row['hora_entrada'] = value
-                elif 'retraso' in key_lower:
-                    normalized_row['minutos_retraso'] = value
-                elif 'salida' in key_lower and 'temprana' in key_lower:
-                    normalized_row['minutos_salida_temprana'] = value
-                elif 'primera' in key_lower and 'entrada' in key_lower:
-                    normalized_row['primera_entrada'] = value
-                elif 'ultima' in key_lower and 'salida' in key_lower:
-                    normalized_row['ultima_salida'] = value
-            if (normalized_row.get('nombre') and normalized_row.get('fecha')):
-                data.append(normalized_row)
-        return data
-
-    def _process_excel_file(self):
-        """Procesa un archivo Excel"""
+            title, notification_type = _('Comprobación pendiente'), 'info'
+            message = _('El estado de %s se está comprobando; vuelva a consultar en unos segundos.') % endpoint.name
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': title,
+                'message': message,
+                'type': notification_type,
+                'sticky': False,
+            }
+        }
+
+    @api.model
+    def _check_excel_support(self):
         try:
-            import openpyxl
-            file_content = base64.b64decode(self.file_data)
-            workbook = openpyxl.load_workbook(io.BytesIO(file_content))
-            
-            all_data = []
-            for sheet in workbook.worksheets:
-                # Convertir hoja a CSV
-                csv_data = []
-                for row in sheet.iter_rows(values_only=True):
-                    csv_data.append(','.join([str(cell) if cell is not None else '' for cell in row]))
-                
-                if csv_data and 'Reporte de Eventos de Asistencia' in csv_data[0]:
-                    all_data.extend(self._parse_attendance_report(csv_data))
-                elif csv_data:
-                    all_data.extend(self._parse_standard_csv(csv_data))
-            
-            return all_data
+            import openpyxl  # noqa: F401
         except ImportError:
             raise UserError(_('La librería openpyxl no está instalada. Instálela con: pip install openpyxl'))
 
+    def _employee_key(self, row):
+        """Clave de empleado de una fila: (nombre, identificación)"""
+        return (import_readers.to_text(row.get('nombre')).strip(), import_readers.to_text(row.get('id')).strip())
 
-    def _parse_attendance_report(self, lines):
-        """Parsea reporte de eventos de asistencia"""
-        data = []
-        period_start = None
-        period_end = None
-        
-        # Extraer periodo
-        for line in lines:
-            if 'Periodo:' in line:
-                match = re.search(r'(\d{4}-\d{2}-\d{2})\s*~\s*(\d{4}-\d{2}-\d{2})', line)
-                if match:
-                    period_start = match.group(1)
-                    period_end = match.group(2)
-                    break
-        
-        if not period_start or not period_end:
-            # Usar fechas por defecto
-            period_end = datetime.now().date()
-            period_start = period_end - timedelta(days=14)
-            period_start = period_start.strftime('%Y-%m-%d')
-            period_end = period_end.strftime('%Y-%m-%d')
-        
-        dates = self._generate_date_range(period_start, period_end)
-        
-        # Procesar empleados
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            
-            if 'ID:' in line and 'Nombre:' in line:
-                parts = line.split(',')
-                employee_id = parts[2].strip() if len(parts) > 2 else 'N/A'
-                
-                name_idx = next((idx for idx, p in enumerate(parts) if 'Nombre:' in p), None)
-                name = parts[name_idx + 2].strip() if name_idx and len(parts) > name_idx + 2 else 'Sin Nombre'
-                
-                dept_idx = next((idx for idx, p in enumerate(parts) if 'Departamento:' in p), None)
-                department = parts[dept_idx + 2].strip() if dept_idx and len(parts) > dept_idx + 2 else 'N/A'
-                
-                # Siguiente línea contiene horarios
-                if i + 1 < len(lines):
-                    times_line = lines[i + 1]
-                    times = times_line.split(',')
-                    
-                    for day_idx, time_str in enumerate(times):
-                        if day_idx >= len(dates):
-                            break
-                        
-                        date = dates[day_idx]
-                        time_str = time_str.strip()
-                        
-                        if time_str:
-                            timestamps = self._extract_timestamps(time_str)
-                            attended = len(timestamps) > 0
-                            first_entry = timestamps[0] if timestamps else None
-                            last_exit = timestamps[-1] if timestamps else None
-                            
-                            data.append({
-                                'nombre': name,
-                                'id': employee_id,
-                                'departamento': department,
-                                'fecha': date,
-                                'asistio': 'Si' if attended else 'No',
-                                'primera_entrada': first_entry,
-                                'ultima_salida': last_exit,
-                                'total_registros': len(timestamps),
-                            })
-                        else:
-                            data.append({
-                                'nombre': name,
-                                'id': employee_id,
-                                'departamento': department,
-                                'fecha': date,
-                                'asistio': 'No',
-                                'primera_entrada': None,
-                                'ultima_salida': None,
-                                'total_registros': 0,
-                            })
-                    
-                    i += 1
-            
-            i += 1
-        
-        return data
+    def _resolve_employees(self, rows, result, stats=None):
+        """Resuelve los empleados de un lote de filas.
 
-    def _generate_date_range(self, start_str, end_str):
-        """Genera rango de fechas"""
-        start = datetime.strptime(start_str, '%Y-%m-%d').date()
-        end = datetime.strptime(end_str, '%Y-%m-%d').date()
-        
-        dates = []
-        current = start
-        while current <= end:
-            dates.append(current.strftime('%Y-%m-%d'))
-            current += timedelta(days=1)
-        
-        return dates
+        Usa el índice de coincidencia cacheado de la compañía (código y nombre
+        sin acentos ni espacios de más) y crea de una vez los empleados que
+        falten. ``result`` es el dict {(nombre, identificación): employee_id}
+        compartido entre lotes y se completa en su lugar;
+        ``stats['employees_created']`` cuenta las altas.
+        """
+        pending = {key for key in map(self._employee_key, rows) if key not in result}
+        if not pending:
+            return result
+        matched, created = self.env['hr.employee']._match_employees(
+            self.env.company.id, pending, create_missing=True)
+        result.update(matched)
+        if stats is not None and created:
+            stats['employees_created'] = stats.get('employees_created', 0) + created
+        return result
 
-    def _extract_timestamps(self, time_str):
-        """Extrae timestamps de una cadena"""
-        pattern = r'\d{2}:\d{2}'
-        return re.findall(pattern, time_str)
+    def _create_attendance_records(self, data, errors=None, stats=None):
+        """Crea o actualiza registros de asistencia en lotes.
 
-    def _create_attendance_records(self, data):
-        """Crea registros de asistencia"""
+        ``data`` puede ser cualquier iterable de filas normalizadas; se consume
+        en lotes de IMPORT_BATCH_SIZE para no materializar el archivo completo.
+        Si se pasa ``errors``, se le añaden tuplas (índice de fila, mensaje)
+        por cada fila descartada. ``stats`` acumula los contadores de
+        hr.attendance.report._bulk_upsert, las filas descartadas ('skipped',
+        'unmatched', 'employees_created') y los segundos de cada fase
+        ('time_match', 'time_resolve', 'time_write'). Las marcas individuales
+        de las filas que las traen ('marcas', en minutos) se guardan en
+        hr.attendance.punch.
+        """
+        if stats is None:
+            stats = {}
+        for counter in ('skipped', 'unmatched', 'time_match', 'time_resolve', 'time_write'):
+            stats.setdefault(counter, 0)
         AttendanceReport = self.env['hr.attendance.report']
-        Employee = self.env['hr.employee']
+        Punch = self.env['hr.attendance.punch']
         Schedule = self.env['hr.attendance.schedule']
+        company_id = self.env.company.id
+
+        # Empleados ya resueltos en esta importación, por (nombre, identificación)
+        employee_map = {}
+
+        # Resolver horas oficiales desde la matriz de horarios cacheada
+        get_official_entry = Schedule._get_schedule_resolver()
+
+        record_ids = []
+        data = enumerate(data)
+        while True:
+            batch = list(itertools.islice(data, IMPORT_BATCH_SIZE))
+            if not batch:
+                break
+
+            # Parsear fechas y descartar filas inválidas
+            rows = []
+            for index, row in batch:
+                date_val = import_readers.to_date(row.get('fecha'))
+                if not date_val:
+                    stats['skipped'] += 1
+                    if errors is not None:
+                        errors.append((index, _('Fecha inválida: %s') % import_readers.to_text(row.get('fecha'))))
+                    continue
+                rows.append((index, row, date_val))
+
+            start = time.perf_counter()
+            self._resolve_employees([row for _index, row, _date in rows], employee_map, stats=stats)
+            stats['time_match'] += time.perf_counter() - start
 
-        # Mapear empleados por nombre o ID
-        employees = {e.name.lower(): e.id for e in Employee.search([])}
-
-        created_records = []
-        for row in data:
-            name = (row.get('nombre') or '').strip()
-            emp_id = None
-
-            # Intentar por nombre
-            if name and name.lower() in employees:
-                emp_id = employees[name.lower()]
-            
-            # Intentar por ID de empleado si disponible
-            if not emp_id and row.get('id'):
-                emp = Employee.search([('identification_id', '=', row['id'])], limit=1)
-                if emp:
-                    emp_id = emp.id
-            
-            # Si no encontramos empleado, saltar
-            if not emp_id:
-                # Crear empleado mínimo si falta (opcional)
-                emp = Employee.search([('name', '=', name)], limit=1)
-                if not emp and name:
-                    emp = Employee.create({'name': name, 'company_id': self.env.company.id})
-                emp_id = emp.id if emp else None
+            start = time.perf_counter()
+            vals_list = []
+            punches = []
+            for index, row, date_val in rows:
+                emp_id = employee_map.get(self._employee_key(row))
                 if not emp_id:
+                    stats['unmatched'] += 1
+                    if errors is not None:
+                        errors.append((index, _('No se pudo identificar al empleado.')))
                     continue
 
-            # Parsear fecha
-            date_str = row.get('fecha')
-            try:
-                date_val = datetime.strptime(date_str, '%Y-%m-%d').date()
-            except Exception:
-                continue
+                attended = row.get('asistio')
+                if not isinstance(attended, bool):
+                    attended = import_readers.to_text(attended).strip().lower() in ['si', 'sí', 'true', '1']
+                if 'primera_entrada_min' in row:
+                    # Reporte de eventos: horas ya en minutos
+                    first_entry = format_minutes(row['primera_entrada_min'])
+                    last_exit = format_minutes(row['ultima_salida_min'])
+                else:
+                    first_entry = (import_readers.to_time_text(row.get('primera_entrada'))
+                                   or import_readers.to_time_text(row.get('hora_entrada')))
+                    last_exit = import_readers.to_time_text(row.get('ultima_salida'))
+                total_records = int(row.get('total_registros') or 0)
+                if row.get('marcas'):
+                    day_start = datetime.combine(date_val, datetime.min.time())
+                    punches.extend((emp_id, day_start + timedelta(minutes=minute)) for minute in row['marcas'])
 
-            # Obtener hora oficial del horario personalizado
-            official_entry = Schedule.get_official_entry(emp_id, date_val)
-
-            attended = (row.get('asistio') or '').strip().lower() in ['si', 'sí', 'true', '1']
-            first_entry = (row.get('primera_entrada') or '').strip() or (row.get('hora_entrada') or '').strip()
-            last_exit = (row.get('ultima_salida') or '').strip()
-            total_records = int(row.get('total_registros') or 0)
-
-            record = AttendanceReport.create({
-                'employee_id': emp_id,
-                'date': date_val,
-                'attended': attended,
-                'first_entry': first_entry or False,
-                'last_exit': last_exit or False,
-                'total_records': total_records,
-                'official_entry_time': official_entry,
-                'company_id': self.env.company.id,
-            })
-            created_records.append(record)
-
-        return created_records
-
-    def _generate_summaries(self, data):
-        """Genera resúmenes por empleado según el rango en datos"""
-        Summary = self.env['hr.attendance.report.summary']
-        
-        # Agrupar por empleado y rango min/max de fechas
-        by_employee = {}
-        for row in data:
-            name = (row.get('nombre') or '').strip()
-            date_str = row.get('fecha')
-            if not name or not date_str:
-                continue
-            by_employee.setdefault(name, {'min': None, 'max': None})
-            date_val = datetime.strptime(date_str, '%Y-%m-%d').date()
-            if by_employee[name]['min'] is None or date_val < by_employee[name]['min']:
-                by_employee[name]['min'] = date_val
-            if by_employee[name]['max'] is None or date_val > by_employee[name]['max']:
-                by_employee[name]['max'] = date_val
-        
-        Employee = self.env['hr.employee']
-        for name, rng in by_employee.items():
-            emp = Employee.search([('name', '=', name)], limit=1)
-            if not emp:
-                continue
-            Summary.generate_summary(emp.id, rng['min'], rng['max'])
\ No newline at end of file
+                vals_list.append({
+                    'employee_id': emp_id,
+                    'date': date_val,
+                    'attended': attended,
+                    'first_entry': first_entry or False,
+                    'last_exit': last_exit or False,
+                    'total_records': total_records,
+                    'official_entry_time': get_official_entry(emp_id, date_val),
+                    'company_id': company_id,
+                })
+
+            stats['time_resolve'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            record_ids.extend(AttendanceReport._bulk_upsert(vals_list, stats=stats).ids)
+            Punch._store(company_id, punches, 'import')
+            stats['time_write'] += time.perf_counter() - start
+
+        return AttendanceReport.browse(record_ids)
+
+    def _generate_summaries(self, ranges):
+        """Genera resúmenes por empleado según el rango de fechas importado.
+
+        ``ranges`` es un dict {employee_id: (fecha mínima, fecha máxima)}.
+        """
+        self.env['hr.attendance.report.summary']._generate_summaries_bulk([
+            (employee_id, date_min, date_max)
+            for employee_id, (date_min, date_max) in ranges.items()
+        ])
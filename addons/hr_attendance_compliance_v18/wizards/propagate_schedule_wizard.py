@@ -0,0 +1,45 @@
+from odoo import models, fields, _
+from odoo.exceptions import UserError
+
+
+class PropagateScheduleWizard(models.TransientModel):
+    _name = 'hr.attendance.schedule.propagate.wizard'
+    _description = 'Aplicar Horarios a Registros de Asistencia'
+
+    date_from = fields.Date(string='Fecha Desde')
+    date_to = fields.Date(string='Fecha Hasta')
+    department_id = fields.Many2one('hr.department', string='Departamento')
+    employee_ids = fields.Many2many('hr.employee', string='Empleados',
+                                    help='Vacío: todos los empleados del departamento o de la compañía.')
+
+    def action_propagate(self):
+        """Reescribe la hora oficial de los registros existentes con los horarios vigentes"""
+        self.ensure_one()
+        if self.date_from and self.date_to and self.date_to < self.date_from:
+            raise UserError(_('La fecha hasta debe ser mayor o igual que la fecha desde.'))
+
+        company_id = self.env.company.id
+        employees = self.employee_ids
+        if not employees:
+            domain = [('company_id', 'in', [company_id, False])]
+            if self.department_id:
+                domain.append(('department_id', '=', self.department_id.id))
+            employees = self.env['hr.employee'].search(domain)
+
+        keys = [
+            (employee_id, weekday, company_id)
+            for employee_id in employees.ids
+            for weekday in range(7)
+        ]
+        reports = self.env['hr.attendance.schedule']._propagate_to_reports(keys, self.date_from, self.date_to)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Horarios Aplicados'),
+                'message': _('Se actualizaron %s registros de asistencia.') % len(reports),
+                'type': 'success',
+                'sticky': False,
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }
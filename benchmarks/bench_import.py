@@ -0,0 +1,364 @@
+"""Benchmark del pipeline de importación de asistencia.
+
+Genera un archivo sintético (ver generate_exports.py), lo importa con
+``ImportAttendanceWizard.action_import`` y procesa el trabajo resultante,
+midiendo por separado el tiempo, el pico de memoria y las consultas SQL de
+cada fase: parseo, emparejamiento de empleados, resolución de horarios,
+creación de registros y generación de resúmenes.
+
+Necesita una base de datos PostgreSQL desechable con el módulo instalado (el
+benchmark confirma transacciones y crea una compañía nueva en cada ejecución)::
+
+    odoo-bin -c odoo.conf -d attendance_bench -i hr_attendance_compliance_v18 --stop-after-init
+    python benchmarks/bench_import.py -c odoo.conf -d attendance_bench --employees 500 --days 31
+
+Con ``--parse-only`` sólo se mide el parseo y no hace falta Odoo ni base de
+datos. ``--parse-throughput`` compara el parser actual del Reporte de Eventos
+de Asistencia con el original (legacy_report_parser.py) sobre varios tamaños
+(``--sizes 1000x31,3000x31,500x90``) y termina con código 1 si no lo supera
+en al menos ``--min-speedup`` veces. ``--json`` guarda el resultado y ``--baseline`` lo compara con uno
+anterior: el proceso termina con código 1 si alguna fase empeora más de
+``--tolerance``, para detectar regresiones antes de publicar.
+"""
+import argparse
+import base64
+import collections
+import contextlib
+import importlib.util
+import itertools
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import generate_exports
+import legacy_report_parser
+
+ADDON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'addons', 'hr_attendance_compliance_v18')
+PHASES = ('enqueue', 'parse', 'match', 'schedule', 'write', 'summary')
+# Diferencias por debajo de estos valores no cuentan como regresión
+MIN_SECONDS_DELTA = 0.05
+MIN_QUERIES_DELTA = 5
+
+
+class PhaseRecorder:
+    """Acumula tiempo, consultas SQL y pico de memoria por fase.
+
+    Las fases no se anidan, así que el pico de cada llamada se mide con
+    ``tracemalloc.reset_peak`` respecto de la memoria al empezar la llamada.
+    """
+
+    def __init__(self, cr=None, memory=False):
+        self.cr = cr
+        self.memory = memory
+        self.phases = {name: {'seconds': 0.0, 'calls': 0, 'queries': 0, 'peak_kib': 0} for name in PHASES}
+        self._patched = []
+
+    @contextlib.contextmanager
+    def measure(self, phase):
+        queries = self.cr.sql_log_count if self.cr is not None else 0
+        if self.memory:
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = self.phases[phase]
+            stats['seconds'] += time.perf_counter() - start
+            stats['calls'] += 1
+            if self.cr is not None:
+                stats['queries'] += self.cr.sql_log_count - queries
+            if self.memory:
+                peak = (tracemalloc.get_traced_memory()[1] - current) // 1024
+                stats['peak_kib'] = max(stats['peak_kib'], peak)
+
+    def iterate(self, phase, iterator, batch_size=1000):
+        """Envuelve un iterador perezoso, midiendo la obtención de cada lote de elementos.
+
+        Medir por lotes mantiene despreciable el coste de la propia medición.
+        """
+        iterator = iter(iterator)
+        while True:
+            with self.measure(phase):
+                batch = list(itertools.islice(iterator, batch_size))
+            if not batch:
+                return
+            yield from batch
+
+    def patch(self, cls, name, phase, wrap_result=None):
+        """Sustituye ``cls.name`` por una versión medida en ``phase``"""
+        original = getattr(cls, name)
+        recorder = self
+
+        def measured(*args, **kwargs):
+            with recorder.measure(phase):
+                result = original(*args, **kwargs)
+            return wrap_result(result) if wrap_result else result
+
+        self._patched.append((cls, name, cls.__dict__.get(name)))
+        setattr(cls, name, measured)
+
+    def restore(self):
+        for cls, name, original in reversed(self._patched):
+            if original is None:
+                delattr(cls, name)
+            else:
+                setattr(cls, name, original)
+        self._patched = []
+
+
+def load_tools():
+    """Importa el paquete tools del módulo sin cargar Odoo"""
+    tools_dir = os.path.join(ADDON_DIR, 'tools')
+    spec = importlib.util.spec_from_file_location(
+        'attendance_tools', os.path.join(tools_dir, '__init__.py'), submodule_search_locations=[tools_dir])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_parse_only(file_name, content, recorder):
+    tools = load_tools()
+    rows = 0
+    for name, load in tools.import_readers.iter_source_files([(file_name, lambda: content)]):
+        for _row in recorder.iterate('parse', tools.import_readers.iter_file_rows(name, load())):
+            rows += 1
+    return {'rows': rows}
+
+
+def _count(iterator):
+    """Consume ``iterator`` sin retener sus elementos y devuelve cuántos produjo"""
+    last = collections.deque(zip(itertools.count(1), iterator), maxlen=1)
+    return last[0][0] if last else 0
+
+
+def _best_time(function, repeat):
+    """Menor tiempo de ``repeat`` ejecuciones y el resultado de la última"""
+    best = None
+    for _attempt in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_parse_throughput(args):
+    """Filas por segundo del parser actual y del original para cada tamaño de ``--sizes``.
+
+    El parser actual se mide de punta a punta (contenido binario -> filas
+    tipadas) y el original desde el base64, como lo recibía el asistente.
+    Devuelve la lista de resultados por tamaño.
+    """
+    tools = load_tools()
+    results = []
+    print('%-12s %8s %12s %12s %9s' % ('tamaño', 'filas', 'original s', 'actual s', 'mejora'))
+    for size in args.sizes.split(','):
+        employees, days = map(int, size.lower().split('x'))
+        file_name, content = generate_exports.generate(
+            'zk', employees=employees, days=days, density=args.density, seed=args.seed)
+        file_data = base64.b64encode(content)
+        legacy_seconds, legacy_rows = _best_time(
+            lambda: len(legacy_report_parser.parse_report(file_data)), args.repeat)
+        current_seconds, current_rows = _best_time(
+            lambda: _count(tools.import_readers.iter_file_rows(file_name, content)), args.repeat)
+        if current_rows != legacy_rows:
+            raise SystemExit('%s: el parser actual produjo %s filas y el original %s' % (
+                size, current_rows, legacy_rows))
+        speedup = legacy_seconds / current_seconds
+        print('%-12s %8d %12.3f %12.3f %8.2fx' % (size, current_rows, legacy_seconds, current_seconds, speedup))
+        results.append({
+            'size': size,
+            'rows': current_rows,
+            'legacy_seconds': legacy_seconds,
+            'seconds': current_seconds,
+            'speedup': speedup,
+        })
+    return results
+
+
+def run_pipeline(args, file_name, file_data, recorder):
+    import odoo
+    from odoo import SUPERUSER_ID, api
+
+    odoo.tools.config.parse_config(['-c', args.config] if args.config else [])
+    registry = odoo.modules.registry.Registry(args.database)
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        if 'hr.attendance.import.job' not in env:
+            raise SystemExit('El módulo hr_attendance_compliance_v18 no está instalado en %s' % args.database)
+        recorder.cr = cr
+        company = _prepare_company(env, args)
+        env = env(context=dict(env.context, allowed_company_ids=[company.id]))
+        cr.commit()
+
+        Wizard = type(env['import.attendance.wizard'])
+        recorder.patch(type(env['hr.attendance.import.job']), '_iter_rows', 'parse',
+                       wrap_result=lambda rows: recorder.iterate('parse', rows))
+        recorder.patch(Wizard, '_resolve_employees', 'match')
+        recorder.patch(Wizard, '_generate_summaries', 'summary')
+        recorder.patch(type(env['hr.attendance.schedule']), '_get_schedule_resolver', 'schedule',
+                       wrap_result=lambda resolve: _measured_function(recorder, 'schedule', resolve))
+        recorder.patch(type(env['hr.attendance.report']), '_bulk_upsert', 'write')
+        recorder.patch(type(env['hr.attendance.punch']), '_store', 'write')
+        try:
+            with recorder.measure('enqueue'):
+                wizard = env['import.attendance.wizard'].create({
+                    'file_data': file_data,
+                    'file_name': file_name,
+                    'force_reimport': True,
+                })
+                wizard.action_import()
+                job = env['hr.attendance.import.job'].search([('company_id', '=', company.id)], order='id desc', limit=1)
+            while job.state in ('queued', 'running'):
+                job.with_user(job.create_uid).with_company(company)._process(time.monotonic() + 3600)
+                job.invalidate_recordset()
+        finally:
+            recorder.restore()
+        return {
+            'company_id': company.id,
+            'job_id': job.id,
+            'state': job.state,
+            'rows': job.rows_done,
+            'records': job.records_count,
+            'errors': job.error_count,
+            'message': job.message,
+        }
+
+
+def _measured_function(recorder, phase, function):
+    """Versión medida de una función llamada una vez por fila (sólo tiempo, para no distorsionar)"""
+    stats = recorder.phases[phase]
+    perf_counter = time.perf_counter
+
+    def measured(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stats['seconds'] += perf_counter() - start
+    return measured
+
+
+def _prepare_company(env, args):
+    """Crea una compañía nueva (y sus empleados, si se piden) para aislar la ejecución"""
+    company = env['res.company'].create({'name': 'Benchmark Asistencia %s' % time.strftime('%Y%m%d-%H%M%S')})
+    env.user.write({'company_ids': [(4, company.id)]})
+    if args.new_employees:
+        return company
+    departments = {
+        name: env['hr.department'].create({'name': name, 'company_id': company.id}).id
+        for name in generate_exports.DEPARTMENTS
+    }
+    employees = generate_exports.employee_list(args.employees, random.Random(args.seed))
+    env['hr.employee'].create([{
+        'name': name,
+        'identification_id': code,
+        'department_id': departments[department],
+        'company_id': company.id,
+    } for code, name, department in employees])
+    return company
+
+
+def compare(result, baseline, tolerance):
+    """Lista de regresiones de ``result`` frente a ``baseline``"""
+    regressions = []
+    for phase, stats in result['phases'].items():
+        base = baseline.get('phases', {}).get(phase)
+        if not base:
+            continue
+        for metric, minimum in (('seconds', MIN_SECONDS_DELTA), ('queries', MIN_QUERIES_DELTA)):
+            delta = stats[metric] - base[metric]
+            if delta > minimum and stats[metric] > base[metric] * (1 + tolerance):
+                regressions.append('%s.%s: %.3f -> %.3f' % (phase, metric, base[metric], stats[metric]))
+    return regressions
+
+
+def print_report(result):
+    params = result['params']
+    print('Formato %(format)s, %(employees)s empleados x %(days)s días, densidad %(density)s' % params)
+    print('Filas: %s  Total: %.3f s' % (result['outcome'].get('rows'), result['total_seconds']))
+    print('%-10s %10s %8s %10s %12s' % ('fase', 'segundos', 'llamadas', 'consultas', 'pico KiB'))
+    for phase, stats in result['phases'].items():
+        if stats['calls']:
+            print('%-10s %10.3f %8d %10d %12d' % (
+                phase, stats['seconds'], stats['calls'], stats['queries'], stats['peak_kib']))
+    measured = sum(stats['seconds'] for stats in result['phases'].values())
+    print('%-10s %10.3f' % ('otros', result['total_seconds'] - measured))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    generate_exports.add_generator_arguments(parser)
+    parser.add_argument('-c', '--config', help='Archivo de configuración de Odoo')
+    parser.add_argument('-d', '--database', help='Base de datos desechable con el módulo instalado')
+    parser.add_argument('--parse-only', action='store_true', help='Medir sólo el parseo, sin Odoo')
+    parser.add_argument('--parse-throughput', action='store_true',
+                        help='Comparar el parser del reporte ZK con el original, sin Odoo')
+    parser.add_argument('--sizes', default='1000x31,3000x31,500x90',
+                        help='Tamaños (empleados x días) de --parse-throughput')
+    parser.add_argument('--repeat', type=int, default=5, help='Repeticiones por tamaño (se toma la mejor)')
+    parser.add_argument('--min-speedup', type=float, default=1.0,
+                        help='Mejora mínima exigida frente al parser original')
+    parser.add_argument('--new-employees', action='store_true',
+                        help='No crear los empleados de antemano (mide también su alta automática)')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Desactivar tracemalloc (tiempos más precisos, sin picos de memoria)')
+    parser.add_argument('--json', help='Guardar el resultado en este archivo')
+    parser.add_argument('--baseline', help='Resultado JSON anterior con el que comparar')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Empeoramiento relativo permitido por fase (por defecto 0.2)')
+    args = parser.parse_args()
+    if args.parse_throughput:
+        results = run_parse_throughput(args)
+        if args.json:
+            with open(args.json, 'w') as handle:
+                json.dump({'parse_throughput': results}, handle, indent=2)
+        slow = [result['size'] for result in results if result['speedup'] < args.min_speedup]
+        if slow:
+            print('REGRESIÓN parser más lento de lo exigido en %s' % ', '.join(slow))
+            sys.exit(1)
+        return
+    if not args.parse_only and not args.database:
+        parser.error('Indique --database o use --parse-only')
+
+    file_name, content = generate_exports.generate(args.format, **generate_exports.generator_kwargs(args))
+    file_data = base64.b64encode(content)
+
+    recorder = PhaseRecorder(memory=not args.no_memory)
+    if recorder.memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if args.parse_only:
+        outcome = run_parse_only(file_name, content, recorder)
+    else:
+        outcome = run_pipeline(args, file_name, file_data, recorder)
+    total = time.perf_counter() - start
+    if recorder.memory:
+        tracemalloc.stop()
+
+    result = {
+        'params': dict(generate_exports.generator_kwargs(args), format=args.format, bytes=len(content)),
+        'outcome': outcome,
+        'total_seconds': total,
+        'phases': recorder.phases,
+    }
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(result, handle, indent=2, default=str)
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(result, json.load(handle), args.tolerance)
+        for regression in regressions:
+            print('REGRESIÓN %s' % regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
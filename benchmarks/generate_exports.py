@@ -0,0 +1,127 @@
+"""Generador de archivos de asistencia sintéticos para los benchmarks.
+
+Produce exportaciones con la forma real de los terminales ZK ("Reporte de
+Eventos de Asistencia") y archivos CSV/XLSX estándar, con un número
+configurable de empleados, días y densidad de marcas. Con la misma semilla el
+resultado es idéntico, de modo que las mediciones son reproducibles.
+
+Uso::
+
+    python benchmarks/generate_exports.py --format zk --employees 500 --days 31 -o /tmp/zk.csv
+"""
+import argparse
+import csv
+import io
+import random
+from datetime import date, timedelta
+
+FORMATS = ('zk', 'csv', 'xlsx')
+DEPARTMENTS = ('Producción', 'Ventas', 'Administración', 'Almacén', 'Logística')
+STANDARD_HEADER = ['Nombre', 'ID', 'Departamento', 'Fecha', 'Asistio', 'Primera Entrada', 'Ultima Salida']
+
+
+def employee_list(count, rnd):
+    """Empleados sintéticos como tuplas (identificación, nombre, departamento)"""
+    return [
+        (str(40200000000 + index), 'Empleado %05d' % index, rnd.choice(DEPARTMENTS))
+        for index in range(count)
+    ]
+
+
+def _punches(rnd, density):
+    """Marcas de un día como lista de 'HH:MM' (vacía si el empleado faltó)"""
+    if rnd.random() >= density:
+        return []
+    entry = rnd.randint(7 * 60 + 30, 10 * 60 + 30)
+    punches = [entry]
+    # Algunos días se registra también la salida (y a veces el almuerzo)
+    if rnd.random() < 0.8:
+        if rnd.random() < 0.3:
+            punches += [entry + rnd.randint(200, 260), entry + rnd.randint(270, 330)]
+        punches.append(min(entry + rnd.randint(7 * 60, 10 * 60), 23 * 60 + 59))
+    return ['%02d:%02d' % divmod(minute, 60) for minute in punches]
+
+
+def iter_zk_rows(employees=100, days=14, density=0.9, start=date(2025, 10, 1), seed=0):
+    """Filas (listas de celdas) de un Reporte de Eventos de Asistencia de ZK"""
+    rnd = random.Random(seed)
+    end = start + timedelta(days=days - 1)
+    yield ['Reporte de Eventos de Asistencia']
+    yield ['Periodo:', '', '%s ~ %s' % (start.isoformat(), end.isoformat())]
+    yield [str((start + timedelta(days=offset)).day) for offset in range(days)]
+    for code, name, department in employee_list(employees, rnd):
+        yield ['ID:', '', code, '', 'Nombre:', '', name, '', 'Departamento:', '', department]
+        yield [''.join(_punches(rnd, density)) for _day in range(days)]
+
+
+def iter_standard_rows(employees=100, days=14, density=0.9, start=date(2025, 10, 1), seed=0):
+    """Filas de un CSV/XLSX estándar, encabezado incluido"""
+    rnd = random.Random(seed)
+    yield STANDARD_HEADER
+    for code, name, department in employee_list(employees, rnd):
+        for offset in range(days):
+            punches = _punches(rnd, density)
+            yield [
+                name, code, department, (start + timedelta(days=offset)).isoformat(),
+                'Si' if punches else 'No',
+                punches[0] if punches else '',
+                punches[-1] if punches else '',
+            ]
+
+
+def generate(file_format='zk', **kwargs):
+    """Devuelve ``(nombre de archivo, contenido en bytes)`` para el formato pedido"""
+    if file_format == 'zk':
+        return 'zk_export.csv', _to_csv(iter_zk_rows(**kwargs))
+    if file_format == 'csv':
+        return 'standard.csv', _to_csv(iter_standard_rows(**kwargs))
+    if file_format == 'xlsx':
+        return 'standard.xlsx', _to_xlsx(iter_standard_rows(**kwargs))
+    raise ValueError('Formato desconocido: %s' % file_format)
+
+
+def _to_csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+def _to_xlsx(rows):
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Asistencia')
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def add_generator_arguments(parser):
+    parser.add_argument('--format', choices=FORMATS, default='zk', help='Formato del archivo generado')
+    parser.add_argument('--employees', type=int, default=100, help='Número de empleados')
+    parser.add_argument('--days', type=int, default=14, help='Número de días del periodo')
+    parser.add_argument('--density', type=float, default=0.9,
+                        help='Probabilidad de que un empleado marque un día (0-1)')
+    parser.add_argument('--seed', type=int, default=0, help='Semilla del generador')
+
+
+def generator_kwargs(args):
+    return {'employees': args.employees, 'days': args.days, 'density': args.density, 'seed': args.seed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    add_generator_arguments(parser)
+    parser.add_argument('-o', '--output', help='Ruta del archivo (por defecto, el nombre generado)')
+    args = parser.parse_args()
+    file_name, content = generate(args.format, **generator_kwargs(args))
+    output = args.output or file_name
+    with open(output, 'wb') as handle:
+        handle.write(content)
+    print('%s: %s bytes' % (output, len(content)))
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""Parser del Reporte de Eventos de Asistencia anterior al parser de una pasada.
+
+Copia fiel de ``ImportAttendanceWizard._process_csv_file`` y
+``_parse_attendance_report`` de la versión original del módulo, sin el ORM,
+para que bench_import.py compare el rendimiento del parser actual con él.
+"""
+import base64
+import re
+from datetime import datetime, timedelta
+
+
+def _decode_bytes(data_bytes):
+    for enc in ('utf-8', 'utf-8-sig', 'latin-1', 'cp1252'):
+        try:
+            return data_bytes.decode(enc)
+        except UnicodeDecodeError:
+            continue
+    return data_bytes.decode('utf-8', errors='ignore')
+
+
+def _generate_date_range(start_str, end_str):
+    start = datetime.strptime(start_str, '%Y-%m-%d').date()
+    end = datetime.strptime(end_str, '%Y-%m-%d').date()
+    dates = []
+    current = start
+    while current <= end:
+        dates.append(current.strftime('%Y-%m-%d'))
+        current += timedelta(days=1)
+    return dates
+
+
+def _extract_timestamps(time_str):
+    return re.findall(r'\d{2}:\d{2}', time_str)
+
+
+def parse_report(file_data):
+    """Filas del reporte a partir del archivo en base64, como el asistente original"""
+    lines = _decode_bytes(base64.b64decode(file_data)).splitlines()
+    data = []
+    period_start = None
+    period_end = None
+    for line in lines:
+        if 'Periodo:' in line:
+            match = re.search(r'(\d{4}-\d{2}-\d{2})\s*~\s*(\d{4}-\d{2}-\d{2})', line)
+            if match:
+                period_start = match.group(1)
+                period_end = match.group(2)
+                break
+    if not period_start or not period_end:
+        period_end = datetime.now().date()
+        period_start = period_end - timedelta(days=14)
+        period_start = period_start.strftime('%Y-%m-%d')
+        period_end = period_end.strftime('%Y-%m-%d')
+
+    dates = _generate_date_range(period_start, period_end)
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if 'ID:' in line and 'Nombre:' in line:
+            parts = line.split(',')
+            employee_id = parts[2].strip() if len(parts) > 2 else 'N/A'
+
+            name_idx = next((idx for idx, p in enumerate(parts) if 'Nombre:' in p), None)
+            name = parts[name_idx + 2].strip() if name_idx and len(parts) > name_idx + 2 else 'Sin Nombre'
+
+            dept_idx = next((idx for idx, p in enumerate(parts) if 'Departamento:' in p), None)
+            department = parts[dept_idx + 2].strip() if dept_idx and len(parts) > dept_idx + 2 else 'N/A'
+
+            if i + 1 < len(lines):
+                times = lines[i + 1].split(',')
+                for day_idx, time_str in enumerate(times):
+                    if day_idx >= len(dates):
+                        break
+                    date = dates[day_idx]
+                    time_str = time_str.strip()
+                    if time_str:
+                        timestamps = _extract_timestamps(time_str)
+                        attended = len(timestamps) > 0
+                        data.append({
+                            'nombre': name,
+                            'id': employee_id,
+                            'departamento': department,
+                            'fecha': date,
+                            'asistio': 'Si' if attended else 'No',
+                            'primera_entrada': timestamps[0] if timestamps else None,
+                            'ultima_salida': timestamps[-1] if timestamps else None,
+                            'total_registros': len(timestamps),
+                        })
+                    else:
+                        data.append({
+                            'nombre': name,
+                            'id': employee_id,
+                            'departamento': department,
+                            'fecha': date,
+                            'asistio': 'No',
+                            'primera_entrada': None,
+                            'ultima_salida': None,
+                            'total_registros': 0,
+                        })
+                i += 1
+        i += 1
+    return data
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""Simulador local de un terminal ZK para probar la sincronización de dispositivos.
+
+Sirve por HTTP el registro de marcas de empleados sintéticos (los mismos que
+genera generate_exports.py, identificados por su número de identificación) y
+añade marcas nuevas periódicamente. Un dispositivo con protocolo "Simulador"
+apuntando a este host y puerto se sincroniza igual que un terminal real:
+
+    python benchmarks/zk_simulator.py --employees 200 --days 30 --port 4370
+
+Endpoints:
+
+- ``GET /count``: ``{"records": n}``
+- ``GET /attendance?since=AAAA-MM-DDTHH:MM:SS``: marcas posteriores a ``since``
+"""
+import argparse
+import bisect
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import generate_exports
+
+
+class PunchLog:
+    """Registro de marcas ordenado por fecha y hora"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timestamps = []
+        self._punches = []
+
+    def add(self, user_id, timestamp):
+        with self._lock:
+            index = bisect.bisect_right(self._timestamps, timestamp)
+            self._timestamps.insert(index, timestamp)
+            self._punches.insert(index, {'user_id': user_id, 'timestamp': timestamp.isoformat()})
+
+    def count(self):
+        return len(self._timestamps)
+
+    def since(self, timestamp=None):
+        with self._lock:
+            start = bisect.bisect_right(self._timestamps, timestamp) if timestamp else 0
+            return self._punches[start:]
+
+
+def seed_history(log, employees, days, density, rnd):
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    for offset in range(days, 0, -1):
+        day = today - timedelta(days=offset)
+        for code, _name, _department in employees:
+            if rnd.random() >= density:
+                continue
+            entry = day + timedelta(minutes=rnd.randint(7 * 60 + 30, 10 * 60 + 30), seconds=rnd.randint(0, 59))
+            log.add(code, entry)
+            log.add(code, entry + timedelta(minutes=rnd.randint(7 * 60, 10 * 60)))
+
+
+def make_handler(log):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/count':
+                payload = {'records': log.count()}
+            elif url.path == '/attendance':
+                since = parse_qs(url.query).get('since')
+                payload = log.since(datetime.fromisoformat(since[0]) if since else None)
+            else:
+                self.send_error(404)
+                return
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            return None
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4370)
+    parser.add_argument('--employees', type=int, default=100, help='Número de empleados')
+    parser.add_argument('--days', type=int, default=7, help='Días de historial iniciales')
+    parser.add_argument('--density', type=float, default=0.9, help='Probabilidad de asistencia diaria')
+    parser.add_argument('--interval', type=float, default=5.0,
+                        help='Segundos entre marcas nuevas en vivo (0 para desactivar)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    employees = generate_exports.employee_list(args.employees, rnd)
+    log = PunchLog()
+    seed_history(log, employees, args.days, args.density, rnd)
+
+    if args.interval > 0:
+        def live_punches():
+            while True:
+                time.sleep(args.interval)
+                log.add(rnd.choice(employees)[0], datetime.now().replace(microsecond=0))
+        threading.Thread(target=live_punches, daemon=True).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(log))
+    print('Simulador ZK en http://%s:%s con %s marcas' % (args.host, args.port, log.count()))
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file